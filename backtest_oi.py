@@ -0,0 +1,102 @@
+"""Backtest the OI crossover rules over a date range and sweep their parameters.
+
+PE-CE history comes from QuestDB (one range query) or a CSV with
+ts,index,pe_ce; spot from the tick recorder's Parquet files. Every
+threshold x poll interval x strike offset combination is evaluated on a
+process pool (replay/backtest.py) and ranked by P&L.
+
+    python backtest_oi.py 2025-10-01 2026-09-30 --index NIFTY \\
+        --thresholds 500:5000:250 --intervals 5,20,60,300 --offsets 0,100,200 \\
+        --qty 75 --workers 8 --report sweep.json
+    python backtest_oi.py 2026-10-16 2026-10-16 --thresholds 2000 --intervals 20 --offsets 0 --trades
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from replay.backtest import DEFAULT_DAYS_TO_EXPIRY, DEFAULT_IV, backtest, sweep
+from replay.data import load_index_ticks_range, load_oi_csv, load_oi_questdb
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TICKS_ROOT = os.path.join(BASE_DIR, "ticks")
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s"
+)
+
+
+def parse_grid(value: str):
+    """"a,b,c" or "start:stop:step" (stop inclusive) -> list of floats."""
+    if ":" in value:
+        start, stop, step = (float(v) for v in value.split(":"))
+        return [float(v) for v in np.arange(start, stop + step / 2, step)]
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized OI crossover backtest / parameter sweep")
+    parser.add_argument("first_day", help="First session date, YYYY-MM-DD")
+    parser.add_argument("last_day", help="Last session date (inclusive), YYYY-MM-DD")
+    parser.add_argument("--index", default="NIFTY", choices=("NIFTY", "BANKNIFTY"))
+    parser.add_argument("--ticks-root", default=DEFAULT_TICKS_ROOT, help="Tick recorder directory")
+    parser.add_argument("--oi-csv", help="PE-CE rows (ts,index,pe_ce) instead of QuestDB")
+    parser.add_argument("--thresholds", type=parse_grid, default=[2000.0], help="Dead-zone grid")
+    parser.add_argument("--intervals", type=parse_grid, default=[20.0], help="Poll interval grid (seconds)")
+    parser.add_argument("--offsets", type=parse_grid, default=[0.0], help="Extra OTM points grid")
+    parser.add_argument("--qty", type=int, default=1, help="Contract quantity per trade")
+    parser.add_argument("--cost", type=float, default=0.0, help="Round-trip cost per trade (rupees)")
+    parser.add_argument("--iv", type=float, default=DEFAULT_IV, help="Implied volatility for the delta model")
+    parser.add_argument("--days-to-expiry", type=float, default=DEFAULT_DAYS_TO_EXPIRY)
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--top", type=int, default=20, help="Rows printed")
+    parser.add_argument("--trades", action="store_true", help="Print the trades of the best parameter set")
+    parser.add_argument("--report", help="Write every row as JSON")
+    args = parser.parse_args()
+
+    if args.oi_csv:
+        oi_ts, pe_ce = load_oi_csv(args.oi_csv).get(args.index, (np.empty(0), np.empty(0)))
+    else:
+        oi_ts, pe_ce = load_oi_questdb(args.first_day, args.index, args.last_day)
+    spot_ts, spot = load_index_ticks_range(args.ticks_root, args.first_day, args.last_day, args.index)
+    if len(oi_ts) == 0 or len(spot_ts) == 0:
+        logging.error(f"Need both PE-CE rows ({len(oi_ts)}) and recorded spot ticks ({len(spot_ts)})")
+        sys.exit(1)
+    data = {"oi_ts": oi_ts, "pe_ce": pe_ce, "spot_ts": spot_ts, "spot": spot}
+
+    combos = len(args.thresholds) * len(args.intervals) * len(args.offsets)
+    started = time.monotonic()
+    rows = sweep(data, args.thresholds, args.intervals, args.offsets, qty=args.qty, cost=args.cost,
+                 iv=args.iv, days=args.days_to_expiry, workers=args.workers)
+    print(f"{combos} parameter sets over {len(oi_ts)} PE-CE rows in {time.monotonic() - started:.1f}s")
+
+    print(f"{'threshold':>10} {'interval':>9} {'offset':>7} {'trades':>7} {'win%':>6} "
+          f"{'pnl':>12} {'avg':>10} {'max_dd':>12}")
+    for row in rows[:args.top]:
+        win = f"{row['win_rate'] * 100:.1f}" if row["win_rate"] is not None else "-"
+        avg = f"{row['avg_trade']:.2f}" if row["avg_trade"] is not None else "-"
+        print(f"{row['threshold']:>10.0f} {row['interval']:>9.0f} {row['offset']:>7.0f} {row['trades']:>7} "
+              f"{win:>6} {row['pnl']:>12.2f} {avg:>10} {row['max_drawdown']:>12.2f}")
+
+    if args.trades and rows:
+        best = rows[0]
+        result = backtest(data, best["threshold"], best["interval"], best["offset"], qty=args.qty,
+                          cost=args.cost, iv=args.iv, days=args.days_to_expiry)
+        for trade in result["trades"]:
+            print(f"  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(trade['entry_ts']))} "
+                  f"{trade['direction']:<8} {trade['entry_spot']:>10.2f} → {trade['exit_spot']:>10.2f} "
+                  f"pnl={trade['pnl']:.2f}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(rows, f, indent=2, default=float)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Candle builder: rolling 1m/5m/15m OHLCV+OI bars from the feeder's tick ring.
+
+Follows the shared-memory tick ring (market_data/shm_ring.py) like the tick
+recorder and publishes every closed bar to Redis (see market_data/candles.py):
+
+    python candle_builder.py [--timeframes 1m,5m,15m] [--history 500]
+
+Reading bars from any process:
+    from market_data.candles import get_candles
+    bars = get_candles(redis_client, "Nifty 50", "5m", 20)
+"""
+import argparse
+import logging
+import time
+
+from market_data.candles import DEFAULT_HISTORY, DEFAULT_TIMEFRAMES, CandleBuilder, CandlePublisher
+from market_data.shm_ring import TickRing
+from utils.logging_config import setup_logging
+from utils.redis_helper import get_redis_client
+
+POLL_INTERVAL = 0.05
+
+# Re-open the ring after this long without ticks (feeder may have restarted)
+REATTACH_AFTER = 5.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build streaming candles from feeder ticks")
+    parser.add_argument("--timeframes", default=",".join(DEFAULT_TIMEFRAMES),
+                        help="Comma-separated timeframes (1m,5m,15m)")
+    parser.add_argument("--history", type=int, default=DEFAULT_HISTORY,
+                        help="Closed bars kept per token and timeframe")
+    args = parser.parse_args()
+
+    setup_logging()
+    publisher = CandlePublisher(get_redis_client(), args.history)
+    builder = CandleBuilder(args.timeframes.split(","), args.history, on_close=publisher.add)
+
+    ring = None
+    cursor = 0
+    idle_since = time.monotonic()
+    while True:
+        if ring is None:
+            ring = TickRing.attach()
+            if ring is None:
+                time.sleep(1.0)
+                continue
+            cursor = ring.write_seq
+            logging.info(f"[CANDLES] Attached to tick ring at seq {cursor}")
+
+        ticks, cursor = ring.read_since(cursor)
+        builder.append(ticks)
+        builder.close_due(time.time())
+        publisher.flush()
+
+        if len(ticks) == 0:
+            if time.monotonic() - idle_since > REATTACH_AFTER:
+                ring.close()
+                ring = None
+                idle_since = time.monotonic()
+            time.sleep(POLL_INTERVAL)
+        else:
+            idle_since = time.monotonic()
+
+
+if __name__ == "__main__":
+    main()
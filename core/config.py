@@ -23,6 +23,9 @@ def load_config(uid: str) -> dict:
     
     Optional fields:
         - totp: Time-based OTP (usually passed at runtime)
+        - warmup_time: "HH:MM" for the agent's pre-open warm-up (default "09:05")
+        - depth_pricing: true to subscribe market depth for traded legs and
+          price MARKET legs as protected limit orders (default false)
     
     Args:
         uid: User ID
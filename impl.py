@@ -5,6 +5,7 @@ This is the refactored version of impl.py that coordinates all components.
 import sys
 import time
 import logging
+import threading
 
 # Core imports
 from core.config import load_config, get_file_paths
@@ -16,14 +17,22 @@ from services.balance_service import BalanceService
 from services.position_service import PositionService
 from services.orderbook_service import OrderbookService
 from services.order_service import OrderService
+from services.warmup_service import WarmupService
+from services.position_ltp_service import PositionLtpService
+from services.depth_service import DepthService
+from services.latency_service import LatencyService
 
 # Watcher imports
 from watchers.level_ce_watcher import LevelCEWatcher
 from watchers.level_pe_watcher import LevelPEWatcher
 
+# Market data imports
+from market_data.tick_dispatcher import TickDispatcher
+
 # Utility imports
 from utils.logging_config import setup_logging
 from utils.redis_helper import get_redis_client
+from utils.spot import FEED_TOKENS
 
 
 def main():
@@ -62,19 +71,57 @@ def main():
     balance_service = BalanceService(client, redis_client, uid, file_paths['balance'])
     position_service = PositionService(client, redis_client, uid, file_paths['position'])
     orderbook_service = OrderbookService(client, redis_client, uid, file_paths['orderbook'], file_paths['base_dir'])
-    order_service = OrderService(client, redis_client, uid)
+    
+    # Optional depth books for the legs we trade (limit pricing + slippage log)
+    depth_service = DepthService(auth_service, redis_client, uid) if config.get("depth_pricing") else None
+    order_service = OrderService(client, redis_client, uid, depth_service=depth_service)
+    
+    # Signal-to-fill latency of OI auto trades (fills joined from the order report)
+    latency_service = LatencyService(client, redis_client, uid)
+    
+    # Pre-open warm-up (default 09:05, override with "warmup_time" in config)
+    warmup_service = WarmupService(
+        auth_service,
+        redis_client,
+        uid,
+        config,
+        services={
+            "positions": position_service,
+            "margins": balance_service,
+            "orderbook": orderbook_service,
+        },
+        order_service=order_service
+    )
+    
+    # Live LTPs for open positions (websocket → POSITION_LTP blob for the UI)
+    position_ltp_service = PositionLtpService(auth_service, redis_client, uid, file_paths['position'])
+    
+    # Set by a watcher trigger so the loop places the order without waiting out its sleep
+    wake_event = threading.Event()
     
     # Initialize watchers
     watchers = [
-        LevelCEWatcher(redis_client, uid),
-        LevelPEWatcher(redis_client, uid)
+        LevelCEWatcher(redis_client, uid, on_trigger=wake_event.set),
+        LevelPEWatcher(redis_client, uid, on_trigger=wake_event.set)
     ]
     
+    # Tick-driven watcher evaluation from the spot feeder's shared-memory ring
+    tick_dispatcher = TickDispatcher()
+    for index, token in FEED_TOKENS.items():
+        for watcher in watchers:
+            tick_dispatcher.add_listener(
+                token, lambda ltp, ts, w=watcher, i=index: w.on_tick(i, ltp, ts)
+            )
+    tick_dispatcher.start()
+    
     logging.info(f"[SUCCESS] All services initialized for UID: {uid}")
     
     # Main loop
     while True:
         try:
+            # Scheduled / requested pre-open warm-up
+            warmup_service.run_if_due()
+            
             # Process login requests
             auth_service.process_login_if_requested()
             
@@ -86,21 +133,32 @@ def main():
                  position_service.client = client
                  orderbook_service.client = client
                  order_service.client = client
+                 latency_service.client = client
 
             # Process data fetch requests
             balance_service.process_if_requested()
             position_service.process_if_requested()
             orderbook_service.process_if_requested()
+            position_ltp_service.process()
+            if depth_service is not None:
+                depth_service.process()
             
             # Process order requests
             order_service.process_all()
+            latency_service.process()
             
-            # Check watchers for trigger conditions
+            # Check watchers for trigger conditions: ticks evaluate them in the
+            # dispatcher thread; without a live tick stream, poll Redis spot
+            live_ticks = tick_dispatcher.is_live()
             for watcher in watchers:
-                watcher.check_and_trigger()
+                if live_ticks:
+                    watcher.refresh()
+                else:
+                    watcher.check_and_trigger()
             
-            # Sleep before next iteration
-            time.sleep(3)
+            # Sleep before next iteration (a trigger wakes the loop early)
+            wake_event.wait(3)
+            wake_event.clear()
         
         except Exception as e:
             logging.error(f"Critical error in main loop: {e}")
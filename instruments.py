@@ -6,6 +6,13 @@ Purpose:
 - Filters NIFTY and BANKNIFTY options only
 - Normalizes Redis keys as: INDEX_YYYY-MM-DD_CE/PE_STRIKE
 - Stores mappings in Redis hash NEO_INSTR_OPT
+- Stores per-underlying lot size, tick size and freeze quantity in
+  NEO_CONTRACT_META (JSON per underlying)
+- Streams the nse_cm scrip master into NEO_INSTR_EQ (symbol -> trading symbol),
+  NEO_INSTR_EQ_TOKEN (symbol -> token) and NEO_INSTR_EQ_REV (token -> symbol)
+- Publishes a versioned change event after each options refresh:
+  NEO_INSTR_VERSION is bumped, the added/removed contracts are stored in
+  NEO_INSTR_DIFF under the new version and announced on NEO_INSTR_EVENTS
 - Idempotent: safe to re-run (overwrites existing keys)
 
 Usage:
@@ -16,17 +23,24 @@ Usage:
 
 Verification:
     redis-cli HGET NEO_INSTR_OPT NIFTY_2026-01-27_CE_26000
+    redis-cli HGET NEO_INSTR_EQ RELIANCE
 """
 
 import redis
 import re
 import sys
 import os
+import csv
 import json
 from datetime import datetime
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, Iterator
 import logging
 
+from utils.contract_index import (
+    OPTION_SEGMENT, REDIS_CHANNEL_EVENTS, REDIS_KEY_DIFF, REDIS_KEY_OPT, REDIS_KEY_OPT_REV,
+    REDIS_KEY_OPT_TOKEN, REDIS_KEY_VERSION,
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,9 +53,17 @@ REDIS_HOST = "localhost"
 REDIS_PORT = 6379
 REDIS_DB = 0
 
-# Redis hash keys
-REDIS_KEY_OPT = "NEO_INSTR_OPT"
+# Redis hash keys (option master / token / change keys: utils.contract_index)
 REDIS_KEY_EQ = "NEO_INSTR_EQ"
+REDIS_KEY_EQ_TOKEN = "NEO_INSTR_EQ_TOKEN"
+REDIS_KEY_EQ_REV = "NEO_INSTR_EQ_REV"
+REDIS_KEY_META = "NEO_CONTRACT_META"
+
+# Change notification history (consumed by utils.contract_index)
+DIFF_HISTORY = 20  # versions of diffs kept for slow consumers
+
+# Fields written per HSET batch inside one pipeline
+PIPELINE_CHUNK = 5000
 
 # Supported indices
 SUPPORTED_INDICES = {"NIFTY", "BANKNIFTY"}
@@ -139,28 +161,76 @@ def load_scrip_master_from_csv(csv_path: str) -> Dict[str, str]:
     return instruments
 
 
-def load_scrip_master_from_api(consumer_key: str) -> Dict[str, str]:
-    """Load scrip master from Kotak Neo API."""
-    try:
-        from neo_api_client import NeoAPI
+def _neo_client(consumer_key: str):
+    """Unauthenticated NeoAPI client (scrip master does not need login)."""
+    from neo_api_client import NeoAPI
+    
+    return NeoAPI(
+        environment='prod',
+        access_token=None,
+        neo_fin_key=None,
+        consumer_key=consumer_key
+    )
+
+
+def iter_scrip_master(client, exchange_segment: str) -> Iterator[dict]:
+    """
+    Yield scrip master rows one at a time.
+    
+    scrip_master() returns either a list of dicts or a URL to the segment CSV.
+    The CSV is streamed line by line so the full file is never held in memory.
+    """
+    response = client.scrip_master(exchange_segment=exchange_segment)
+    
+    if not response:
+        logger.warning(f"Empty response from scrip_master API ({exchange_segment})")
+        return
+    
+    if isinstance(response, dict):
+        response = response.get("data") or response.get("filesPaths") or []
+    
+    if isinstance(response, str) and response.startswith("http"):
+        import requests
         
-        client = NeoAPI(
-            environment='prod',
-            access_token=None,
-            neo_fin_key=None,
-            consumer_key=consumer_key
-        )
+        with requests.get(response, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            lines = (line for line in resp.iter_lines(decode_unicode=True) if line)
+            for row in csv.DictReader(lines):
+                # Scrip master CSV headers carry stray spaces/semicolons
+                yield {k.strip().rstrip(';'): (v or '').strip() for k, v in row.items() if k}
+        return
+    
+    for scrip in response:
+        yield scrip
+
+
+def _scrip_number(scrip: dict, field: str) -> Optional[float]:
+    """Parse a numeric scrip master field, None if absent or malformed."""
+    try:
+        value = float(scrip.get(field))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def load_scrip_master_from_api(consumer_key: str, contract_meta: Optional[Dict[str, dict]] = None,
+                               tokens: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Load scrip master from Kotak Neo API.
+    
+    Args:
+        consumer_key: Neo consumer key
+        contract_meta: Optional dict filled in place with
+            {index: {"lot_size", "tick_size", "freeze_qty"}} from the same pass
+        tokens: Optional dict filled in place with {contract key: nToken}
+    """
+    try:
+        client = _neo_client(consumer_key)
         
         logger.info("Fetching scrip master from Kotak Neo API...")
-        response = client.scrip_master(exchange_segment="nse_fo")
-        
-        if not response:
-            logger.warning("Empty response from scrip_master API")
-            return {}
-        
         instruments = {}
         
-        for scrip in response:
+        for scrip in iter_scrip_master(client, OPTION_SEGMENT):
             display_name = scrip.get('pSymbolName', '') or scrip.get('sSymbol', '')
             instrument_id = str(scrip.get('nToken', '')) or scrip.get('pExchSeg', '')
             trading_symbol = scrip.get('pTrdSymbol', '')
@@ -177,6 +247,21 @@ def load_scrip_master_from_api(consumer_key: str) -> Dict[str, str]:
             redis_key = build_redis_key(index, date_iso, option_type, strike)
             value = trading_symbol if trading_symbol else instrument_id
             instruments[redis_key] = value
+            
+            if tokens is not None and scrip.get('nToken'):
+                tokens[redis_key] = str(scrip['nToken'])
+            
+            if contract_meta is not None and index not in contract_meta:
+                lot_size = _scrip_number(scrip, 'lLotSize')
+                tick_size = _scrip_number(scrip, 'dTickSize')
+                freeze_qty = _scrip_number(scrip, 'lFreezeQty')
+                if lot_size:
+                    contract_meta[index] = {
+                        "lot_size": int(lot_size),
+                        # Scrip master prices are in paise
+                        "tick_size": tick_size / 100 if tick_size else None,
+                        "freeze_qty": int(freeze_qty) if freeze_qty else None,
+                    }
         
         logger.info(f"Fetched {len(instruments)} instruments from API")
         return instruments
@@ -189,6 +274,55 @@ def load_scrip_master_from_api(consumer_key: str) -> Dict[str, str]:
         return {}
 
 
+def load_equity_master_from_api(consumer_key: str) -> Dict[str, Dict[str, str]]:
+    """
+    Stream the nse_cm scrip master and build equity lookup maps.
+    
+    Only EQ-series scrips are kept (e.g. pTrdSymbol "RELIANCE-EQ").
+    
+    Returns:
+        Dict keyed by Redis hash name:
+            NEO_INSTR_EQ:       symbol -> trading symbol
+            NEO_INSTR_EQ_TOKEN: symbol -> instrument token
+            NEO_INSTR_EQ_REV:   token  -> symbol
+    """
+    symbol_to_trd = {}
+    symbol_to_token = {}
+    token_to_symbol = {}
+    
+    try:
+        client = _neo_client(consumer_key)
+        
+        logger.info("Fetching nse_cm scrip master from Kotak Neo API...")
+        for scrip in iter_scrip_master(client, "nse_cm"):
+            trading_symbol = str(scrip.get('pTrdSymbol', '')).strip()
+            group = str(scrip.get('pGroup', '')).strip()
+            token = str(scrip.get('pSymbol', '') or scrip.get('nToken', '')).strip()
+            
+            if not trading_symbol or not token:
+                continue
+            if group != "EQ" and not trading_symbol.endswith("-EQ"):
+                continue
+            
+            symbol = trading_symbol.rsplit("-", 1)[0].upper()
+            symbol_to_trd[symbol] = trading_symbol
+            symbol_to_token[symbol] = token
+            token_to_symbol[token] = symbol
+        
+        logger.info(f"Fetched {len(symbol_to_trd)} equity instruments from API")
+        
+    except ImportError:
+        logger.warning("neo_api_client not installed")
+    except Exception as e:
+        logger.error(f"Error fetching equity master from API: {e}")
+    
+    return {
+        REDIS_KEY_EQ: symbol_to_trd,
+        REDIS_KEY_EQ_TOKEN: symbol_to_token,
+        REDIS_KEY_EQ_REV: token_to_symbol,
+    }
+
+
 def populate_redis(instruments: Dict[str, str], redis_key: str = REDIS_KEY_OPT) -> int:
     """Populate Redis hash with instrument mappings."""
     if not instruments:
@@ -204,48 +338,141 @@ def populate_redis(instruments: Dict[str, str], redis_key: str = REDIS_KEY_OPT)
         logger.error(f"Failed to connect to Redis: {e}")
         raise
     
-    existing_count = r.hlen(redis_key)
-    if existing_count > 0:
-        logger.info(f"Clearing existing {existing_count} keys from {redis_key}")
-        r.delete(redis_key)
+    previous = r.hgetall(redis_key)
+    if previous:
+        logger.info(f"Replacing existing {len(previous)} keys in {redis_key}")
     
     logger.info(f"Populating {len(instruments)} instruments to {redis_key}...")
-    r.hset(redis_key, mapping=instruments)
-    
-    final_count = r.hlen(redis_key)
+    final_count = write_hash_pipelined(r, redis_key, instruments)
     logger.info(f"Successfully populated {final_count} instruments")
     
+    if redis_key == REDIS_KEY_OPT:
+        publish_instrument_change(r, previous, instruments)
+    
     return final_count
 
 
-def main():
-    """Main entry point."""
-    logger.info("=" * 60)
-    logger.info("Neo Instrument Builder - Starting")
-    logger.info("=" * 60)
+# INCR the version, store its diff, prune the oldest and announce it as one
+# atomic step, so concurrent publishers can never reuse a version number
+PUBLISH_CHANGE_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('HSET', KEYS[2], tostring(version), ARGV[1])
+redis.call('HDEL', KEYS[2], tostring(version - tonumber(ARGV[2])))
+redis.call('PUBLISH', ARGV[3], cjson.encode({
+    version = version, added = tonumber(ARGV[4]), removed = tonumber(ARGV[5]), ts = ARGV[6]
+}))
+return version
+"""
+
+
+def publish_instrument_change(r, previous: Dict[str, str], current: Dict[str, str]) -> int:
+    """
+    Bump NEO_INSTR_VERSION and publish the diff between two master snapshots.
     
-    # Get consumer key from config or environment
-    consumer_key = None
+    The version INCR, the diff and the pub/sub event go out in one server-side
+    script so a consumer that sees the new version can always find its diff.
     
-    if len(sys.argv) >= 2:
-        uid = sys.argv[1]
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        config_file = os.path.join(base_dir, uid, f"{uid}.json")
-        
-        if os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-                consumer_key = config.get('consumer_key')
-                logger.info(f"Loaded config from {config_file}")
+    Returns:
+        The new version number
+    """
+    added = {k: v for k, v in current.items() if previous.get(k) != v}
+    removed = [k for k in previous if k not in current]
     
-    if not consumer_key:
-        consumer_key = os.environ.get("NEO_CONSUMER_KEY")
+    version = int(r.eval(
+        PUBLISH_CHANGE_SCRIPT, 2, REDIS_KEY_VERSION, REDIS_KEY_DIFF,
+        json.dumps({"added": added, "removed": removed}),
+        DIFF_HISTORY,
+        REDIS_CHANNEL_EVENTS,
+        len(added),
+        len(removed),
+        datetime.now().isoformat(timespec="seconds")
+    ))
+    
+    logger.info(f"Published instrument master v{version}: +{len(added)} / -{len(removed)}")
+    return version
+
+
+def write_hash_pipelined(r, redis_key: str, mapping: Dict[str, str], chunk_size: int = PIPELINE_CHUNK) -> int:
+    """
+    Replace a Redis hash in bulk.
+    
+    Fields are written to a staging key in chunked HSETs on one pipeline and
+    then RENAMEd over the live key, so readers never see a half-built or
+    empty hash.
+    """
+    staging_key = f"{redis_key}:staging"
+    items = list(mapping.items())
     
+    pipe = r.pipeline(transaction=False)
+    pipe.delete(staging_key)
+    for start in range(0, len(items), chunk_size):
+        pipe.hset(staging_key, mapping=dict(items[start:start + chunk_size]))
+    pipe.rename(staging_key, redis_key)
+    pipe.hlen(redis_key)
+    
+    return pipe.execute()[-1]
+
+
+def populate_contract_meta(contract_meta: Dict[str, dict]) -> int:
+    """Store per-underlying contract metadata as JSON in NEO_CONTRACT_META."""
+    if not contract_meta:
+        logger.warning("No contract metadata to populate")
+        return 0
+    
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+    mapping = {index: json.dumps(meta) for index, meta in contract_meta.items()}
+    count = write_hash_pipelined(r, REDIS_KEY_META, mapping)
+    logger.info(f"Populated contract metadata for {sorted(contract_meta)}")
+    return count
+
+
+def populate_option_tokens(tokens: Dict[str, str]) -> int:
+    """Store option websocket tokens (forward and reverse) for feed subscribers."""
+    if not tokens:
+        logger.warning("No option tokens to populate")
+        return 0
+    
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+    count = write_hash_pipelined(r, REDIS_KEY_OPT_TOKEN, tokens)
+    write_hash_pipelined(r, REDIS_KEY_OPT_REV, {token: key for key, token in tokens.items()})
+    logger.info(f"Populated {count} option tokens")
+    return count
+
+
+def populate_equity_redis(maps: Dict[str, Dict[str, str]]) -> int:
+    """Populate the equity symbol/token hashes. Returns number of symbols."""
+    if not maps.get(REDIS_KEY_EQ):
+        logger.warning("No equity instruments to populate")
+        return 0
+    
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+    
+    count = 0
+    for redis_key, mapping in maps.items():
+        written = write_hash_pipelined(r, redis_key, mapping)
+        logger.info(f"Populated {written} fields in {redis_key}")
+        if redis_key == REDIS_KEY_EQ:
+            count = written
+    
+    return count
+
+
+def refresh_instruments(consumer_key: Optional[str]) -> int:
+    """
+    Rebuild every instrument hash from the scrip master.
+    
+    Used by main() and by the agent's pre-open warm-up.
+    
+    Returns:
+        Number of option instruments now in NEO_INSTR_OPT (0 on failure)
+    """
     instruments = {}
+    contract_meta = {}
+    option_tokens = {}
     
     # Try API first
     if consumer_key:
-        instruments = load_scrip_master_from_api(consumer_key)
+        instruments = load_scrip_master_from_api(consumer_key, contract_meta, option_tokens)
     
     # Fall back to CSV
     if not instruments:
@@ -255,14 +482,20 @@ def main():
             instruments = load_scrip_master_from_csv(csv_path)
         else:
             logger.error(f"CSV file not found: {csv_path}")
-            return
+            return 0
+    
+    # Equity master is independent of the options master
+    if consumer_key:
+        populate_equity_redis(load_equity_master_from_api(consumer_key))
     
     if not instruments:
         logger.error("No instruments loaded - aborting")
-        return
+        return 0
     
     # Populate Redis
     count = populate_redis(instruments)
+    populate_contract_meta(contract_meta)
+    populate_option_tokens(option_tokens)
     
     if count > 0:
         sample_keys = list(instruments.keys())[:3]
@@ -273,6 +506,34 @@ def main():
             value = r.hget(REDIS_KEY_OPT, key)
             logger.info(f"  {key} = {value}")
     
+    return count
+
+
+def main():
+    """Main entry point."""
+    logger.info("=" * 60)
+    logger.info("Neo Instrument Builder - Starting")
+    logger.info("=" * 60)
+    
+    # Get consumer key from config or environment
+    consumer_key = None
+    
+    if len(sys.argv) >= 2:
+        uid = sys.argv[1]
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        config_file = os.path.join(base_dir, uid, f"{uid}.json")
+        
+        if os.path.exists(config_file):
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+                consumer_key = config.get('consumer_key')
+                logger.info(f"Loaded config from {config_file}")
+    
+    if not consumer_key:
+        consumer_key = os.environ.get("NEO_CONSUMER_KEY")
+    
+    refresh_instruments(consumer_key)
+    
     logger.info("\n" + "=" * 60)
     logger.info("Neo Instrument Builder - Complete")
     logger.info("=" * 60)
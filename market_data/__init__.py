@@ -0,0 +1 @@
+"""Market data feed components (websocket feed, replay, tick handling)."""
@@ -0,0 +1,275 @@
+"""Streaming OHLCV+OI candles built from the tick stream.
+
+CandleBuilder keeps, per (token, timeframe), a fixed-size NumPy ring of
+closed bars plus the bar currently forming. Bars are aligned to epoch
+multiples of the timeframe (IST is UTC+05:30, so 1m/5m/15m boundaries line
+up with the exchange clock). A bar closes when the first tick of a later
+bucket arrives, or via close_due() once its bucket has ended, so quiet
+tokens still publish on time. Buckets without ticks produce no bar.
+
+Volume in Neo ticks is the cumulative day volume; bar volume is the
+increase over the bar. Index ticks carry no volume/OI (NaN -> 0 / NaN).
+
+Closed bars go to Redis as well, for other processes and the UI:
+
+    CANDLES:{tf}:{token}   list of JSON bars, newest last, capped at history
+    CANDLE_CLOSE           pub/sub channel, one message per closed bar
+
+Usage:
+    builder = CandleBuilder(on_close=publisher.add)
+    builder.append(ticks)                      # TICK_DTYPE batch from the ring
+    builder.close_due(time.time())
+    bars = builder.bars("Nifty 50", "5m", 20)  # structured array, oldest first
+
+    bars = get_candles(redis_client, "Nifty 50", "5m", 20)   # any process
+"""
+import json
+import logging
+import math
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAMES = {"1m": 60, "5m": 300, "15m": 900}
+DEFAULT_TIMEFRAMES = ("1m", "5m", "15m")
+
+# Closed bars kept per token and timeframe
+DEFAULT_HISTORY = 500
+
+# Seconds after a bucket ends before close_due() closes it without a new tick
+CLOSE_GRACE = 2.0
+
+REDIS_KEY_PREFIX = "CANDLES"
+REDIS_CHANNEL = "CANDLE_CLOSE"
+
+BAR_DTYPE = np.dtype([
+    ("start", "f8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("oi", "f8"),
+    ("ticks", "u4"),
+])
+
+
+def candle_key(token: str, timeframe: str) -> str:
+    """Redis list holding closed bars for a token / timeframe."""
+    return f"{REDIS_KEY_PREFIX}:{timeframe}:{token}"
+
+
+def bar_to_dict(bar) -> dict:
+    """One BAR_DTYPE record as plain floats (JSON-safe; NaN OI -> None)."""
+    out = {name: bar[name].item() for name in BAR_DTYPE.names}
+    if out["oi"] != out["oi"]:
+        out["oi"] = None
+    return out
+
+
+class _Series:
+    """Closed-bar ring plus the forming bar for one token and timeframe."""
+
+    __slots__ = ("seconds", "ring", "count", "bar", "vol_base", "last_cum_vol")
+
+    def __init__(self, seconds: int, history: int):
+        self.seconds = seconds
+        self.ring = np.zeros(history, dtype=BAR_DTYPE)
+        self.count = 0                          # bars closed so far
+        self.bar = np.zeros(1, dtype=BAR_DTYPE)[0]
+        self.bar["start"] = -1.0                # no bar forming
+        self.vol_base = math.nan                # cumulative volume at bar open
+        self.last_cum_vol = math.nan
+
+    def update(self, ltp: float, cum_vol: float, oi: float, ts: float):
+        """Apply one tick; returns the bar it closed, if any."""
+        start = ts - ts % self.seconds
+        closed = None
+        bar = self.bar
+
+        if bar["start"] >= 0 and start > bar["start"]:
+            closed = self.close()
+        elif 0 <= start < bar["start"]:
+            # Late tick for an already closed bucket: fold into the current bar
+            start = bar["start"]
+
+        # Cumulative volume resets at the start of a session
+        if cum_vol == cum_vol:
+            if self.last_cum_vol != self.last_cum_vol or cum_vol < self.last_cum_vol:
+                self.vol_base = cum_vol
+            self.last_cum_vol = cum_vol
+
+        if bar["start"] < 0:
+            bar["start"] = start
+            bar["open"] = bar["high"] = bar["low"] = ltp
+            bar["volume"] = 0.0
+            bar["oi"] = math.nan
+            bar["ticks"] = 0
+        else:
+            if ltp > bar["high"]:
+                bar["high"] = ltp
+            if ltp < bar["low"]:
+                bar["low"] = ltp
+
+        bar["close"] = ltp
+        bar["ticks"] += 1
+        if self.last_cum_vol == self.last_cum_vol:
+            bar["volume"] = self.last_cum_vol - self.vol_base
+        if oi == oi:
+            bar["oi"] = oi
+        return closed
+
+    def close(self):
+        """Move the forming bar into the ring; returns a copy of it."""
+        self.ring[self.count % len(self.ring)] = self.bar
+        self.count += 1
+        closed = self.bar.copy()
+        self.bar["start"] = -1.0
+        self.vol_base = self.last_cum_vol
+        return closed
+
+    def last(self, n: int) -> np.ndarray:
+        """Last n closed bars, oldest first (copy)."""
+        size = len(self.ring)
+        n = min(n, self.count, size)
+        if n <= 0:
+            return self.ring[:0].copy()
+        idx = (np.arange(self.count - n, self.count) % size)
+        return self.ring[idx]
+
+
+class CandleBuilder:
+    """Rolling candles for every token seen on the tick stream."""
+
+    def __init__(self, timeframes: Iterable[str] = DEFAULT_TIMEFRAMES, history: int = DEFAULT_HISTORY,
+                 on_close: Optional[Callable[[str, str, np.void], None]] = None):
+        """Initialize builder.
+
+        Args:
+            timeframes: Labels from TIMEFRAMES ("1m", "5m", "15m")
+            history: Closed bars kept per token and timeframe
+            on_close: Called as on_close(token, timeframe, bar) for every closed bar
+        """
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unknown timeframe(s): {unknown}; expected {list(TIMEFRAMES)}")
+
+        self.timeframes = tuple(timeframes)
+        self.history = history
+        self.on_close = on_close
+        self._series: Dict[Tuple[str, str], _Series] = {}
+
+    def _series_for(self, token: str, timeframe: str) -> _Series:
+        series = self._series.get((token, timeframe))
+        if series is None:
+            series = self._series[(token, timeframe)] = _Series(TIMEFRAMES[timeframe], self.history)
+        return series
+
+    def _emit(self, token: str, timeframe: str, bar) -> None:
+        if bar is not None and self.on_close is not None:
+            try:
+                self.on_close(token, timeframe, bar)
+            except Exception as e:
+                logger.error(f"[CANDLES] on_close failed for {token} {timeframe}: {e}")
+
+    def on_tick(self, token: str, ltp: float, volume: float, oi: float, ts: float) -> None:
+        """Apply one tick to every timeframe of its token."""
+        if ltp != ltp:
+            return
+        for timeframe in self.timeframes:
+            closed = self._series_for(token, timeframe).update(ltp, volume, oi, ts)
+            self._emit(token, timeframe, closed)
+
+    def append(self, ticks: np.ndarray) -> None:
+        """Apply a TICK_DTYPE batch (oldest first), e.g. from TickRing.read_since()."""
+        if len(ticks) == 0:
+            return
+        tokens = np.char.decode(ticks["token"]).tolist()
+        for token, ltp, oi, volume, ts in zip(tokens, ticks["ltp"].tolist(), ticks["oi"].tolist(),
+                                             ticks["volume"].tolist(), ticks["ts"].tolist()):
+            self.on_tick(token, ltp, volume, oi, ts)
+
+    def close_due(self, now: float, grace: float = CLOSE_GRACE) -> int:
+        """Close bars whose bucket ended more than grace seconds ago.
+
+        Returns:
+            int: Number of bars closed
+        """
+        closed = 0
+        for (token, timeframe), series in self._series.items():
+            start = series.bar["start"]
+            if start >= 0 and now >= start + series.seconds + grace:
+                self._emit(token, timeframe, series.close())
+                closed += 1
+        return closed
+
+    def bars(self, token: str, timeframe: str, n: int = DEFAULT_HISTORY) -> np.ndarray:
+        """Last n closed bars for a token (BAR_DTYPE, oldest first)."""
+        series = self._series.get((token, timeframe))
+        if series is None:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        return series.last(n)
+
+    def current(self, token: str, timeframe: str) -> Optional[np.void]:
+        """The bar still forming for a token, or None."""
+        series = self._series.get((token, timeframe))
+        if series is None or series.bar["start"] < 0:
+            return None
+        return series.bar.copy()
+
+    def tokens(self):
+        """Tokens with at least one bar (closed or forming)."""
+        return sorted({token for token, _ in self._series})
+
+
+class CandlePublisher:
+    """Batches closed bars and writes them to Redis in one pipeline."""
+
+    def __init__(self, redis_client, history: int = DEFAULT_HISTORY):
+        self.redis_client = redis_client
+        self.history = history
+        self._pending = []
+        self.published = 0
+
+    def add(self, token: str, timeframe: str, bar) -> None:
+        """on_close callback for CandleBuilder."""
+        self._pending.append((token, timeframe, bar_to_dict(bar)))
+
+    def flush(self) -> None:
+        """Send every pending bar."""
+        if not self._pending:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        for token, timeframe, bar in self._pending:
+            key = candle_key(token, timeframe)
+            payload = json.dumps(bar)
+            pipe.rpush(key, payload)
+            pipe.ltrim(key, -self.history, -1)
+            pipe.publish(REDIS_CHANNEL, json.dumps({"token": token, "tf": timeframe, **bar}))
+        try:
+            pipe.execute()
+            self.published += len(self._pending)
+        except Exception as e:
+            logger.error(f"[CANDLES] Redis publish failed: {e}")
+        self._pending = []
+
+
+def get_candles(redis_client, token: str, timeframe: str, n: int = DEFAULT_HISTORY) -> np.ndarray:
+    """Last n closed bars published for a token (BAR_DTYPE, oldest first).
+
+    Args:
+        redis_client: Redis client (decode_responses=True)
+        token: Feed token ("Nifty 50", "53001", ...)
+        timeframe: "1m", "5m" or "15m"
+        n: Number of bars
+    """
+    raw = redis_client.lrange(candle_key(token, timeframe), -n, -1) if n > 0 else []
+    bars = np.zeros(len(raw), dtype=BAR_DTYPE)
+    for i, item in enumerate(raw):
+        bar = json.loads(item)
+        if bar.get("oi") is None:
+            bar["oi"] = math.nan
+        bars[i] = tuple(bar[name] for name in BAR_DTYPE.names)
+    return bars
@@ -0,0 +1,123 @@
+"""Conflation stage between the tick feed and Redis.
+
+Keeps only the latest value per key and hands the keys that changed to a
+flush callable in one batch, at most once per rate-cap interval per key.
+Intermediate ticks for a key are conflated, which bounds Redis and UI load
+regardless of tick rate. Values are merged field by field: a partial tick
+(None fields, e.g. an OI-only update) keeps the last known value of the
+fields it does not carry, so conflating it never loses or blanks a field.
+In-process consumers read the unthrottled shared-memory ring instead.
+
+Usage:
+    conflator = Conflator(flush_batch, default_hz=4, rate_caps={"Nifty 50": 10})
+    conflator.start()
+    conflator.offer(tick["tk"], tick)
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Conflator:
+    """Latest-value-per-key buffer with per-key flush rate caps."""
+
+    def __init__(self, flush: Callable[[Dict[str, dict]], None], default_hz: float = 4.0,
+                 rate_caps: Optional[Dict[str, float]] = None):
+        """Initialize conflator.
+
+        Args:
+            flush: Called with {key: latest value} for every due batch
+            default_hz: Max flushes per second per key (0 = flush every offer)
+            rate_caps: Per-key overrides of default_hz
+        """
+        self.flush = flush
+        self.default_hz = default_hz
+        self.rate_caps = dict(rate_caps or {})
+
+        self._pending: Dict[str, dict] = {}
+        self._latest: Dict[str, dict] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.received = 0
+        self.published = 0
+        self.flushes = 0
+
+    def _interval(self, key: str) -> float:
+        hz = self.rate_caps.get(key, self.default_hz)
+        return 1.0 / hz if hz else 0.0
+
+    def offer(self, key: str, value: dict) -> None:
+        """Merge value into the key's latest value (flushed immediately if uncapped)."""
+        with self._lock:
+            self.received += 1
+            merged = dict(self._latest.get(key, ()))
+            merged.update((field, v) for field, v in value.items() if v is not None)
+            self._latest[key] = self._pending[key] = merged
+
+        if not self._interval(key):
+            self.flush_due()
+
+    def flush_due(self) -> int:
+        """Flush every pending key whose rate-cap interval has elapsed.
+
+        Returns:
+            int: Number of keys published
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = {
+                key: value for key, value in self._pending.items()
+                if now - self._last_flush.get(key, 0.0) >= self._interval(key)
+            }
+            for key in due:
+                del self._pending[key]
+                self._last_flush[key] = now
+
+        if not due:
+            return 0
+
+        try:
+            self.flush(due)
+        except Exception as e:
+            logger.error(f"[CONFLATE] Flush of {len(due)} keys failed: {e}")
+            # Put values back unless a newer tick already replaced them
+            with self._lock:
+                for key, value in due.items():
+                    self._pending.setdefault(key, value)
+            return 0
+
+        with self._lock:
+            self.published += len(due)
+            self.flushes += 1
+        return len(due)
+
+    @property
+    def stats(self) -> dict:
+        """Counters: ticks received, values published, ticks conflated away, flushes."""
+        with self._lock:
+            return {
+                "received": self.received,
+                "published": self.published,
+                "conflated": self.received - self.published - len(self._pending),
+                "flushes": self.flushes,
+            }
+
+    def _tick_interval(self) -> float:
+        rates = [hz for hz in [self.default_hz, *self.rate_caps.values()] if hz]
+        return 1.0 / max(rates) if rates else 0.25
+
+    def run_forever(self) -> None:
+        """Flush loop at the fastest configured rate."""
+        while True:
+            self.flush_due()
+            time.sleep(self._tick_interval())
+
+    def start(self) -> threading.Thread:
+        """Run the flush loop in a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, name="conflator", daemon=True)
+        thread.start()
+        return thread
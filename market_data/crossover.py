@@ -0,0 +1,41 @@
+"""The OI crossover rules as array operations over many series at once.
+
+Mirrors nifty_oi_trade_engine.process_pe_ce (dead zone, sign flip,
+hysteresis, minimum dwell) with one element per series: the F&O scanner
+(oi_scanner.py) runs it across underlyings, the shadow evaluator
+(oi_shadow.py) across parameter sets of one index. Thresholds, hysteresis
+and dwell may be scalars or per-element arrays.
+
+Usage:
+    flip, prev_sign, last_flip = scan_step(values, prev_sign, last_flip, thresholds, now)
+"""
+import numpy as np
+
+
+def scan_step(values: np.ndarray, prev_sign: np.ndarray, last_flip: np.ndarray, thresholds,
+              now: float, hysteresis=0.0, min_dwell=0.0):
+    """Apply the crossover rules to one reading per element (NaN = no new reading).
+
+    Args:
+        values: PE-CE per element
+        prev_sign: Last sign outside the dead zone per element (0 = none yet)
+        last_flip: Time of the last crossover per element (NaN = never)
+        thresholds: Dead zone per element
+        now: Time of this reading
+        hysteresis: Extra |PE-CE| beyond the dead zone needed to flip
+        min_dwell: Seconds after a crossover before the next (0 = off)
+
+    Returns:
+        Tuple (flip mask, new prev_sign, new last_flip)
+    """
+    with np.errstate(invalid="ignore"):
+        magnitude = np.abs(values)
+        outside = (magnitude >= thresholds) & (values != 0)
+        sign = np.sign(values)
+        opposite = outside & (prev_sign != 0) & (sign != prev_sign)
+        dwell_ok = np.isnan(last_flip) | (min_dwell <= 0) | (now - last_flip >= min_dwell)
+        flip = opposite & (magnitude >= thresholds + hysteresis) & dwell_ok
+
+    # A held flip keeps the old sign so it still fires once it clears the guards
+    update = outside & ~(opposite & ~flip)
+    return flip, np.where(update, sign, prev_sign), np.where(flip, now, last_flip)
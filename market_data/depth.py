@@ -0,0 +1,84 @@
+"""Top-of-book (5 levels) from Neo depth messages, with pricing metrics.
+
+Depth rows (isDepth=True subscriptions, name "dp") carry best-first levels:
+
+    bp, bp1..bp4    bid prices        bq, bq1..bq4    bid quantities
+    sp, sp1..sp4    ask prices        bs, bs1..bs4    ask quantities
+
+Like every Neo message they are partial: only fields that changed are sent,
+so a DepthBook is updated in place and keeps the rest.
+"""
+import time
+from typing import Optional
+
+import numpy as np
+
+LEVELS = 5
+
+# Field name for level i (0 = best) of each array
+_SUFFIXES = [""] + [str(i) for i in range(1, LEVELS)]
+BID_PRICE_FIELDS = [f"bp{s}" for s in _SUFFIXES]
+ASK_PRICE_FIELDS = [f"sp{s}" for s in _SUFFIXES]
+BID_QTY_FIELDS = [f"bq{s}" for s in _SUFFIXES]
+ASK_QTY_FIELDS = [f"bs{s}" for s in _SUFFIXES]
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class DepthBook:
+    """Five-level bid/ask book for one token."""
+
+    __slots__ = ("bid_px", "bid_qty", "ask_px", "ask_qty", "ts")
+
+    def __init__(self):
+        self.bid_px = np.zeros(LEVELS)
+        self.bid_qty = np.zeros(LEVELS)
+        self.ask_px = np.zeros(LEVELS)
+        self.ask_qty = np.zeros(LEVELS)
+        self.ts = 0.0
+
+    def update(self, row: dict, ts: Optional[float] = None) -> bool:
+        """Apply a (partial) depth row; returns True if any level field was present."""
+        changed = False
+        for array, fields in ((self.bid_px, BID_PRICE_FIELDS), (self.ask_px, ASK_PRICE_FIELDS),
+                              (self.bid_qty, BID_QTY_FIELDS), (self.ask_qty, ASK_QTY_FIELDS)):
+            for i, field in enumerate(fields):
+                value = _to_float(row.get(field))
+                if value is not None:
+                    array[i] = value
+                    changed = True
+        if changed:
+            self.ts = ts if ts is not None else time.time()
+        return changed
+
+    def metrics(self) -> Optional[dict]:
+        """Spread, microprice and visible size, or None without a two-sided book.
+
+        microprice = (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty),
+        the top-of-book price weighted towards the side that is about to move.
+        """
+        bid, ask = float(self.bid_px[0]), float(self.ask_px[0])
+        if bid <= 0 or ask <= 0:
+            return None
+
+        bid_qty, ask_qty = float(self.bid_qty[0]), float(self.ask_qty[0])
+        top_qty = bid_qty + ask_qty
+        microprice = (bid * ask_qty + ask * bid_qty) / top_qty if top_qty > 0 else (bid + ask) / 2
+
+        return {
+            "bid": bid,
+            "ask": ask,
+            "bid_qty": bid_qty,
+            "ask_qty": ask_qty,
+            "spread": round(ask - bid, 4),
+            "mid": (bid + ask) / 2,
+            "microprice": round(microprice, 4),
+            "bid_size": float(self.bid_qty[self.bid_px > 0].sum()),
+            "ask_size": float(self.ask_qty[self.ask_px > 0].sum()),
+            "ts": self.ts,
+        }
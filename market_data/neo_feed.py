@@ -0,0 +1,252 @@
+"""Kotak Neo websocket feed with automatic reconnect.
+
+Wraps client.subscribe(...) and the on_message/on_error/on_close callbacks,
+normalizes messages with market_data.ticks and hands each tick to a
+callback. Subscriptions are remembered so they can be replayed after a
+reconnect.
+
+connect() takes over the client's websocket callbacks, so one client can
+only carry one feed. Services sharing a client (the agent's position LTPs
+and depth books) use shared_feed() and listen() for their tokens; the feed
+subscribes a token while anyone listens to it and routes its ticks to
+those listeners only.
+
+Usage:
+    feed = NeoFeed(lambda: auth.client, on_tick)
+    feed.subscribe([{"instrument_token": "Nifty 50", "exchange_segment": "nse_cm"}], is_index=True)
+    feed.run_forever()
+
+    feed = shared_feed(auth, lambda: auth.client)
+    feed.listen([{"instrument_token": "12345", "exchange_segment": "nse_fo"}], on_tick)
+"""
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from market_data.ticks import parse_ticks
+
+logger = logging.getLogger(__name__)
+
+
+class NeoFeed:
+    """Websocket market data feed that reconnects on close, error or silence."""
+
+    def __init__(self, client_factory: Callable, on_tick: Optional[Callable[[dict], None]] = None,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0,
+                 stale_after: float = 30.0, record_path: Optional[str] = None):
+        """Initialize feed.
+
+        Args:
+            client_factory: Returns an authenticated NeoAPI client (or None)
+            on_tick: Called with every normalized tick (optional with listen())
+            reconnect_delay: Initial backoff between reconnect attempts (seconds)
+            max_reconnect_delay: Backoff ceiling (seconds)
+            stale_after: Reconnect if no message arrives for this long (seconds)
+            record_path: Optional JSONL file to append raw messages to (for replay)
+        """
+        self.client_factory = client_factory
+        self.on_tick = on_tick
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.stale_after = stale_after
+        self.record_path = record_path
+
+        self.client = None
+        self.connected = False
+        self.reconnects = 0
+        self.last_message_ts = 0.0
+        self._subscriptions: List[tuple] = []
+        self._record_file = open(record_path, "a") if record_path else None
+        self._thread: Optional[threading.Thread] = None
+
+        # (segment, token, is_index, is_depth) -> listeners; token -> listeners (copy-on-write)
+        self._listeners: Dict[tuple, list] = {}
+        self._routes: Dict[str, tuple] = {}
+        self._listen_lock = threading.Lock()
+
+    def subscribe(self, instrument_tokens: List[dict], is_index: bool = False, is_depth: bool = False) -> None:
+        """Register (and, if connected, send) a subscription."""
+        self._subscriptions.append((instrument_tokens, is_index, is_depth))
+        if self.client is not None:
+            self._send_subscription(instrument_tokens, is_index, is_depth)
+
+    def unsubscribe(self, instrument_tokens: List[dict], is_index: bool = False, is_depth: bool = False) -> None:
+        """Drop tokens from the remembered subscriptions and the live socket."""
+        drop = {(t["exchange_segment"], t["instrument_token"]) for t in instrument_tokens}
+        remaining = []
+        for tokens, idx, depth in self._subscriptions:
+            if (idx, depth) == (is_index, is_depth):
+                tokens = [t for t in tokens if (t["exchange_segment"], t["instrument_token"]) not in drop]
+            if tokens:
+                remaining.append((tokens, idx, depth))
+        self._subscriptions = remaining
+
+        if self.client is not None and instrument_tokens:
+            self.client.un_subscribe(instrument_tokens=instrument_tokens, isIndex=is_index, isDepth=is_depth)
+            logger.info(f"[FEED] Unsubscribed {len(instrument_tokens)} tokens")
+
+    def listen(self, instrument_tokens: List[dict], callback: Callable[[dict], None],
+               is_index: bool = False, is_depth: bool = False) -> None:
+        """Route these tokens' ticks to callback, subscribing the ones nobody listened to yet."""
+        new = []
+        with self._listen_lock:
+            for t in instrument_tokens:
+                key = (t["exchange_segment"], str(t["instrument_token"]), is_index, is_depth)
+                callbacks = self._listeners.setdefault(key, [])
+                if not callbacks:
+                    new.append(t)
+                if callback not in callbacks:
+                    callbacks.append(callback)
+            self._rebuild_routes()
+        if new:
+            self.subscribe(new, is_index, is_depth)
+        self.start()
+
+    def unlisten(self, instrument_tokens: List[dict], callback: Callable[[dict], None],
+                 is_index: bool = False, is_depth: bool = False) -> None:
+        """Stop routing these tokens to callback; unsubscribe the ones nobody listens to any more."""
+        gone = []
+        with self._listen_lock:
+            for t in instrument_tokens:
+                key = (t["exchange_segment"], str(t["instrument_token"]), is_index, is_depth)
+                callbacks = self._listeners.get(key)
+                if not callbacks or callback not in callbacks:
+                    continue
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._listeners[key]
+                    gone.append(t)
+            self._rebuild_routes()
+        if gone:
+            self.unsubscribe(gone, is_index, is_depth)
+
+    def _rebuild_routes(self):
+        routes: Dict[str, list] = {}
+        for (_, token, _, _), callbacks in self._listeners.items():
+            bucket = routes.setdefault(token, [])
+            bucket.extend(cb for cb in callbacks if cb not in bucket)
+        self._routes = {token: tuple(callbacks) for token, callbacks in routes.items()}
+
+    def _send_subscription(self, instrument_tokens, is_index, is_depth):
+        self.client.subscribe(instrument_tokens=instrument_tokens, isIndex=is_index, isDepth=is_depth)
+        logger.info(f"[FEED] Subscribed {len(instrument_tokens)} tokens (index={is_index}, depth={is_depth})")
+
+    # ------------------------------------------------------------------
+    # Websocket callbacks
+    # ------------------------------------------------------------------
+    def _on_message(self, message):
+        recv_ts = time.time()
+        self.last_message_ts = recv_ts
+        self.connected = True
+
+        if isinstance(message, (str, bytes, bytearray)):
+            try:
+                message = json.loads(message)
+            except ValueError:
+                return
+
+        if self._record_file is not None:
+            self._record_file.write(json.dumps({"recv_ts": recv_ts, "message": message}) + "\n")
+
+        routes = self._routes
+        for tick in parse_ticks(message, recv_ts):
+            callbacks = routes.get(tick["tk"], ())
+            if self.on_tick is not None:
+                callbacks = (self.on_tick,) + callbacks
+            for callback in callbacks:
+                try:
+                    callback(tick)
+                except Exception as e:
+                    logger.error(f"[FEED] on_tick failed for {tick.get('tk')}: {e}", exc_info=True)
+
+    def _on_open(self, message):
+        logger.info(f"[FEED] Websocket open: {message}")
+        self.connected = True
+        self.last_message_ts = time.time()
+
+    def _on_close(self, message):
+        logger.warning(f"[FEED] Websocket closed: {message}")
+        self.connected = False
+
+    def _on_error(self, message):
+        logger.error(f"[FEED] Websocket error: {message}")
+        self.connected = False
+
+    # ------------------------------------------------------------------
+    # Connection management
+    # ------------------------------------------------------------------
+    def connect(self) -> bool:
+        """(Re)attach callbacks and replay every subscription."""
+        client = self.client_factory()
+        if client is None:
+            logger.warning("[FEED] No authenticated client available")
+            return False
+
+        client.on_message = self._on_message
+        client.on_open = self._on_open
+        client.on_close = self._on_close
+        client.on_error = self._on_error
+        self.client = client
+
+        for instrument_tokens, is_index, is_depth in self._subscriptions:
+            self._send_subscription(instrument_tokens, is_index, is_depth)
+
+        self.connected = True
+        self.last_message_ts = time.time()
+        return True
+
+    def _is_stale(self) -> bool:
+        # Nothing subscribed means nothing to wait for
+        return bool(self._subscriptions) and time.time() - self.last_message_ts > self.stale_after
+
+    def start(self) -> threading.Thread:
+        """Run the reconnect loop in a daemon thread (for use inside the agent); idempotent."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run_forever, name="neo-feed", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def run_forever(self, poll_interval: float = 1.0) -> None:
+        """Keep the feed connected; reconnect with exponential backoff."""
+        delay = self.reconnect_delay
+        while True:
+            if not self.connected or self._is_stale():
+                if self.client is not None:
+                    self.reconnects += 1
+                    logger.warning(f"[FEED] Reconnecting (attempt {self.reconnects}, stale={self._is_stale()})")
+                try:
+                    ok = self.connect()
+                except Exception as e:
+                    logger.error(f"[FEED] Connect failed: {e}")
+                    ok = False
+
+                if not ok:
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                delay = self.reconnect_delay
+
+            if self._record_file is not None:
+                self._record_file.flush()
+            time.sleep(poll_interval)
+
+
+# One feed per client owner (e.g. an auth service), shared by every service on that client
+_shared_feeds: Dict[int, NeoFeed] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_feed(owner, client_factory: Callable) -> NeoFeed:
+    """The NeoFeed of `owner`'s client, created on first use.
+
+    Args:
+        owner: Object owning the client (the same owner always gets the same feed)
+        client_factory: Returns the owner's authenticated client (or None)
+    """
+    with _shared_lock:
+        feed = _shared_feeds.get(id(owner))
+        if feed is None:
+            feed = _shared_feeds[id(owner)] = NeoFeed(client_factory)
+        return feed
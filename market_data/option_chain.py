@@ -0,0 +1,292 @@
+"""Columnar option-chain table in shared memory, plus its Redis snapshot blob.
+
+One segment per underlying ("kotak_chain_nifty", "kotak_chain_banknifty")
+holds the current and next expiry side by side:
+
+    header   int64[8]                          seq, max_strikes, n_expiries,
+                                               n_strikes[0..1], expiry[0..1] (YYYYMMDD)
+    strikes  float64[EXPIRIES, max_strikes]
+    values   float64[EXPIRIES, 2, FIELDS, max_strikes]   side 0 = CE, 1 = PE
+
+Ticks update single cells in place. The whole table shares one seqlock
+counter (odd while the writer is inside an update), so a reader's copy is
+always a consistent chain-wide snapshot: a vectorized pass over strikes
+never mixes two layouts or half an update.
+
+Usage:
+    # feeder (writer)
+    store = ChainStore.create("NIFTY")
+    store.set_layout(0, "2026-10-20", strikes)
+    store.update(0, CE, k, ltp=112.5, oi=1.2e6, volume=None, bid=112.4, ask=112.6, ts=now)
+
+    # any local process
+    view = ChainView.attach("NIFTY")
+    chain = view.snapshot()
+    chain["2026-10-20"]["PE"]["oi"] - chain["2026-10-20"]["CE"]["oi"]
+
+    # other hosts / UI
+    chain = get_chain(redis_client, "NIFTY")
+"""
+import json
+import logging
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+from market_data.shm_ring import segment_inode
+
+logger = logging.getLogger(__name__)
+
+EXPIRIES = 2                       # current and next
+SIDES = ("CE", "PE")
+CE, PE = 0, 1
+FIELDS = ("ltp", "oi", "volume", "bid", "ask", "ts")
+F_LTP, F_OI, F_VOLUME, F_BID, F_ASK, F_TS = range(len(FIELDS))
+
+DEFAULT_MAX_STRIKES = 128
+
+# Header field positions
+H_SEQ, H_MAX_STRIKES, H_N_EXPIRIES, H_N_STRIKES, H_EXPIRY = 0, 1, 2, 3, 5
+HEADER_WORDS = 8
+HEADER_BYTES = HEADER_WORDS * 8
+
+# Redis key holding the JSON snapshot per underlying
+REDIS_KEY_PREFIX = "OPTION_CHAIN"
+
+
+def segment_name(index: str) -> str:
+    return f"kotak_chain_{index.lower()}"
+
+
+def chain_key(index: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:{index}"
+
+
+def _segment_size(max_strikes: int) -> int:
+    return HEADER_BYTES + 8 * EXPIRIES * max_strikes * (1 + len(SIDES) * len(FIELDS))
+
+
+def _expiry_to_int(expiry: Optional[str]) -> int:
+    return int(expiry.replace("-", "")) if expiry else 0
+
+
+def _int_to_expiry(value: int) -> Optional[str]:
+    if not value:
+        return None
+    text = str(value)
+    return f"{text[:4]}-{text[4:6]}-{text[6:]}"
+
+
+class _ChainTable:
+    """Header / strikes / values views over one buffer (shared or private)."""
+
+    def __init__(self, buf, shm: Optional[shared_memory.SharedMemory] = None, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self._inode = segment_inode(shm.name) if shm is not None else None
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=buf, offset=0)
+        self.max_strikes = int(self.header[H_MAX_STRIKES])
+
+        offset = HEADER_BYTES
+        self.strikes = np.ndarray((EXPIRIES, self.max_strikes), dtype=np.float64, buffer=buf, offset=offset)
+        offset += self.strikes.nbytes
+        self.values = np.ndarray((EXPIRIES, len(SIDES), len(FIELDS), self.max_strikes),
+                                 dtype=np.float64, buffer=buf, offset=offset)
+
+    def _copy(self):
+        header = self.header.copy()
+        return header, self.strikes.copy(), self.values.copy()
+
+    def snapshot(self, retries: int = 1000) -> Optional[dict]:
+        """Consistent copy of the chain keyed by expiry.
+
+        Returns:
+            dict or None: {expiry: {"strikes": arr, "CE": {field: arr}, "PE": {...}}},
+            or None if the writer kept the table busy for every retry
+        """
+        for _ in range(retries):
+            before = int(self.header[H_SEQ])
+            if before & 1:
+                continue
+            header, strikes, values = self._copy()
+            if int(self.header[H_SEQ]) == before:
+                return _to_chain(header, strikes, values)
+        return None
+
+    def newest_ts(self) -> Optional[float]:
+        """Timestamp of the most recent tick in either expiry (None before the first)."""
+        ts = self.values[:, :, F_TS, :]
+        return None if np.isnan(ts).all() else float(np.nanmax(ts))
+
+    def is_current(self) -> bool:
+        """False once the mapped segment was unlinked or recreated (feeder restart)."""
+        return self._inode is None or segment_inode(self.shm.name) == self._inode
+
+    def close(self) -> None:
+        """Detach; the owner also unlinks the segment."""
+        self.header = self.strikes = self.values = None
+        if self.shm is None:
+            return
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _to_chain(header, strikes, values) -> dict:
+    chain = {}
+    for e in range(int(header[H_N_EXPIRIES])):
+        expiry = _int_to_expiry(int(header[H_EXPIRY + e]))
+        n = int(header[H_N_STRIKES + e])
+        if expiry is None:
+            continue
+        chain[expiry] = {"strikes": strikes[e, :n]}
+        for s, side in enumerate(SIDES):
+            chain[expiry][side] = {field: values[e, s, f, :n] for f, field in enumerate(FIELDS)}
+    return chain
+
+
+class ChainStore(_ChainTable):
+    """Writer side: owns the table and updates it in place."""
+
+    @classmethod
+    def create(cls, index: str, max_strikes: int = DEFAULT_MAX_STRIKES, shared: bool = True) -> "ChainStore":
+        """Create the table (shared-memory segment unless shared=False)."""
+        size = _segment_size(max_strikes)
+        shm = None
+        if shared:
+            name = segment_name(index)
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            buf = shm.buf
+        else:
+            buf = bytearray(size)
+
+        header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=buf, offset=0)
+        header[:] = 0
+        header[H_MAX_STRIKES] = max_strikes
+        header[H_N_EXPIRIES] = EXPIRIES
+        del header
+
+        store = cls(buf, shm, owner=shared)
+        store.strikes[:] = np.nan
+        store.values[:] = np.nan
+        logger.info(f"[CHAIN] Created {index} table: {EXPIRIES} expiries x {max_strikes} strikes")
+        return store
+
+    def _begin(self):
+        self.header[H_SEQ] += 1          # odd: write in progress
+
+    def _end(self):
+        self.header[H_SEQ] += 1          # even: consistent
+
+    def set_layout(self, slot: int, expiry: Optional[str], strikes: List[float]) -> None:
+        """Point an expiry slot at a new strike list, keeping values of strikes still present."""
+        strikes = np.asarray(strikes, dtype=np.float64)[:self.max_strikes]
+        n_old = int(self.header[H_N_STRIKES + slot])
+        same_expiry = _expiry_to_int(expiry) == int(self.header[H_EXPIRY + slot])
+
+        new_values = np.full(self.values.shape[1:], np.nan)
+        if same_expiry and n_old:
+            old_strikes = self.strikes[slot, :n_old]
+            pos = np.searchsorted(old_strikes, strikes)
+            pos = np.clip(pos, 0, n_old - 1)
+            keep = old_strikes[pos] == strikes
+            new_values[:, :, :len(strikes)][:, :, keep] = self.values[slot][:, :, pos[keep]]
+
+        self._begin()
+        try:
+            self.strikes[slot, :] = np.nan
+            self.strikes[slot, :len(strikes)] = strikes
+            self.values[slot] = new_values
+            self.header[H_N_STRIKES + slot] = len(strikes)
+            self.header[H_EXPIRY + slot] = _expiry_to_int(expiry)
+        finally:
+            self._end()
+
+    def update(self, slot: int, side: int, k: int, ltp=None, oi=None, volume=None,
+               bid=None, ask=None, ts: Optional[float] = None) -> None:
+        """Write one contract's fields; None keeps the previous value."""
+        cell = self.values[slot, side]
+        self._begin()
+        try:
+            if ltp is not None:
+                cell[F_LTP, k] = ltp
+            if oi is not None:
+                cell[F_OI, k] = oi
+            if volume is not None:
+                cell[F_VOLUME, k] = volume
+            if bid is not None:
+                cell[F_BID, k] = bid
+            if ask is not None:
+                cell[F_ASK, k] = ask
+            cell[F_TS, k] = ts if ts is not None else time.time()
+        finally:
+            self._end()
+
+
+class ChainView(_ChainTable):
+    """Reader side: attaches to the feeder's segment."""
+
+    @classmethod
+    def attach(cls, index: str) -> Optional["ChainView"]:
+        """Attach to an underlying's chain; None if the feeder is not running."""
+        try:
+            shm = shared_memory.SharedMemory(name=segment_name(index))
+        except FileNotFoundError:
+            return None
+        # Readers must not unlink the feeder's segment when they exit
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm.buf, shm)
+
+
+# ----------------------------------------------------------------------
+# Redis snapshot blob
+# ----------------------------------------------------------------------
+def _nan_to_none(values: np.ndarray) -> list:
+    return [None if v != v else v for v in values.tolist()]
+
+
+def chain_to_blob(index: str, chain: dict, spot: Optional[float] = None) -> str:
+    """Serialize a snapshot for the OPTION_CHAIN:{index} key."""
+    payload = {"index": index, "spot": spot, "ts": time.time(), "expiries": {}}
+    for expiry, table in chain.items():
+        payload["expiries"][expiry] = {
+            "strikes": table["strikes"].tolist(),
+            **{side: {field: _nan_to_none(arr) for field, arr in table[side].items()} for side in SIDES},
+        }
+    return json.dumps(payload)
+
+
+def get_chain(redis_client, index: str) -> Optional[dict]:
+    """Latest published chain for an underlying, as NumPy arrays.
+
+    Returns:
+        dict or None: {"spot", "ts", "chain": {expiry: {"strikes", "CE", "PE"}}}
+    """
+    raw = redis_client.get(chain_key(index))
+    if not raw:
+        return None
+    payload = json.loads(raw)
+    chain = {}
+    for expiry, table in payload.get("expiries", {}).items():
+        chain[expiry] = {"strikes": np.asarray(table["strikes"], dtype=np.float64)}
+        for side in SIDES:
+            chain[expiry][side] = {
+                field: np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                for field, values in table[side].items()
+            }
+    return {"spot": payload.get("spot"), "ts": payload.get("ts"), "chain": chain}
+
@@ -0,0 +1,129 @@
+"""PE-CE from option-chain OI: put minus call OI over strike bands around ATM.
+
+Each band is a (width, weighting) pair: `width` strikes each side of ATM,
+weighted per strike offset by one of WEIGHTINGS. All bands of a calculator
+are stacked into one weight matrix, so every update is a single NumPy
+reduction over the chain, however many bands are tracked:
+
+    pe_ce[b] = sum_k W[b, k] * (PE_oi[k] - CE_oi[k])
+
+Usage:
+    calc = PeCeCalculator.from_spec("5:flat,10:linear,15:gaussian")
+    view = ChainView.attach("NIFTY")
+    values = calc.compute(view.snapshot()[expiry], spot)     # {"5:flat": ..., ...}
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Band weight by strike offset from ATM (|k| <= width)
+WEIGHTINGS = {
+    # every strike in the band counts fully
+    "flat": lambda k, width: np.ones_like(k, dtype=np.float64),
+    # ATM counts 1, falling linearly to 1 / (width + 1) at the band edge
+    "linear": lambda k, width: 1.0 - np.abs(k) / (width + 1.0),
+    # Gaussian with sigma = width / 2
+    "gaussian": lambda k, width: np.exp(-0.5 * (k / max(width / 2.0, 0.5)) ** 2),
+}
+
+DEFAULT_BANDS = "10:flat"
+
+Band = Tuple[int, str]
+
+
+def band_name(width: int, weighting: str) -> str:
+    return f"{width}:{weighting}"
+
+
+def parse_bands(spec: str) -> List[Band]:
+    """Parse "WIDTH:WEIGHTING,..." (weighting defaults to flat)."""
+    bands = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        width, _, weighting = item.partition(":")
+        weighting = weighting.strip().lower() or "flat"
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Unknown weighting {weighting!r}; expected one of {list(WEIGHTINGS)}")
+        bands.append((int(width), weighting))
+    if not bands:
+        raise ValueError("No PE-CE bands given")
+    return bands
+
+
+def atm_position(strikes: np.ndarray, spot: Optional[float] = None,
+                 ce_ltp: Optional[np.ndarray] = None, pe_ltp: Optional[np.ndarray] = None) -> Optional[int]:
+    """Index of the ATM strike.
+
+    Nearest strike to spot; without a spot, the strike where CE and PE
+    premiums are closest (put-call parity). None if neither is available.
+    """
+    if len(strikes) == 0:
+        return None
+    if spot is not None and spot == spot:
+        return int(np.nanargmin(np.abs(strikes - spot)))
+    if ce_ltp is None or pe_ltp is None:
+        return None
+    gap = np.abs(ce_ltp - pe_ltp)
+    if np.isnan(gap).all():
+        return None
+    return int(np.nanargmin(gap))
+
+
+class PeCeCalculator:
+    """PE-CE over several strike bands at once."""
+
+    def __init__(self, bands: Sequence[Band]):
+        """Initialize calculator.
+
+        Args:
+            bands: (width, weighting) pairs; the first one is the primary band
+        """
+        self.bands = [(int(w), wt) for w, wt in bands]
+        self.names = [band_name(w, wt) for w, wt in self.bands]
+        self.max_width = max(w for w, _ in self.bands)
+
+        # weights[b, max_width + k] for offsets k in [-max_width, max_width]
+        offsets = np.arange(-self.max_width, self.max_width + 1, dtype=np.float64)
+        self.weights = np.zeros((len(self.bands), len(offsets)))
+        for b, (width, weighting) in enumerate(self.bands):
+            inside = np.abs(offsets) <= width
+            self.weights[b, inside] = WEIGHTINGS[weighting](offsets[inside], width)
+
+    @classmethod
+    def from_spec(cls, spec: str = DEFAULT_BANDS) -> "PeCeCalculator":
+        return cls(parse_bands(spec))
+
+    @property
+    def primary(self) -> str:
+        return self.names[0]
+
+    def compute_array(self, strikes: np.ndarray, ce_oi: np.ndarray, pe_oi: np.ndarray,
+                      atm: int) -> np.ndarray:
+        """PE-CE per band (float64[n_bands]) around strike position `atm`.
+
+        Missing OI (NaN) counts as zero; offsets beyond the listed strikes
+        drop out of the band.
+        """
+        # Per side: a strike with only one side's OI still counts that side
+        diff = np.nan_to_num(pe_oi) - np.nan_to_num(ce_oi)
+        n = len(strikes)
+        lo = max(atm - self.max_width, 0)
+        hi = min(atm + self.max_width + 1, n)
+        w_lo = lo - (atm - self.max_width)
+        return self.weights[:, w_lo:w_lo + (hi - lo)] @ diff[lo:hi]
+
+    def compute(self, table: dict, spot: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """PE-CE per band name for one expiry of a chain snapshot, or None.
+
+        Args:
+            table: {"strikes", "CE": {field: arr}, "PE": {...}} (ChainView.snapshot()[expiry])
+            spot: Underlying price used to find ATM (None: put-call parity)
+        """
+        strikes = table["strikes"]
+        atm = atm_position(strikes, spot, table["CE"]["ltp"], table["PE"]["ltp"])
+        if atm is None:
+            return None
+        values = self.compute_array(strikes, table["CE"]["oi"], table["PE"]["oi"], atm)
+        return dict(zip(self.names, values.tolist()))
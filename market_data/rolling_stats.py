@@ -0,0 +1,105 @@
+"""Rolling statistics over a fixed-size NumPy ring buffer, O(1) per update.
+
+Keeps the last `window` (ts, value) observations in preallocated arrays and
+running sums of x, x^2, t, t^2 and t*x, so mean, standard deviation,
+z-score and least-squares slope are updated in constant time as the oldest
+observation drops out. The sums are rebuilt from the buffer once per
+`window` updates (also rebasing t near zero) so float error cannot build up.
+An EWMA is tracked alongside.
+
+Usage:
+    stats = RollingStats(window=120, span=20)
+    m = stats.update(ts, pe_ce)
+    m["ewma"], m["zscore"], m["slope"]      # slope in value units per minute
+"""
+import math
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_WINDOW = 120
+DEFAULT_SPAN = 20
+
+
+class RollingStats:
+    """Rolling mean / std / z-score / slope plus an EWMA for one series."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, span: int = DEFAULT_SPAN):
+        """Initialize ring buffer.
+
+        Args:
+            window: Observations kept for mean / std / z-score / slope
+            span: EWMA span in observations (alpha = 2 / (span + 1))
+        """
+        self.window = max(int(window), 2)
+        self.alpha = 2.0 / (max(int(span), 1) + 1.0)
+        self.ts = np.zeros(self.window)
+        self.values = np.zeros(self.window)
+        self.head = 0           # next slot to write
+        self.n = 0              # observations in the window
+        self.ewma: Optional[float] = None
+        self.last: dict = {}
+        self._t0 = None         # time origin of the running t sums
+        self._since_rebuild = 0
+        self._sx = self._sxx = self._st = self._stt = self._stx = 0.0
+
+    def _add(self, t: float, x: float, sign: float) -> None:
+        self._sx += sign * x
+        self._sxx += sign * x * x
+        self._st += sign * t
+        self._stt += sign * t * t
+        self._stx += sign * t * x
+
+    def _rebuild(self) -> None:
+        """Recompute the running sums from the buffer, rebasing t on the oldest observation."""
+        if self.n < self.window:
+            ts, xs = self.ts[:self.n], self.values[:self.n]
+        else:
+            ts, xs = self.ts, self.values
+        self._t0 = float(ts.min())
+        t = ts - self._t0
+        self._sx, self._sxx = float(xs.sum()), float((xs * xs).sum())
+        self._st, self._stt, self._stx = float(t.sum()), float((t * t).sum()), float((t * xs).sum())
+        self._since_rebuild = 0
+
+    def update(self, ts: float, value: float) -> dict:
+        """Add one observation and return the current metrics."""
+        value = float(value)
+        if self._t0 is None:
+            self._t0 = float(ts)
+
+        if self.n == self.window:
+            self._add(self.ts[self.head] - self._t0, self.values[self.head], -1.0)
+        else:
+            self.n += 1
+        self.ts[self.head] = ts
+        self.values[self.head] = value
+        self._add(ts - self._t0, value, 1.0)
+        self.head = (self.head + 1) % self.window
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+        self.ewma = value if self.ewma is None else self.alpha * value + (1.0 - self.alpha) * self.ewma
+        self.last = self.metrics(value)
+        return self.last
+
+    def metrics(self, value: Optional[float] = None) -> dict:
+        """ewma, mean, std, zscore (of `value`), slope (per minute) and n."""
+        n = self.n
+        if n == 0:
+            return {}
+        mean = self._sx / n
+        std = math.sqrt(max(self._sxx / n - mean * mean, 0.0))
+        denom = n * self._stt - self._st * self._st
+        slope = (n * self._stx - self._st * self._sx) / denom * 60.0 if denom > 1e-9 else 0.0
+        zscore = (value - mean) / std if value is not None and std > 0 else 0.0
+        return {
+            "ewma": round(self.ewma, 2),
+            "mean": round(mean, 2),
+            "std": round(std, 2),
+            "zscore": round(zscore, 3),
+            "slope": round(slope, 2),
+            "n": n,
+        }
@@ -0,0 +1,269 @@
+"""Shared-memory tick ring buffer for same-host consumers.
+
+The feeder owns one multiprocessing.shared_memory segment laid out as:
+
+    header   int64[4]          write_seq, capacity, max_tokens, n_tokens
+    slots    SLOT_DTYPE[max]   latest value per token (seqlock protected)
+    ring     TICK_DTYPE[cap]   every tick, overwritten oldest-first
+
+Readers attach to the segment by name and map both tables as NumPy arrays
+directly over the shared buffer, so a latest-price read is a dict lookup
+plus an array index: no copy, no socket, no syscall. Redis keeps carrying
+the same data for other hosts and the UI.
+
+Slot consistency uses a per-slot sequence counter (seqlock): the writer
+makes it odd before updating a slot and even afterwards; readers retry
+while it is odd or changed during the read. There is a single writer (the
+feeder), so no cross-process lock is needed.
+
+Usage:
+    # feeder
+    ring = TickRing.create()
+    ring.write("Nifty 50", 24510.35, 0, 0, time.time())
+
+    # any local process
+    ring = TickRing.attach()
+    ltp, oi, volume, ts = ring.latest("Nifty 50")
+"""
+import logging
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = "kotak_ticks"
+DEFAULT_CAPACITY = 1 << 16      # ring entries
+DEFAULT_MAX_TOKENS = 4096       # latest-value slots
+
+TOKEN_BYTES = 24
+
+# POSIX shared memory segments are files here on Linux
+SHM_DIR = "/dev/shm"
+
+TICK_DTYPE = np.dtype([
+    ("token", f"S{TOKEN_BYTES}"),
+    ("ltp", "f8"),
+    ("oi", "f8"),
+    ("volume", "f8"),
+    ("ts", "f8"),
+])
+
+SLOT_DTYPE = np.dtype([
+    ("seq", "u8"),
+    ("token", f"S{TOKEN_BYTES}"),
+    ("ltp", "f8"),
+    ("oi", "f8"),
+    ("volume", "f8"),
+    ("ts", "f8"),
+])
+
+# Header field positions
+H_WRITE_SEQ, H_CAPACITY, H_MAX_TOKENS, H_N_TOKENS = range(4)
+HEADER_BYTES = 4 * 8
+
+
+def _segment_size(capacity: int, max_tokens: int) -> int:
+    return HEADER_BYTES + SLOT_DTYPE.itemsize * max_tokens + TICK_DTYPE.itemsize * capacity
+
+
+def segment_inode(name: str) -> Optional[int]:
+    """Inode of a segment's /dev/shm file (None where that is not available)."""
+    try:
+        return os.stat(os.path.join(SHM_DIR, name.lstrip("/"))).st_ino
+    except OSError:
+        return None
+
+
+class TickRing:
+    """Single-writer / many-reader tick store in shared memory."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        """Map header, slot table and ring over an open segment.
+
+        Use TickRing.create() in the feeder and TickRing.attach() elsewhere.
+        """
+        self.shm = shm
+        self.owner = owner
+        self._inode = segment_inode(shm.name)
+
+        self.header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.capacity = int(self.header[H_CAPACITY])
+        self.max_tokens = int(self.header[H_MAX_TOKENS])
+
+        offset = HEADER_BYTES
+        self.slots = np.ndarray((self.max_tokens,), dtype=SLOT_DTYPE, buffer=shm.buf, offset=offset)
+        offset += SLOT_DTYPE.itemsize * self.max_tokens
+        self.ring = np.ndarray((self.capacity,), dtype=TICK_DTYPE, buffer=shm.buf, offset=offset)
+
+        # Local token -> slot map; readers extend it lazily from the slot table
+        self._slot_of: Dict[bytes, int] = {}
+        self._known_tokens = 0
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_NAME, capacity: int = DEFAULT_CAPACITY,
+               max_tokens: int = DEFAULT_MAX_TOKENS) -> "TickRing":
+        """Create (or recreate) the segment. Called once by the feeder."""
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            logger.info(f"[SHM] Removed stale segment {name}")
+        except FileNotFoundError:
+            pass
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity, max_tokens))
+        header = np.ndarray((4,), dtype=np.int64, buffer=shm.buf, offset=0)
+        header[:] = (0, capacity, max_tokens, 0)
+        del header
+
+        ring = cls(shm, owner=True)
+        ring.slots[:] = np.zeros(1, dtype=SLOT_DTYPE)
+        # NaN until a tick carries the field, so a partial first tick never reads as 0.0
+        for field in ("ltp", "oi", "volume"):
+            ring.slots[field] = np.nan
+        logger.info(f"[SHM] Created {name}: {capacity} ticks, {max_tokens} slots ({shm.size} bytes)")
+        return ring
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME) -> Optional["TickRing"]:
+        """Attach to an existing segment; None if the feeder is not running."""
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        # Readers must not unlink the feeder's segment when they exit
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm)
+
+    # ------------------------------------------------------------------
+    # Writer (feeder only)
+    # ------------------------------------------------------------------
+    def _slot_for_write(self, key: bytes) -> Optional[int]:
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            return slot
+
+        slot = int(self.header[H_N_TOKENS])
+        if slot >= self.max_tokens:
+            logger.warning(f"[SHM] Slot table full; {key!r} only goes to the ring")
+            return None
+
+        self.slots[slot]["token"] = key
+        self._slot_of[key] = slot
+        # Publish the slot only after its token is in place
+        self.header[H_N_TOKENS] = slot + 1
+        return slot
+
+    def write(self, token: str, ltp: float, oi: float, volume: float, ts: float) -> None:
+        """Append a tick to the ring and update the token's latest slot.
+
+        Fields that a partial websocket update did not carry (None / NaN) keep
+        their previous slot value.
+        """
+        key = token.encode()[:TOKEN_BYTES]
+        seq = int(self.header[H_WRITE_SEQ])
+
+        slot = self._slot_for_write(key)
+        if slot is not None:
+            row = self.slots[slot]
+            ltp = row["ltp"] if ltp is None or ltp != ltp else ltp
+            oi = row["oi"] if oi is None or oi != oi else oi
+            volume = row["volume"] if volume is None or volume != volume else volume
+
+            row["seq"] += 1                # odd: write in progress
+            row["ltp"] = ltp
+            row["oi"] = oi
+            row["volume"] = volume
+            row["ts"] = ts
+            row["seq"] += 1                # even: consistent
+        else:
+            ltp = np.nan if ltp is None else ltp
+            oi = np.nan if oi is None else oi
+            volume = np.nan if volume is None else volume
+
+        self.ring[seq % self.capacity] = (key, ltp, oi, volume, ts)
+        self.header[H_WRITE_SEQ] = seq + 1
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+    def _slot_for_read(self, key: bytes) -> Optional[int]:
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            return slot
+
+        n_tokens = int(self.header[H_N_TOKENS])
+        if n_tokens > self._known_tokens:
+            tokens = self.slots["token"][self._known_tokens:n_tokens]
+            for i, tok in enumerate(tokens.tolist(), start=self._known_tokens):
+                self._slot_of[tok] = i
+            self._known_tokens = n_tokens
+        return self._slot_of.get(key)
+
+    def latest(self, token: str, retries: int = 100) -> Optional[Tuple[float, float, float, float]]:
+        """Latest (ltp, oi, volume, ts) for a token, or None until it has had an LTP."""
+        slot = self._slot_for_read(token.encode()[:TOKEN_BYTES])
+        if slot is None:
+            return None
+
+        row = self.slots[slot]
+        for _ in range(retries):
+            before = int(row["seq"])
+            if before & 1:
+                continue
+            value = (float(row["ltp"]), float(row["oi"]), float(row["volume"]), float(row["ts"]))
+            if int(row["seq"]) == before:
+                return value if before and value[0] == value[0] else None
+        return None
+
+    def latest_ltp(self, token: str) -> Optional[Tuple[float, float]]:
+        """Latest (ltp, ts) for a token, or None until it has had an LTP."""
+        value = self.latest(token)
+        return (value[0], value[3]) if value else None
+
+    @property
+    def write_seq(self) -> int:
+        """Total ticks written since the segment was created."""
+        return int(self.header[H_WRITE_SEQ])
+
+    def read_since(self, cursor: int) -> Tuple[np.ndarray, int]:
+        """Ticks written after cursor, oldest first.
+
+        If the reader fell more than one ring behind, the overwritten ticks
+        are skipped. The result is a copy (the ring keeps moving).
+
+        Returns:
+            Tuple (ticks array of TICK_DTYPE, new cursor)
+        """
+        end = self.write_seq
+        start = max(cursor, end - self.capacity)
+        if start >= end:
+            return self.ring[:0].copy(), end
+
+        lo, hi = start % self.capacity, end % self.capacity
+        if lo < hi:
+            ticks = self.ring[lo:hi].copy()
+        else:
+            ticks = np.concatenate((self.ring[lo:], self.ring[:hi]))
+        return ticks, end
+
+    def is_current(self) -> bool:
+        """False once the mapped segment was unlinked or recreated (feeder restart)."""
+        return self._inode is None or segment_inode(self.shm.name) == self._inode
+
+    def close(self) -> None:
+        """Detach; the owner also unlinks the segment."""
+        # Drop array views before closing the buffer they point into
+        self.header = self.slots = self.ring = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,131 @@
+"""In-process tick dispatch from the shared-memory tick ring.
+
+A daemon thread follows the feeder's ring (market_data/shm_ring.py) with a
+read cursor and calls the listeners registered for each token, in tick
+order. Because the cursor walks every ring entry, no tick between two
+polls is skipped as long as the reader stays within one ring length.
+
+Shared memory has no wake-up primitive, so between ticks the thread only
+watches the ring's write_seq, sleeping a small fraction of the time the
+ring has been quiet: sub-millisecond during a burst, up to max_wait
+outside market hours (no spin).
+
+Usage:
+    dispatcher = TickDispatcher()
+    dispatcher.add_listener("Nifty 50", lambda ltp, ts: ...)
+    dispatcher.start()
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List
+
+from market_data.shm_ring import DEFAULT_NAME, TickRing
+
+logger = logging.getLogger(__name__)
+
+
+class TickDispatcher:
+    """Polls the tick ring and fans ticks out to per-token listeners."""
+
+    def __init__(self, ring_name: str = DEFAULT_NAME, min_wait: float = 0.0005,
+                 max_wait: float = 0.05, reattach_after: float = 5.0):
+        """Initialize dispatcher.
+
+        Args:
+            ring_name: Shared-memory segment created by the feeder
+            min_wait: Shortest sleep between write_seq checks (seconds)
+            max_wait: Longest sleep between write_seq checks (seconds)
+            reattach_after: Re-open the segment after this long without ticks,
+                in case the feeder restarted and recreated it
+        """
+        self.ring_name = ring_name
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.reattach_after = reattach_after
+
+        self.ring = None
+        self.last_tick_ts = 0.0
+        self._listeners: Dict[bytes, List[Callable[[float, float], None]]] = {}
+        self._thread = None
+
+    def add_listener(self, token: str, callback: Callable[[float, float], None]) -> None:
+        """Call callback(ltp, ts) for every tick of token."""
+        self._listeners.setdefault(token.encode(), []).append(callback)
+
+    def is_live(self, max_silence: float = 5.0) -> bool:
+        """True while ticks are flowing through the ring."""
+        return self.ring is not None and time.time() - self.last_tick_ts <= max_silence
+
+    def start(self) -> threading.Thread:
+        """Start the dispatch thread."""
+        self._thread = threading.Thread(target=self._run, name="tick-dispatcher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _attach(self):
+        if self.ring is not None:
+            self.ring.close()
+        self.ring = TickRing.attach(self.ring_name)
+        if self.ring is not None:
+            logger.info(f"[DISPATCH] Attached to {self.ring_name} at seq {self.ring.write_seq}")
+        return self.ring
+
+    def _wait_for_write(self, cursor: int, idle_since: float, timeout: float) -> bool:
+        """Sleep with backoff until write_seq moves past cursor; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.ring.write_seq == cursor:
+            now = time.monotonic()
+            if now >= deadline:
+                return False
+            # Backoff ~5% of the quiet time so far: waking late adds little to the gap
+            wait = min(max((now - idle_since) / 20, self.min_wait), self.max_wait)
+            time.sleep(min(wait, deadline - now))
+        return True
+
+    def _run(self):
+        cursor = None
+        idle_since = time.monotonic()
+
+        while True:
+            if self.ring is None:
+                if self._attach() is None:
+                    time.sleep(1.0)
+                    continue
+                # Start from "now": history before attach is not replayed
+                cursor = self.ring.write_seq
+                idle_since = time.monotonic()
+
+            try:
+                ticks, cursor = self.ring.read_since(cursor)
+            except Exception as e:
+                logger.error(f"[DISPATCH] Ring read failed: {e}")
+                self.ring = None
+                continue
+
+            if len(ticks) == 0:
+                quiet = time.monotonic() - idle_since
+                if quiet > self.reattach_after:
+                    self._attach()
+                    if self.ring is not None:
+                        cursor = self.ring.write_seq
+                    idle_since = time.monotonic()
+                    continue
+                try:
+                    self._wait_for_write(cursor, idle_since, self.reattach_after - quiet)
+                except Exception as e:
+                    logger.error(f"[DISPATCH] Ring read failed: {e}")
+                    self.ring = None
+                continue
+
+            idle_since = time.monotonic()
+            for token, ltp, ts in zip(ticks["token"].tolist(), ticks["ltp"].tolist(), ticks["ts"].tolist()):
+                listeners = self._listeners.get(token)
+                if not listeners or ltp != ltp:
+                    continue
+                self.last_tick_ts = ts
+                for callback in listeners:
+                    try:
+                        callback(ltp, ts)
+                    except Exception as e:
+                        logger.error(f"[DISPATCH] Listener for {token!r} failed: {e}", exc_info=True)
@@ -0,0 +1,233 @@
+"""Daily columnar tick files: buffered writer and NumPy reader.
+
+Layout (hive-style partitions, one Parquet part per flush):
+
+    {root}/date=YYYY-MM-DD/underlying=NIFTY/part-HHMMSS-000001.parquet
+
+Columns: token (string), ts (float64 epoch seconds), ltp, oi, volume (float64).
+
+TickRecorder keeps one fixed-size NumPy column buffer per underlying and
+writes it out as a zstd-compressed part when it fills up or when the flush
+interval elapses, so memory stays bounded no matter how busy the day is.
+
+Usage:
+    recorder = TickRecorder(root, underlying_of)
+    recorder.append(ticks)            # TICK_DTYPE array from the shm ring
+    recorder.flush_due()
+
+    data = load_ticks(root, "2026-10-16", "NIFTY", "Nifty 50")
+    data["ts"], data["ltp"]           # NumPy arrays
+    day = load_partition(root, "2026-10-16", "NIFTY")   # every token, plus day["token"]
+"""
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered per underlying before a part is written
+DEFAULT_BUFFER_ROWS = 100_000
+
+# Seconds between time-based flushes of partially filled buffers
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+COLUMNS = ("ts", "ltp", "oi", "volume")
+
+SCHEMA = pa.schema([
+    ("token", pa.string()),
+    ("ts", pa.float64()),
+    ("ltp", pa.float64()),
+    ("oi", pa.float64()),
+    ("volume", pa.float64()),
+])
+
+
+def partition_dir(root: str, day: str, underlying: str) -> str:
+    """Directory holding one day's parts for one underlying."""
+    return os.path.join(root, f"date={day}", f"underlying={underlying}")
+
+
+class _ColumnBuffer:
+    """Preallocated columns for one underlying."""
+
+    def __init__(self, rows: int):
+        self.tokens = np.empty(rows, dtype=object)
+        self.columns = {name: np.empty(rows, dtype=np.float64) for name in COLUMNS}
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.tokens)
+
+    def take(self, tokens, ts, ltp, oi, volume) -> int:
+        """Copy as many rows as fit; returns how many were taken."""
+        n = min(len(tokens), self.capacity - self.size)
+        end = self.size + n
+        self.tokens[self.size:end] = tokens[:n]
+        for name, values in zip(COLUMNS, (ts, ltp, oi, volume)):
+            self.columns[name][self.size:end] = values[:n]
+        self.size = end
+        return n
+
+    def to_table(self) -> pa.Table:
+        n = self.size
+        return pa.table(
+            [pa.array(self.tokens[:n].tolist(), pa.string())]
+            + [pa.array(self.columns[name][:n]) for name in COLUMNS],
+            schema=SCHEMA,
+        )
+
+
+class TickRecorder:
+    """Buffers ticks per underlying and writes daily Parquet parts."""
+
+    def __init__(self, root: str, underlying_of: Callable[[str], str],
+                 buffer_rows: int = DEFAULT_BUFFER_ROWS, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """Initialize recorder.
+
+        Args:
+            root: Base directory for the tick files
+            underlying_of: Maps a feed token to its underlying (partition name);
+                None / "OTHER" = unknown yet, asked again on its next batch
+            buffer_rows: Rows buffered per underlying before writing a part
+            flush_interval: Max seconds a tick stays in memory
+        """
+        self.root = root
+        self.underlying_of = underlying_of
+        self.buffer_rows = buffer_rows
+        self.flush_interval = flush_interval
+
+        self.day: Optional[str] = None
+        self.rows_written = 0
+        self.parts_written = 0
+        self._buffers: Dict[str, _ColumnBuffer] = {}
+        self._underlying_cache: Dict[bytes, str] = {}
+        self._last_flush = time.monotonic()
+        self._part_seq = 0
+
+    def _underlying(self, token: bytes) -> str:
+        underlying = self._underlying_cache.get(token)
+        if underlying is None:
+            underlying = self.underlying_of(token.decode()) or "OTHER"
+            # Misses are not cached: the contract may be listed by a later master update
+            if underlying != "OTHER":
+                self._underlying_cache[token] = underlying
+        return underlying
+
+    def append(self, ticks: np.ndarray) -> None:
+        """Append a batch of ticks (TICK_DTYPE records, oldest first)."""
+        if len(ticks) == 0:
+            return
+
+        # Day boundary: close the old day before buffering the new one
+        day = datetime.fromtimestamp(float(ticks["ts"][-1])).date().isoformat()
+        if self.day is None:
+            self.day = day
+        elif day != self.day:
+            first = datetime.fromtimestamp(float(ticks["ts"][0])).date().isoformat()
+            if first != day:
+                cut = int(np.searchsorted(
+                    ticks["ts"], datetime.fromisoformat(day).timestamp(), side="left"
+                ))
+                self.append(ticks[:cut])
+                ticks = ticks[cut:]
+            self.flush()
+            self.day = day
+
+        # Group by underlying with one pass over the distinct tokens
+        tokens = ticks["token"]
+        uniq, inverse = np.unique(tokens, return_inverse=True)
+        groups = np.array([self._underlying(tok) for tok in uniq.tolist()], dtype=object)[inverse]
+
+        for underlying in set(groups.tolist()):
+            mask = groups == underlying
+            rows = ticks[mask]
+            str_tokens = np.char.decode(rows["token"]).astype(object)
+            self._append_rows(underlying, str_tokens, rows["ts"], rows["ltp"], rows["oi"], rows["volume"])
+
+    def _append_rows(self, underlying, tokens, ts, ltp, oi, volume) -> None:
+        buffer = self._buffers.get(underlying)
+        if buffer is None:
+            buffer = self._buffers[underlying] = _ColumnBuffer(self.buffer_rows)
+
+        while len(tokens):
+            taken = buffer.take(tokens, ts, ltp, oi, volume)
+            if buffer.size == buffer.capacity:
+                self._write_part(underlying, buffer)
+            tokens, ts, ltp, oi, volume = (tokens[taken:], ts[taken:], ltp[taken:], oi[taken:], volume[taken:])
+
+    def _write_part(self, underlying: str, buffer: _ColumnBuffer) -> None:
+        if buffer.size == 0:
+            return
+        directory = partition_dir(self.root, self.day, underlying)
+        os.makedirs(directory, exist_ok=True)
+
+        self._part_seq += 1
+        name = f"part-{datetime.now().strftime('%H%M%S')}-{self._part_seq:06d}.parquet"
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        pq.write_table(buffer.to_table(), tmp_path, compression="zstd")
+        # Readers never see a half-written part
+        os.replace(tmp_path, os.path.join(directory, name))
+
+        self.rows_written += buffer.size
+        self.parts_written += 1
+        logger.info(f"[TICK STORE] {self.day}/{underlying}: wrote {buffer.size} rows ({name})")
+        buffer.size = 0
+
+    def flush(self) -> None:
+        """Write every non-empty buffer."""
+        for underlying, buffer in self._buffers.items():
+            self._write_part(underlying, buffer)
+        self._last_flush = time.monotonic()
+
+    def flush_due(self) -> None:
+        """Flush if the flush interval has elapsed."""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+
+def load_ticks(root: str, day: str, underlying: str, token: str) -> Dict[str, np.ndarray]:
+    """Load one day's ticks for a token as NumPy arrays sorted by ts.
+
+    Args:
+        root: Base directory used by TickRecorder
+        day: YYYY-MM-DD
+        underlying: Partition (NIFTY, BANKNIFTY, EQ, ...)
+        token: Feed token ("Nifty 50", "53001", ...)
+
+    Returns:
+        dict: {"ts", "ltp", "oi", "volume"} arrays (empty if nothing recorded)
+    """
+    directory = partition_dir(root, day, underlying)
+    if not os.path.isdir(directory):
+        return {name: np.empty(0, dtype=np.float64) for name in COLUMNS}
+
+    table = pq.read_table(directory, columns=list(COLUMNS), filters=[("token", "=", token)], schema=SCHEMA)
+    data = {name: table.column(name).to_numpy() for name in COLUMNS}
+    order = np.argsort(data["ts"], kind="stable")
+    return {name: values[order] for name, values in data.items()}
+
+
+def load_partition(root: str, day: str, underlying: str) -> Dict[str, np.ndarray]:
+    """Load one day's ticks of every token of an underlying, sorted by ts.
+
+    Returns:
+        dict: {"token", "ts", "ltp", "oi", "volume"} arrays (empty if nothing recorded)
+    """
+    directory = partition_dir(root, day, underlying)
+    if not os.path.isdir(directory):
+        empty = {name: np.empty(0, dtype=np.float64) for name in COLUMNS}
+        empty["token"] = np.empty(0, dtype=object)
+        return empty
+
+    table = pq.read_table(directory, columns=["token", *COLUMNS], schema=SCHEMA)
+    data = {name: table.column(name).to_numpy() for name in COLUMNS}
+    data["token"] = np.asarray(table.column("token").to_pylist(), dtype=object)
+    order = np.argsort(data["ts"], kind="stable")
+    return {name: values[order] for name, values in data.items()}
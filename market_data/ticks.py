@@ -0,0 +1,103 @@
+"""Normalization of Neo websocket messages into flat tick dicts.
+
+Neo pushes partial updates: only fields that changed since the previous
+message are present, so every field except the token is optional.
+
+Normalized tick:
+    {
+        "tk": "Nifty 50" | "12345",   # instrument token / index name
+        "e": "nse_cm",                # exchange segment
+        "kind": "index" | "stock" | "depth",
+        "ltp": float or None,
+        "oi": float or None,
+        "v": float or None,           # volume
+        "bid": float or None,         # best bid price (bp)
+        "ask": float or None,         # best ask price (sp)
+        "exch_ts": float or None,     # exchange timestamp (epoch seconds)
+        "recv_ts": float,             # local receive timestamp (epoch seconds)
+        "raw": {...}                  # original row
+    }
+"""
+import time
+from datetime import datetime
+from typing import List, Optional
+
+# Websocket "name" field -> tick kind
+KIND_MAP = {"if": "index", "sf": "stock", "dp": "depth"}
+
+# Index identifiers used with isIndex=True subscriptions
+INDEX_TOKENS = {
+    "Nifty 50": "NIFTY",
+    "Nifty Bank": "BANKNIFTY",
+}
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_exchange_time(value) -> Optional[float]:
+    """Parse an exchange time field (epoch seconds or dd/mm/YYYY HH:MM:SS)."""
+    if value in (None, ""):
+        return None
+
+    number = _to_float(value)
+    if number is not None:
+        # Some feeds send epoch milliseconds
+        return number / 1000 if number > 1e11 else number
+
+    for fmt in ("%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(str(value), fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_ticks(message, recv_ts: Optional[float] = None) -> List[dict]:
+    """Convert one websocket message into a list of normalized ticks.
+
+    Args:
+        message: Raw on_message payload (dict with "data", list of rows, or one row)
+        recv_ts: Receive timestamp; defaults to now
+
+    Returns:
+        list: Normalized ticks (rows without a token are dropped)
+    """
+    recv_ts = recv_ts if recv_ts is not None else time.time()
+
+    if isinstance(message, dict):
+        rows = message.get("data", [message])
+    else:
+        rows = message or []
+
+    ticks = []
+    for row in rows:
+        if not isinstance(row, dict) or not row.get("tk"):
+            continue
+
+        kind = KIND_MAP.get(row.get("name"), "stock")
+        if kind == "index":
+            ltp = _to_float(row.get("iv"))
+            exch_ts = parse_exchange_time(row.get("tvalue"))
+        else:
+            ltp = _to_float(row.get("ltp"))
+            exch_ts = parse_exchange_time(row.get("ftdm") or row.get("ltt"))
+
+        ticks.append({
+            "tk": str(row["tk"]),
+            "e": row.get("e"),
+            "kind": kind,
+            "ltp": ltp,
+            "oi": _to_float(row.get("oi")),
+            "v": _to_float(row.get("v")),
+            "bid": _to_float(row.get("bp")),
+            "ask": _to_float(row.get("sp")),
+            "exch_ts": exch_ts,
+            "recv_ts": recv_ts,
+            "raw": row,
+        })
+    return ticks
@@ -5,6 +5,9 @@ import redis
 import math
 import os
 from datetime import datetime
+from utils.contract_meta import get_contract_metadata
+from utils.latency import load_stamps, stamp
+from utils.spot import get_spot
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LAST_SIGN_FILE = os.path.join(BASE_DIR, "oi_last_pece_sign.json")
@@ -24,8 +27,8 @@ def save_last_sign(data):
 UID = "ITC2766"          # <-- start hardcoded, UI will control later
 CHECK_INTERVAL = 3
 
-NIFTY_LOT_SIZE = 60
-BANKNIFTY_LOT_SIZE = 25
+# Skip signals whose PE-CE z-score (rolling stats published with the signal) is weaker than this; 0 = off
+MIN_ZSCORE = float(os.environ.get("OI_MIN_ZSCORE", "0"))
 
 r = redis.Redis(host="localhost", port=6379, decode_responses=True)
 
@@ -48,153 +51,182 @@ def round_otm_strike(spot: float, direction: str) -> int:
         # SELL CE above spot
         return int(math.ceil(spot / 100) * 100)
 
+
+# Per-index Redis keys / flags (NIFTY keeps the original un-prefixed names)
+ENGINE_CONFIG = {
+    "NIFTY": {
+        "signal_key": "NIFTY_OI_SIGNAL",
+        "spot_key": "NF_SPOT",
+        "enabled_field": "OI_ENGINE_ENABLED",
+        "status_field": "OI_ENGINE_STATUS",
+        "msg_field": "MSG_OI_CROSSOVER",
+        "lots_field": "OI_NIFTY_LOTS",
+        "place_field": "PLACE_OI_CROSSOVER",
+        "order_field": "OI_CROSSOVER_ORDER",
+        "order_status_field": "STATUS_OI_CROSSOVER",
+        "last_signal_field": "OI_ENGINE_LAST_SIGNAL",
+        "last_order_field": "OI_ENGINE_LAST_ORDER",
+        "log_tag": "OI ORDER",
+    },
+    "BANKNIFTY": {
+        "signal_key": "BANKNIFTY_OI_SIGNAL",
+        "spot_key": "BN_SPOT",
+        "enabled_field": "BN_OI_ENGINE_ENABLED",
+        "status_field": "BN_OI_ENGINE_STATUS",
+        "msg_field": "MSG_BN_OI_CROSSOVER",
+        "lots_field": "OI_BANKNIFTY_LOTS",
+        "place_field": "PLACE_BN_OI_CROSSOVER",
+        "order_field": "BN_OI_CROSSOVER_ORDER",
+        "order_status_field": "STATUS_BN_OI_CROSSOVER",
+        "last_signal_field": "BN_OI_ENGINE_LAST_SIGNAL",
+        "last_order_field": "BN_OI_ENGINE_LAST_ORDER",
+        "log_tag": "BN OI ORDER",
+    },
+}
+
+
+def select_contract(index_name: str, spot: float, direction: str, redis_client=None, meta=None):
+    """Pick expiry, strike and option type from the in-memory contract index.
+
+    The 100-point OTM rounding is kept as the target; the index then snaps it
+    to the first strike that is actually listed on the OTM side. `meta` is a
+    ContractMetadata to use instead of the process-wide one (replay).
+
+    Returns:
+        Tuple (expiry, strike, option_type); expiry/strike are None if not listed
+    """
+    option_type = "PE" if direction == "BULLISH" else "CE"
+    meta = meta or get_contract_metadata(redis_client or r)
+
+    expiry = meta.current_weekly_expiry(index_name)
+    if expiry is None:
+        return None, None, option_type
+
+    target = round_otm_strike(spot, direction)
+    strike = meta.contracts.otm_strike(index_name, expiry, option_type, target)
+    return expiry, strike, option_type
+
+
+def process_signal(redis_client, uid: str, index_name: str, signal_data=None, request_order=True, meta=None):
+    """Turn a NEW/NOTIFIED OI signal for one index into an order request.
+
+    Args:
+        redis_client: Redis client instance
+        uid: User ID whose engine flags / order fields are used
+        index_name: NIFTY or BANKNIFTY
+        signal_data: Signal handed over in-process (oi_pipeline.py) instead of
+            read from the index's signal hash
+        request_order: False writes the order fields for the UI / audit
+            without raising the agent's request flag (the caller submits it)
+        meta: ContractMetadata for expiry and lot size (default: the
+            process-wide one; replay passes the replayed day's)
+
+    Returns:
+        dict or None: The published order payload, if any
+    """
+    cfg = ENGINE_CONFIG[index_name]
+
+    # ---- Engine ON/OFF ----
+    if redis_client.hget(uid, cfg["enabled_field"]) != "ON":
+        redis_client.hset(uid, cfg["status_field"], "IDLE")
+        return None
+    redis_client.hset(uid, cfg["status_field"], "RUNNING")
+
+    # ---- Read signal ----
+    if signal_data is None:
+        signal_data = redis_client.hgetall(cfg["signal_key"])
+        if not signal_data or signal_data.get("status") not in ("NEW", "NOTIFIED"):
+            return None
+
+    direction = signal_data.get("signal")
+    pe_ce = float(signal_data.get("pe_ce"))
+
+    # ---- Signal strength (rolling stats; absent on signals from older engines) ----
+    strength = {k: float(signal_data[k]) for k in ("ewma", "zscore", "slope") if signal_data.get(k) not in (None, "")}
+    if MIN_ZSCORE and "zscore" in strength and abs(strength["zscore"]) < MIN_ZSCORE:
+        logging.info(f"[{cfg['log_tag']}] {direction} skipped: |z|={abs(strength['zscore'])} < {MIN_ZSCORE}")
+        redis_client.hset(cfg["signal_key"], "status", "SKIPPED_WEAK")
+        redis_client.hset(uid, cfg["msg_field"], f"Signal skipped: z-score {strength['zscore']} below {MIN_ZSCORE}")
+        return None
+
+    # ---- Read and validate spot (missing or stale → fail) ----
+    spot = get_spot(redis_client, index_name)
+    if spot is None:
+        # Fail fast: mark signal as failed, set error state
+        logging.error(f"{cfg['spot_key']} validation failed: missing or stale")
+        redis_client.hset(cfg["signal_key"], "status", "FAILED_NO_SPOT")
+        redis_client.hset(uid, cfg["status_field"], "ERROR")
+        redis_client.hset(uid, cfg["msg_field"], f"{cfg['spot_key']} not available or stale")
+        return None
+
+    meta = meta or get_contract_metadata(redis_client)
+    # strike = round_itm_strike(spot, direction)
+    # option_type = "CE" if direction == "BULLISH" else "PE"
+    expiry, strike, option_type = select_contract(index_name, spot, direction, redis_client, meta)
+
+    if expiry is None or strike is None:
+        logging.error(f"No listed {index_name} contract for spot={spot} direction={direction}")
+        redis_client.hset(cfg["signal_key"], "status", "FAILED_NO_CONTRACT")
+        redis_client.hset(uid, cfg["status_field"], "ERROR")
+        redis_client.hset(uid, cfg["msg_field"], f"No listed {index_name} contract in instrument master")
+        return None
+
+    lots = int(redis_client.hget(uid, cfg["lots_field"]) or 1)
+    qty = meta.qty_for_lots(index_name, lots)
+
+    # ---- Build order payload ----
+    order_payload = {
+        "Index": index_name,
+        "OrderType": "NRML",
+        "Qty": qty,
+        "Side": "SELL",
+        "Expiry": expiry,
+        "Strike": strike,
+        "OptionType": option_type,
+        "strategy": "OI_CROSSOVER",
+        "spot": spot,
+        "pe_ce": pe_ce,
+        "direction": direction,
+        **strength,
+        "stamps": stamp(load_stamps(signal_data.get("stamps")), "select")
+    }
+
+    # ---- Publish order intent ----
+    redis_client.hset(
+        uid,
+        mapping={
+            cfg["place_field"]: "requested" if request_order else "processing",
+            cfg["order_field"]: json.dumps(order_payload),
+            cfg["order_status_field"]: "PROCESSING"
+        }
+    )
+
+    # ---- Store last signal/order for UI ----
+    redis_client.hset(uid, cfg["last_signal_field"], json.dumps(signal_data))
+    redis_client.hset(uid, cfg["last_order_field"], json.dumps(order_payload))
+
+    # NOTE: Signal consumption moved to order_service.py (only on success)
+
+    logging.info(
+        f"[{cfg['log_tag']}] {direction} → SELL {strike} {option_type} | Spot={spot}"
+    )
+    return order_payload
+
+
 def main():
     logging.info("OI Order Engine started")
 
+    # Load contract metadata + index up front so the first signal doesn't pay for it
+    get_contract_metadata(r)
+
     while True:
         try:
-            # ---- Engine ON/OFF ----
-            enabled = r.hget(UID, "OI_ENGINE_ENABLED")
-            if enabled != "ON":
-                r.hset(UID, "OI_ENGINE_STATUS", "IDLE")
-            else:
-                r.hset(UID, "OI_ENGINE_STATUS", "RUNNING")
-
-                # ---- Read signal ----
-                signal_data = r.hgetall("NIFTY_OI_SIGNAL")
-                if not signal_data:
-                    pass  # Just skip to next check
-
-                elif signal_data.get("status") not in ("NEW", "NOTIFIED"):
-                    pass
-                
-                else: 
-                    direction = signal_data.get("signal")
-                    pe_ce = float(signal_data.get("pe_ce"))
-
-                    # ---- Read and validate NF_SPOT ----
-                    spot_raw = r.get("NF_SPOT")
-                    try:
-                        if not spot_raw:
-                            raise ValueError("NF_SPOT key missing or empty")
-                        spot = float(spot_raw)
-                    except (ValueError, TypeError) as e:
-                        # Fail fast: mark signal as failed, set error state
-                        logging.error(f"NF_SPOT validation failed: {e}")
-                        r.hset("NIFTY_OI_SIGNAL", "status", "FAILED_NO_SPOT")
-                        r.hset(UID, "OI_ENGINE_STATUS", "ERROR")
-                        r.hset(UID, "MSG_OI_CROSSOVER", "NF_SPOT not available")
-                    else:
-                        # strike = round_itm_strike(spot, direction)
-                        # option_type = "CE" if direction == "BULLISH" else "PE"
-                        strike = round_otm_strike(spot, direction)
-                        option_type = "PE" if direction == "BULLISH" else "CE"
-
-                        lots = int(r.hget(UID, "OI_NIFTY_LOTS") or 1)
-                        qty = lots * NIFTY_LOT_SIZE
-
-                        # ---- Build order payload ----
-                        order_payload = {
-                            "Index": "NIFTY",
-                            "OrderType": "NRML",
-                            "Qty": qty,
-                            "Side": "SELL",
-                            "Expiry": "2026-01-27",
-                            "Strike": strike,
-                            "OptionType": option_type,
-                            "strategy": "OI_CROSSOVER",
-                            "spot": spot,
-                            "pe_ce": pe_ce,
-                            "direction": direction
-                        }
-
-                        # ---- Publish order intent ----
-                        r.hset(
-                            UID,
-                            mapping={
-                                "PLACE_OI_CROSSOVER": "requested",
-                                "OI_CROSSOVER_ORDER": json.dumps(order_payload),
-                                "STATUS_OI_CROSSOVER": "PROCESSING"
-                            }
-                        )
-
-                        # ---- Store last signal/order for UI ----
-                        r.hset(UID, "OI_ENGINE_LAST_SIGNAL", json.dumps(signal_data))
-                        r.hset(UID, "OI_ENGINE_LAST_ORDER", json.dumps(order_payload))
-
-                        # NOTE: Signal consumption moved to order_service.py (only on success)
-
-                        logging.info(
-                            f"[OI ORDER] {direction} → SELL {strike} {option_type} | Spot={spot}"
-                        )
+            process_signal(r, UID, "NIFTY")
 
             # ===============================
             # BANKNIFTY OI ORDER EXECUTION
             # ===============================
-            enabled_bn = r.hget(UID, "BN_OI_ENGINE_ENABLED")
-            if enabled_bn != "ON":
-                r.hset(UID, "BN_OI_ENGINE_STATUS", "IDLE")
-            else:
-                r.hset(UID, "BN_OI_ENGINE_STATUS", "RUNNING")
-
-                signal_data_bn = r.hgetall("BANKNIFTY_OI_SIGNAL")
-                if not signal_data_bn:
-                    pass
-
-                elif signal_data_bn.get("status") not in ("NEW", "NOTIFIED"):
-                    pass
-                
-                else:
-                    direction_bn = signal_data_bn.get("signal")
-                    pe_ce_bn = float(signal_data_bn.get("pe_ce"))
-
-                    spot_raw = r.get("BN_SPOT")
-                    try:
-                        if not spot_raw:
-                            raise ValueError("BN_SPOT key missing or empty")
-                        spot_bn = float(spot_raw)
-                    except (ValueError, TypeError) as e:
-                        logging.error(f"BN_SPOT validation failed: {e}")
-                        r.hset("BANKNIFTY_OI_SIGNAL", "status", "FAILED_NO_SPOT")
-                        r.hset(UID, "BN_OI_ENGINE_STATUS", "ERROR")
-                        r.hset(UID, "MSG_BN_OI_CROSSOVER", "BN_SPOT not available")
-                    else:
-                        strike = round_otm_strike(spot_bn, direction_bn)
-                        option_type = "PE" if direction_bn == "BULLISH" else "CE"
-
-                        lots_bn = int(r.hget(UID, "OI_BANKNIFTY_LOTS") or 1)
-                        qty_bn = lots_bn * BANKNIFTY_LOT_SIZE
-
-                        order_payload = {
-                            "Index": "BANKNIFTY",
-                            "OrderType": "NRML",
-                            "Qty": qty_bn,
-                            "Side": "SELL",
-                            "Expiry": "2026-01-27",
-                            "Strike": strike,
-                            "OptionType": option_type,
-                            "strategy": "OI_CROSSOVER",
-                            "spot": spot_bn,
-                            "pe_ce": pe_ce_bn,
-                            "direction": direction_bn
-                        }
-
-                        r.hset(
-                            UID,
-                            mapping={
-                                "PLACE_BN_OI_CROSSOVER": "requested",
-                                "BN_OI_CROSSOVER_ORDER": json.dumps(order_payload),
-                                "STATUS_BN_OI_CROSSOVER": "PROCESSING"
-                            }
-                        )
-
-                        r.hset(UID, "BN_OI_ENGINE_LAST_SIGNAL", json.dumps(signal_data_bn))
-                        r.hset(UID, "BN_OI_ENGINE_LAST_ORDER", json.dumps(order_payload))
-
-                        logging.info(
-                            f"[BN OI ORDER] {direction_bn} → SELL {strike} {option_type} | Spot={spot_bn}"
-                        )
-
+            process_signal(r, UID, "BANKNIFTY")
 
         except Exception as e:
             logging.exception("OI Order Engine error")
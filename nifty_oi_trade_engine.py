@@ -1,22 +1,60 @@
 TEST_MODE = False
 
+import argparse
+import json
+import os
+import threading
 import time
-import requests
+from datetime import datetime
+
+import numpy as np
 import redis
-import pandas as pd
 import logging
+from market_data.option_chain import H_SEQ, ChainView
+from market_data.pe_ce import DEFAULT_BANDS, PeCeCalculator
+from market_data.rolling_stats import RollingStats
+from oi_shadow import DailyReporter, ShadowEvaluator, parse_shadow_sets
+from utils.contract_meta import get_contract_metadata
+from utils.latency import stamp
+from utils.questdb import get_questdb, quote_ident
+from utils.spot import get_spot
 from utils.telegram_notifier import send_telegram
 
 THRESHOLD = 2000  # PE-CE dead zone
+
+# Whipsaw guards (0 = off, the plain one-sign-flip rule)
+HYSTERESIS = float(os.environ.get("OI_HYSTERESIS", "0"))    # extra |PE-CE| beyond the dead zone to flip
+MIN_DWELL = float(os.environ.get("OI_MIN_DWELL", "0"))      # seconds after a crossover before the next
+
+# Rolling PE-CE statistics per index (observations / EWMA span)
+STATS_WINDOW = int(os.environ.get("OI_STATS_WINDOW", "120"))
+STATS_SPAN = int(os.environ.get("OI_STATS_SPAN", "20"))
 UID="ITC2766"
-HOST = "http://localhost:9000"
-SQL_NIFTY = "select * from NiftyOISpikeNew latest on ts PARTITION by BatchId;"
+TABLE_NIFTY = "NiftyOISpikeNew"
 REDIS_KEY = "NIFTY_OI_SIGNAL"
 
-SQL_BANKNIFTY = "select * from BankNiftyOISpikeNew latest on ts PARTITION by BatchId;"
+TABLE_BANKNIFTY = "BankNiftyOISpikeNew"
 REDIS_KEY_BN = "BANKNIFTY_OI_SIGNAL"
 
-CHECK_INTERVAL = 20  # seconds
+# PE-CE column: by name if set, otherwise the name found at the reference position
+PE_CE_COLUMN = os.environ.get("OI_PE_CE_COLUMN")
+PE_CE_POSITION = 8
+
+QUERY_TIMEOUT = 2  # seconds
+
+# Local PE-CE from the streamed option chain (--source chain)
+CHAIN_BANDS = os.environ.get("OI_CHAIN_BANDS", DEFAULT_BANDS)   # first band drives the signal
+CHAIN_THRESHOLD = float(os.environ.get("OI_CHAIN_THRESHOLD", "2000"))  # dead zone, in lots
+CHAIN_MIN_INTERVAL = 0.2  # seconds; a check of an unchanged chain is one header read
+CHAIN_STALE_AFTER = float(os.environ.get("OI_CHAIN_STALE_AFTER", "60"))  # seconds without an option tick
+
+CHECK_INTERVAL = 20  # seconds (default per-index poll interval)
+MIN_INTERVAL = 1.0   # fastest allowed poll
+MAX_BACKOFF = 60.0   # ceiling for the retry delay after consecutive failures
+
+# Signal status written when oi_pipeline.py submits the order in-process;
+# the standalone order engine only acts on NEW / NOTIFIED
+PIPELINE_STATUS = "PIPELINE"
 
 r = redis.Redis(host="localhost", port=6379, decode_responses=True)
 
@@ -26,32 +64,144 @@ logging.basicConfig(
 )
 
 
+class PeCeCursor:
+    """Incremental reader of the newest PE-CE row of one OI spike table.
+
+    Keeps the timestamp of the last row seen and asks QuestDB only for rows
+    newer than it, returning just the latest one (ts + PE-CE, by column
+    name). An unchanged table costs one empty interval scan on the
+    designated timestamp, however large the table grows.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.column = None          # PE-CE column name, resolved once
+        self.last_ts = None         # ISO timestamp of the last row returned
+        self.last_row_ts = None     # same, as epoch seconds (latency stamps)
+
+    def _resolve_column(self) -> str:
+        """Name of the PE-CE column (PE_CE_COLUMN, else the reference position)."""
+        if PE_CE_COLUMN:
+            return PE_CE_COLUMN
+        res = get_questdb().query(f"select * from {self.table} limit -1", timeout=QUERY_TIMEOUT)
+        name = res.names[PE_CE_POSITION]
+        logging.info(f"[OI] {self.table}: PE-CE column is '{name}'")
+        return name
+
+    def fetch(self):
+        """Latest PE-CE newer than the cursor, or None if nothing new."""
+        if self.column is None:
+            self.column = self._resolve_column()
+
+        sql = f"select ts, {quote_ident(self.column)} from {self.table}"
+        if self.last_ts is not None:
+            sql += " where ts > :cursor"
+        sql += " limit -1"
+
+        res = get_questdb().query(sql, {"cursor": self.last_ts}, timeout=QUERY_TIMEOUT)
+        if res.empty:
+            return None
+
+        ts, value = res.rows[-1]
+        self.last_ts = ts
+        self.last_row_ts = datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+        return float(value) if value is not None else None
+
+
+nifty_cursor = PeCeCursor(TABLE_NIFTY)
+banknifty_cursor = PeCeCursor(TABLE_BANKNIFTY)
+
+
+class ChainPeCeSource:
+    """PE-CE computed locally from the option chain the spot feeder streams.
+
+    Reads the current expiry from the shared-memory chain table
+    (market_data/option_chain.py) and sums PE - CE OI over every configured
+    band in one reduction (market_data/pe_ce.py). Values are in lots (shares
+    for underlyings without contract metadata). All
+    bands are published to {INDEX}_PE_CE_BANDS; the first one is returned
+    to drive the signal. A chain without new ticks since the last call
+    costs one header read. After a spot_feeder restart the view re-attaches
+    to the new segment; a chain whose newest tick is older than
+    CHAIN_STALE_AFTER raises so the poller backs off and reports it.
+    """
+
+    min_interval = CHAIN_MIN_INTERVAL
+    threshold = CHAIN_THRESHOLD
+
+    def __init__(self, redis_client, index_name: str, bands: str = CHAIN_BANDS):
+        self.redis_client = redis_client
+        self.index_name = index_name
+        self.calculator = PeCeCalculator.from_spec(bands)
+        self.bands_key = f"{index_name}_PE_CE_BANDS"
+        self.view = None
+        self.lot_size = None
+        self.last_seq = None
+        self.last_value = None
+        self.last_row_ts = None     # newest option tick in the chain (latency stamps)
+
+    def fetch(self):
+        """Primary-band PE-CE if the chain changed it, else None."""
+        if self.view is not None and not self.view.is_current():
+            logging.warning("[%s] Option chain segment recreated, re-attaching", self.index_name)
+            self._detach()
+        if self.view is None:
+            self.view = ChainView.attach(self.index_name)
+            if self.view is None:
+                raise RuntimeError(f"{self.index_name} option chain not streaming (spot_feeder --chain-width)")
+        if self.lot_size is None:
+            try:
+                self.lot_size = get_contract_metadata(self.redis_client).lot_size(self.index_name)
+            except KeyError:
+                self.lot_size = 1   # underlying without contract metadata: values in shares
+
+        seq = int(self.view.header[H_SEQ])
+        if seq == self.last_seq:
+            newest = self.view.newest_ts()
+            if newest is not None and time.time() - newest > CHAIN_STALE_AFTER:
+                self._detach()
+                raise RuntimeError(f"{self.index_name} option chain stale: no tick for "
+                                   f"{time.time() - newest:.0f}s")
+            return None
+        chain = self.view.snapshot()
+        if not chain:
+            return None
+        self.last_seq = seq
+
+        expiry = min(chain)
+        values = self.calculator.compute(chain[expiry], get_spot(self.redis_client, self.index_name))
+        if values is None:
+            return None
+        values = {name: round(v / self.lot_size, 2) for name, v in values.items()}
+
+        value = values[self.calculator.primary]
+        if value == self.last_value:
+            return None
+        self.last_value = value
+        tick_ts = np.concatenate((chain[expiry]["CE"]["ts"], chain[expiry]["PE"]["ts"]))
+        self.last_row_ts = float(np.nanmax(tick_ts)) if not np.isnan(tick_ts).all() else None
+        self.redis_client.hset(self.bands_key, mapping={**values, "expiry": expiry, "ts": time.time()})
+        return value
+
+    def _detach(self):
+        self.view.close()
+        self.view = None
+        self.last_seq = None
+
+
+def make_source(redis_client, index_name: str, source: str = "questdb", bands: str = CHAIN_BANDS):
+    """PE-CE source for a poller: the QuestDB cursor or the local chain."""
+    if source == "chain":
+        return ChainPeCeSource(redis_client, index_name, bands)
+    return INDEX_CONFIG[index_name]["cursor"]
+
+
 def fetch_latest_pe_ce():
-    resp = requests.get(
-        f"{HOST}/exec",
-        params={"query": SQL_NIFTY},
-        timeout=2
-    ).json()
-
-    df = pd.DataFrame.from_dict(resp["dataset"])
-    if df.empty:
-        return None
+    return nifty_cursor.fetch()
 
-    # df[8] = PE-CE (as per reference file)
-    return float(df.iloc[-1][8])
 
 def fetch_latest_pe_ce_banknifty():
-    resp = requests.get(
-        f"{HOST}/exec",
-        params={"query": SQL_BANKNIFTY},
-        timeout=2
-    ).json()
-
-    df = pd.DataFrame.from_dict(resp["dataset"])
-    if df.empty:
-        return None
-
-    return float(df.iloc[-1][8])
+    return banknifty_cursor.fetch()
 
 
 def sign(val: float) -> int:
@@ -62,119 +212,268 @@ def sign(val: float) -> int:
     return 0
 
 
+# Per-index Redis keys / flags
+INDEX_CONFIG = {
+    "NIFTY": {
+        "cursor": nifty_cursor,
+        "enabled_field": "OI_ENGINE_ENABLED",
+        "signal_key": REDIS_KEY,
+        "prev_sign_key": "NIFTY_PREV_PECE_SIGN",
+        "last_flip_key": "NIFTY_LAST_PECE_FLIP_TS",
+        "stats_key": "NIFTY_OI_STATS",
+        "stats": RollingStats(STATS_WINDOW, STATS_SPAN),
+        "spot_key": "NF_SPOT",
+    },
+    "BANKNIFTY": {
+        "cursor": banknifty_cursor,
+        "enabled_field": "BN_OI_ENGINE_ENABLED",
+        "signal_key": REDIS_KEY_BN,
+        "prev_sign_key": "BANKNIFTY_PREV_PECE_SIGN",
+        "last_flip_key": "BANKNIFTY_LAST_PECE_FLIP_TS",
+        "stats_key": "BANKNIFTY_OI_STATS",
+        "stats": RollingStats(STATS_WINDOW, STATS_SPAN),
+        "spot_key": "BN_SPOT",
+    },
+}
+
+
+def process_pe_ce(redis_client, index_name: str, pe_ce: float, status: str = "NEW",
+                  threshold: float = THRESHOLD, ts: float = None, stamps: dict = None):
+    """Apply the dead zone / sign-flip rules to one PE-CE reading.
+
+    Publishes a NEW signal to the index's signal hash on a crossover and
+    always records the last seen sign outside the dead zone. Every reading
+    also updates the index's rolling stats (EWMA, z-score, slope), published
+    to {INDEX}_OI_STATS and next to each signal. A flip against the last
+    sign needs |PE-CE| >= threshold + HYSTERESIS and MIN_DWELL seconds
+    since the previous crossover; until then the last sign is kept, so a
+    flip that persists still fires.
+
+    Args:
+        redis_client: Redis client instance
+        index_name: NIFTY or BANKNIFTY
+        pe_ce: Latest PE-CE value
+        status: Status written with the signal
+        threshold: Dead zone around zero (in the source's units)
+        ts: Time of the reading (default now)
+        stamps: Latency stamps of the reading (utils/latency.py); "detect" is
+            added on a crossover and the dict is published with the signal
+
+    Returns:
+        str or None: "BULLISH" / "BEARISH" if a crossover signal was generated
+    """
+    cfg = INDEX_CONFIG[index_name]
+    ts = time.time() if ts is None else ts
+
+    # ---- ROLLING STATS (every reading, dead zone included) ----
+    stats = cfg["stats"].update(ts, pe_ce)
+    redis_client.hset(cfg["stats_key"], mapping={**stats, "pe_ce": pe_ce, "ts": ts})
+
+    # ---- THRESHOLD FILTER ----
+    if abs(pe_ce) < threshold:
+        logging.info(
+            "[FILTER] %s PE-CE %.2f inside threshold (%d) → ignoring",
+            index_name, pe_ce, threshold
+        )
+        return None
+
+    current_sign = sign(pe_ce)
+    prev_sign = redis_client.get(cfg["prev_sign_key"])
+
+    logging.info(
+        "[CHECK] %s PE-CE=%.2f | current_sign=%s | prev_sign=%s",
+        index_name, pe_ce, current_sign, prev_sign
+    )
+
+    signal = None
+    if prev_sign is not None:
+        prev_sign = int(prev_sign)
+
+        if current_sign != prev_sign and current_sign != 0:
+            # ---- HYSTERESIS / MIN DWELL (keep the last sign until both pass) ----
+            if abs(pe_ce) < threshold + HYSTERESIS:
+                logging.info(
+                    "[HYSTERESIS] %s PE-CE %.2f short of flip band (%.0f) → holding sign %s",
+                    index_name, pe_ce, threshold + HYSTERESIS, prev_sign
+                )
+                return None
+            last_flip = redis_client.get(cfg["last_flip_key"])
+            if MIN_DWELL and last_flip is not None and ts - float(last_flip) < MIN_DWELL:
+                logging.info(
+                    "[DWELL] %s flip %.0fs after the last one (min %.0fs) → holding sign %s",
+                    index_name, ts - float(last_flip), MIN_DWELL, prev_sign
+                )
+                return None
+
+            signal = "BULLISH" if current_sign == 1 else "BEARISH"
+            redis_client.set(cfg["last_flip_key"], ts)
+            stamps = stamp(stamps, "detect")
+
+            if TEST_MODE:
+                logging.info(
+                    "[TEST MODE] %s SIGNAL → %s (PE-CE=%.2f)",
+                    index_name, signal, pe_ce
+                )
+            else:
+                redis_client.hset(
+                    cfg["signal_key"],
+                    mapping={
+                        "signal": signal,
+                        "pe_ce": pe_ce,
+                        "ts": ts,
+                        "status": status,
+                        "stamps": json.dumps(stamps),
+                        **{k: stats[k] for k in ("ewma", "zscore", "slope", "std")}
+                    }
+                )
+
+                # --- TELEGRAM NOTIFICATION (Best Effort) ---
+                try:
+                    spot = redis_client.get(cfg["spot_key"])
+                    msg = (
+                        f"📊 <b>{index_name} OI Crossover Detected</b>\n\n"
+                        f"Direction : <b>{signal}</b>\n"
+                        f"PE-CE     : <b>{pe_ce}</b>\n"
+                        f"Spot      : <b>{spot}</b>\n\n"
+                        "⏱ Signal generated by OI engine"
+                    )
+                    send_telegram(msg)
+                    logging.info("Telegram notification sent")
+                except Exception as tg_err:
+                    logging.error(f"Telegram notification failed: {tg_err}")
+
+    # always update last seen sign
+    redis_client.set(cfg["prev_sign_key"], current_sign)
+    return signal
+
+
+class IndexPoller(threading.Thread):
+    """Polls one index on its own schedule; failures only delay this index.
+
+    After an error the next poll waits interval * 2^failures (capped at
+    MAX_BACKOFF); the first success resets it. With on_signal set, every
+    crossover is also handed to on_signal(index_name, signal_data) and the
+    signal hash is written with PIPELINE_STATUS instead of NEW. `source`
+    is anything with fetch() -> PE-CE or None (default: the QuestDB cursor).
+    With shadow_sets ({name: overrides}, oi_shadow.py) every reading is
+    also evaluated for those parameter sets once the live path is done.
+    """
+
+    def __init__(self, redis_client, index_name: str, interval: float = CHECK_INTERVAL,
+                 uid: str = UID, on_signal=None, source=None, shadow_sets=None):
+        super().__init__(name=f"oi-{index_name.lower()}", daemon=True)
+        self.redis_client = redis_client
+        self.index_name = index_name
+        self.cfg = INDEX_CONFIG[index_name]
+        self.source = source if source is not None else self.cfg["cursor"]
+        self.threshold = getattr(self.source, "threshold", THRESHOLD)
+        self.interval = max(float(interval), getattr(self.source, "min_interval", MIN_INTERVAL))
+        self.uid = uid
+        self.on_signal = on_signal
+        self.failures = 0
+        self.shadow = ShadowEvaluator(redis_client, index_name, shadow_sets, {
+            "threshold": self.threshold, "hysteresis": HYSTERESIS, "dwell": MIN_DWELL,
+        }) if shadow_sets else None
+
+    def poll_once(self):
+        if self.redis_client.hget(self.uid, self.cfg["enabled_field"]) != "ON":
+            return None
+        pe_ce = self.source.fetch()
+        if pe_ce is None:
+            return None
+
+        row_ts = getattr(self.source, "last_row_ts", None)
+        stamps = stamp(None, "row", wall=row_ts) if row_ts else {}
+        ts = time.time()
+
+        if self.on_signal is None:
+            signal = process_pe_ce(self.redis_client, self.index_name, pe_ce,
+                                   threshold=self.threshold, ts=ts, stamps=stamps)
+        else:
+            signal = process_pe_ce(self.redis_client, self.index_name, pe_ce,
+                                   status=PIPELINE_STATUS, threshold=self.threshold, ts=ts, stamps=stamps)
+            if signal is not None and not TEST_MODE:
+                stats = self.cfg["stats"].last
+                self.on_signal(self.index_name, {
+                    "signal": signal, "pe_ce": pe_ce, "ts": time.time(), "status": PIPELINE_STATUS,
+                    "stamps": stamps,
+                    **{k: stats[k] for k in ("ewma", "zscore", "slope", "std")},
+                })
+
+        # ---- SHADOW SETS (after the live signal is out; never fails the poll) ----
+        if self.shadow is not None:
+            try:
+                self.shadow.update(ts, pe_ce)
+            except Exception:
+                logging.exception("[%s] Shadow evaluation failed", self.index_name)
+        return signal
+
+    def run(self):
+        logging.info("[%s] OI poller started (every %.1fs)", self.index_name, self.interval)
+        while True:
+            started = time.monotonic()
+            try:
+                self.poll_once()
+                self.failures = 0
+                delay = self.interval
+            except Exception:
+                self.failures += 1
+                delay = min(self.interval * 2 ** self.failures, MAX_BACKOFF)
+                logging.exception(
+                    "[%s] OI poll failed (%d in a row), retrying in %.1fs",
+                    self.index_name, self.failures, delay
+                )
+            time.sleep(max(0.0, delay - (time.monotonic() - started)))
+
+
+def parse_intervals(values):
+    """Parse repeated INDEX=SECONDS options into {index: seconds}."""
+    intervals = {}
+    for value in values or []:
+        index, _, seconds = value.partition("=")
+        index = index.strip().upper()
+        if index not in INDEX_CONFIG:
+            raise ValueError(f"Unknown index {index!r}; expected one of {list(INDEX_CONFIG)}")
+        intervals[index] = float(seconds)
+    return intervals
+
+
 def main():
+    parser = argparse.ArgumentParser(description="OI crossover signal engine")
+    parser.add_argument("--interval", action="append", metavar="INDEX=SECONDS",
+                        help=f"Poll interval per index (default {CHECK_INTERVAL}s, min {MIN_INTERVAL}s), repeatable")
+    parser.add_argument("--source", choices=("questdb", "chain"), default="questdb",
+                        help="PE-CE from the QuestDB spike table or computed from the streamed chain OI")
+    parser.add_argument("--bands", default=CHAIN_BANDS,
+                        help="Chain source bands WIDTH:WEIGHTING,... (flat/linear/gaussian); first drives the signal")
+    parser.add_argument("--shadow", action="append", metavar="NAME:KEY=VALUE,...",
+                        help="Shadow parameter set (threshold/hysteresis/dwell/interval/offset), repeatable; "
+                             "default OI_SHADOW_SETS")
+    args = parser.parse_args()
+    intervals = parse_intervals(args.interval)
+    shadow_sets = parse_shadow_sets(args.shadow)
+    reporter = DailyReporter(r) if shadow_sets else None
+
     logging.info("OI Signal Engine started (TEST MODE=%s)", TEST_MODE)
 
+    pollers = {}
     while True:
-        try:
-            # ---- NIFTY ----
-            if r.hget(UID, "OI_ENGINE_ENABLED") == "ON":
-                pe_ce = fetch_latest_pe_ce()
-                if pe_ce is not None:
-                    # ---- THRESHOLD FILTER ----
-                    if abs(pe_ce) < THRESHOLD:
-                        logging.info(
-                            "[FILTER] PE-CE %.2f inside threshold (%d) → ignoring",
-                            pe_ce, THRESHOLD
-                        )
-                    else:
-                        current_sign = sign(pe_ce)
-                        prev_sign = r.get("NIFTY_PREV_PECE_SIGN")
-
-                        logging.info(
-                            "[CHECK] PE-CE=%.2f | current_sign=%s | prev_sign=%s",
-                            pe_ce, current_sign, prev_sign
-                        )
-
-                        if prev_sign is not None:
-                            prev_sign = int(prev_sign)
-
-                            if current_sign != prev_sign and current_sign != 0:
-                                signal = "BULLISH" if current_sign == 1 else "BEARISH"
-
-                                if TEST_MODE:
-                                    logging.info(
-                                        "[TEST MODE] SIGNAL → %s (PE-CE=%.2f)",
-                                        signal, pe_ce
-                                    )
-                                else:
-                                    r.hset(
-                                        REDIS_KEY,
-                                        mapping={
-                                            "signal": signal,
-                                            "pe_ce": pe_ce,
-                                            "ts": time.time(),
-                                            "status": "NEW"
-                                        }
-                                    )
-
-                                    # --- TELEGRAM NOTIFICATION (Best Effort) ---
-                                    try:
-                                        spot = r.get("NF_SPOT")
-                                        msg = (
-                                            "📊 <b>NIFTY OI Crossover Detected</b>\n\n"
-                                            f"Direction : <b>{signal}</b>\n"
-                                            f"PE-CE     : <b>{pe_ce}</b>\n"
-                                            f"NIFTY Spot: <b>{spot}</b>\n\n"
-                                            "⏱ Signal generated by OI engine"
-                                        )
-                                        send_telegram(msg)
-                                        logging.info("Telegram notification sent")
-                                    except Exception as tg_err:
-                                        logging.error(f"Telegram notification failed: {tg_err}")
-
-                        # always update last seen sign
-                        r.set("NIFTY_PREV_PECE_SIGN", current_sign)
-
-        except Exception as e:
-            logging.exception("Engine error")
-
-        time.sleep(CHECK_INTERVAL)
-
-        # -------------------------------
-        # BANKNIFTY OI SIGNAL
-        # -------------------------------
-        if r.hget(UID, "BN_OI_ENGINE_ENABLED") == "ON":
-            pe_ce_bn = fetch_latest_pe_ce_banknifty()
-            if pe_ce_bn is None:
-                pass
-
-            elif abs(pe_ce_bn) < THRESHOLD:
-                pass
-            else: 
-                current_sign_bn = sign(pe_ce_bn)
-                prev_sign_bn = r.get("BANKNIFTY_PREV_PECE_SIGN")
-
-                if prev_sign_bn is not None:
-                    prev_sign_bn = int(prev_sign_bn)
-
-                    if current_sign_bn != prev_sign_bn and current_sign_bn != 0:
-                        signal_bn = "BULLISH" if current_sign_bn == 1 else "BEARISH"
-
-                        if not TEST_MODE:
-                            r.hset(
-                                REDIS_KEY_BN,
-                                mapping={
-                                    "signal": signal_bn,
-                                    "pe_ce": pe_ce_bn,
-                                    "ts": time.time(),
-                                    "status": "NEW"
-                                }
-                            )
-
-                            try:
-                                spot = r.get("BN_SPOT")
-                                msg = (
-                                    "📊 <b>BANKNIFTY OI Crossover Detected</b>\n\n"
-                                    f"Direction : <b>{signal_bn}</b>\n"
-                                    f"PE-CE     : <b>{pe_ce_bn}</b>\n"
-                                    f"Spot      : <b>{spot}</b>"
-                                )
-                                send_telegram(msg)
-                            except Exception:
-                                pass
-
-                r.set("BANKNIFTY_PREV_PECE_SIGN", current_sign_bn)
+        # Each index runs in its own thread; restart any that died
+        for index_name in INDEX_CONFIG:
+            poller = pollers.get(index_name)
+            if poller is None or not poller.is_alive():
+                if poller is not None:
+                    logging.error("[%s] OI poller stopped; restarting", index_name)
+                poller = IndexPoller(
+                    r, index_name, intervals.get(index_name, CHECK_INTERVAL),
+                    source=make_source(r, index_name, args.source, args.bands),
+                    shadow_sets=shadow_sets
+                )
+                poller.start()
+                pollers[index_name] = poller
+        if reporter is not None:
+            reporter.poll()
+        time.sleep(5)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""Single-process OI crossover pipeline: signal → strike → order.
+
+Runs what nifty_oi_trade_engine.py, nifty_oi_order_engine.py and the
+agent's OI crossover handling do across three processes, but in one:
+
+    IndexPoller (per index) --signals--> selector --orders--> submitter
+                                                               (OrderService)
+
+Stages hand over through in-memory queues, so an order is sent as soon as
+the crossover is detected instead of waiting out the order engine's and the
+agent's Redis polls. The Redis keys are still written (signal hash, last
+signal / order, STATUS_* / MSG_* fields) for the UI and the audit trail,
+but nothing waits on them: signals are written with status PIPELINE and the
+order field never carries "requested", so a standalone order engine or
+agent running alongside does not pick them up a second time.
+
+Run this instead of nifty_oi_trade_engine.py + nifty_oi_order_engine.py;
+the agent (impl.py) keeps handling every other order type.
+
+Usage:
+    python oi_pipeline.py <UID>
+    python oi_pipeline.py <UID> --interval NIFTY=5 --interval BANKNIFTY=10
+    python oi_pipeline.py <UID> --source chain --bands 10:flat,5:linear --interval NIFTY=0.5
+    python oi_pipeline.py <UID> --shadow wide:threshold=3000 --shadow far:offset=200
+"""
+import argparse
+import logging
+import queue
+import threading
+import time
+
+from core.config import load_config
+from core.auth import AuthService
+from oi_shadow import DailyReporter, parse_shadow_sets
+from services.depth_service import DepthService
+from services.order_service import OrderService
+from utils.contract_meta import get_contract_metadata
+from utils.logging_config import setup_logging
+from utils.redis_helper import get_redis_client
+
+import nifty_oi_order_engine as order_engine
+import nifty_oi_trade_engine as trade_engine
+
+# OrderService entry point per index
+SUBMIT_METHODS = {
+    "NIFTY": "process_oi_crossover_order",
+    "BANKNIFTY": "process_bn_oi_crossover_order",
+}
+
+# Pipeline health hash (state, per-stage counters, last latencies)
+REDIS_KEY_STATUS = "OI_PIPELINE_STATUS"
+
+
+class OiPipeline:
+    """Pollers, strike selection and order submission connected by queues."""
+
+    def __init__(self, redis_client, uid, auth_service, order_service, intervals=None,
+                 source="questdb", bands=trade_engine.CHAIN_BANDS, shadow_sets=None):
+        """Initialize pipeline.
+
+        Args:
+            redis_client: Redis client instance
+            uid: User ID whose engine flags / order fields are used
+            auth_service: NeoAuthService instance (session for order placement)
+            order_service: OrderService placing the orders
+            intervals: Optional {index: poll seconds}
+            source: PE-CE source, "questdb" or "chain" (see nifty_oi_trade_engine)
+            bands: Chain source bands
+            shadow_sets: Optional {name: overrides} evaluated alongside (oi_shadow.py)
+        """
+        self.redis_client = redis_client
+        self.uid = uid
+        self.auth_service = auth_service
+        self.order_service = order_service
+        self.intervals = intervals or {}
+        self.source = source
+        self.bands = bands
+        self.shadow_sets = shadow_sets or {}
+        self.reporter = DailyReporter(redis_client) if self.shadow_sets else None
+
+        self.signals = queue.Queue()    # (index, signal_data, detected_at)
+        self.orders = queue.Queue()     # (index, order_payload, detected_at, selected_at)
+        self.pollers = {}
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    def _on_signal(self, index_name, signal_data):
+        """Poller callback: hand the crossover to the selector."""
+        self.signals.put((index_name, signal_data, time.monotonic()))
+
+    def _select_loop(self):
+        while True:
+            index_name, signal_data, detected_at = self.signals.get()
+            try:
+                payload = order_engine.process_signal(
+                    self.redis_client, self.uid, index_name,
+                    signal_data=signal_data, request_order=False
+                )
+                if payload is not None:
+                    self.orders.put((index_name, payload, detected_at, time.monotonic()))
+            except Exception:
+                logging.exception("[OI PIPELINE] %s strike selection failed", index_name)
+                self.redis_client.hset(self.uid, order_engine.ENGINE_CONFIG[index_name]["status_field"], "ERROR")
+
+    def _ensure_client(self):
+        """Refresh the order client from the auth service (login if needed)."""
+        if not self.auth_service.is_ready():
+            if not self.auth_service.login() or not self.auth_service.validate():
+                return False
+        self.order_service.client = self.auth_service.client
+        return True
+
+    def _submit_loop(self):
+        while True:
+            index_name, payload, detected_at, selected_at = self.orders.get()
+            try:
+                if not self._ensure_client():
+                    raise RuntimeError("Neo session not available")
+                getattr(self.order_service, SUBMIT_METHODS[index_name])(leg=payload)
+            except Exception as e:
+                logging.exception("[OI PIPELINE] %s order submission failed", index_name)
+                cfg = order_engine.ENGINE_CONFIG[index_name]
+                self.redis_client.hset(self.uid, mapping={
+                    cfg["place_field"]: "fetched",
+                    cfg["order_status_field"]: "FAILED",
+                    cfg["msg_field"]: str(e),
+                })
+                continue
+
+            done_at = time.monotonic()
+            logging.info(
+                "[OI PIPELINE] %s signal→order %.0f ms (select %.0f ms, submit %.0f ms)",
+                index_name, (done_at - detected_at) * 1000,
+                (selected_at - detected_at) * 1000, (done_at - selected_at) * 1000
+            )
+            self.redis_client.hset(REDIS_KEY_STATUS, mapping={
+                f"{index_name}_last_order_ts": time.time(),
+                f"{index_name}_last_latency_ms": round((done_at - detected_at) * 1000, 1),
+            })
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def _ensure_pollers(self):
+        """Start a poller per index; restart any that died."""
+        for index_name in trade_engine.INDEX_CONFIG:
+            poller = self.pollers.get(index_name)
+            if poller is None or not poller.is_alive():
+                if poller is not None:
+                    logging.error("[%s] OI poller stopped; restarting", index_name)
+                poller = trade_engine.IndexPoller(
+                    self.redis_client, index_name,
+                    self.intervals.get(index_name, trade_engine.CHECK_INTERVAL),
+                    uid=self.uid, on_signal=self._on_signal,
+                    source=trade_engine.make_source(self.redis_client, index_name, self.source, self.bands),
+                    shadow_sets=self.shadow_sets
+                )
+                poller.start()
+                self.pollers[index_name] = poller
+
+    def run_forever(self):
+        threading.Thread(target=self._select_loop, name="oi-select", daemon=True).start()
+        threading.Thread(target=self._submit_loop, name="oi-submit", daemon=True).start()
+
+        self.redis_client.hset(REDIS_KEY_STATUS, mapping={"state": "RUNNING", "started_at": time.time()})
+        logging.info("[OI PIPELINE] Started for UID %s (TEST MODE=%s)", self.uid, trade_engine.TEST_MODE)
+        try:
+            while True:
+                self._ensure_pollers()
+                self.redis_client.hset(REDIS_KEY_STATUS, mapping={
+                    "heartbeat_ts": time.time(),
+                    "signals_queued": self.signals.qsize(),
+                    "orders_queued": self.orders.qsize(),
+                })
+                if self.reporter is not None:
+                    self.reporter.poll()
+                time.sleep(5)
+        finally:
+            self.redis_client.hset(REDIS_KEY_STATUS, "state", "STOPPED")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-process OI crossover signal → order pipeline")
+    parser.add_argument("uid", help="User ID whose Neo session and engine flags are used")
+    parser.add_argument("--interval", action="append", metavar="INDEX=SECONDS",
+                        help=f"Poll interval per index (default {trade_engine.CHECK_INTERVAL}s), repeatable")
+    parser.add_argument("--source", choices=("questdb", "chain"), default="questdb",
+                        help="PE-CE from the QuestDB spike table or computed from the streamed chain OI")
+    parser.add_argument("--bands", default=trade_engine.CHAIN_BANDS,
+                        help="Chain source bands WIDTH:WEIGHTING,...; first drives the signal")
+    parser.add_argument("--shadow", action="append", metavar="NAME:KEY=VALUE,...",
+                        help="Shadow parameter set evaluated without orders (see oi_shadow.py), repeatable")
+    args = parser.parse_args()
+
+    setup_logging()
+    intervals = trade_engine.parse_intervals(args.interval)
+    redis_client = get_redis_client()
+
+    config = load_config(args.uid)
+    auth_service = AuthService(config, redis_client, args.uid)
+    if auth_service.login():
+        auth_service.validate()
+
+    depth_service = DepthService(auth_service, redis_client, args.uid) if config.get("depth_pricing") else None
+    order_service = OrderService(auth_service.client, redis_client, args.uid, depth_service=depth_service)
+
+    # Load contract metadata + index up front so the first signal doesn't pay for it
+    get_contract_metadata(redis_client)
+
+    OiPipeline(redis_client, args.uid, auth_service, order_service, intervals,
+              source=args.source, bands=args.bands, shadow_sets=parse_shadow_sets(args.shadow)).run_forever()
+
+
+if __name__ == "__main__":
+    main()
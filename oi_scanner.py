@@ -0,0 +1,290 @@
+"""OI crossover scanner across a universe of F&O underlyings.
+
+Evaluates the signal engine's crossover rules (dead zone, sign flip,
+hysteresis, minimum dwell; see nifty_oi_trade_engine.process_pe_ce) for
+every name in a configurable universe, once per cycle:
+
+    1. The universe is split into shards of --batch names; a process pool
+       fetches each shard's newest PE-CE, either with one batched QuestDB
+       query (LATEST ON ... PARTITION BY symbol, newer than the oldest
+       per-name cursor of the shard) or from the local shared-memory option
+       chains. Rows a name has already seen are dropped by its own cursor.
+    2. The parent applies the crossover rules to all names at once as
+       array operations (market_data/crossover.py) against per-name sign /
+       flip state.
+    3. State and signals go to Redis in one pipeline: OI_SCAN_SIGNAL:{NAME}
+       per underlying (same fields as NIFTY_OI_SIGNAL), the OI_SCAN_SIGNALS
+       summary hash and a message on the OI_SCAN channel.
+
+The scanner only publishes signals; orders stay with the NIFTY / BANKNIFTY
+engines.
+
+The universe file is a JSON list of underlyings or a {name: threshold}
+object; without one the underlyings of the instrument master are scanned.
+Thresholds are in the source's units: names without one get THRESHOLD for
+QuestDB and the chain source's dead zone (OI_CHAIN_THRESHOLD, lots) for
+--source chain.
+
+Usage:
+    python oi_scanner.py --universe fno_universe.json
+    python oi_scanner.py --universe fno_universe.json --table FnoOISpike --batch 50 --workers 4
+    python oi_scanner.py --source chain --interval 5
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from nifty_oi_trade_engine import (
+    CHAIN_BANDS, CHECK_INTERVAL, HYSTERESIS, MIN_DWELL, QUERY_TIMEOUT, THRESHOLD, ChainPeCeSource,
+)
+from market_data.crossover import scan_step
+from utils.contract_index import get_contract_index
+from utils.questdb import get_questdb, quote_ident
+from utils.redis_helper import get_redis_client
+
+# One table holding every underlying's PE-CE rows
+SCAN_TABLE = os.environ.get("OI_SCAN_TABLE", "FnoOISpike")
+SYMBOL_COLUMN = os.environ.get("OI_SCAN_SYMBOL_COLUMN", "underlying")
+PE_CE_COLUMN = os.environ.get("OI_SCAN_PE_CE_COLUMN", "pe_ce")
+
+DEFAULT_BATCH = 50
+
+REDIS_KEY_PREV_SIGN = "OI_SCAN_PREV_SIGN"     # name -> last sign outside the dead zone
+REDIS_KEY_LAST_FLIP = "OI_SCAN_LAST_FLIP"     # name -> ts of the last crossover
+REDIS_KEY_SIGNALS = "OI_SCAN_SIGNALS"         # name -> JSON of the latest signal
+REDIS_KEY_STATUS = "OI_SCANNER_STATUS"
+REDIS_CHANNEL = "OI_SCAN"
+
+
+def signal_key(name: str) -> str:
+    return f"OI_SCAN_SIGNAL:{name}"
+
+
+def load_universe(path=None, redis_client=None, threshold: float = THRESHOLD) -> Dict[str, float]:
+    """{name: dead-zone threshold} from a universe file, else the instrument master.
+
+    `threshold` is the default for names the file gives none (in the source's units).
+    """
+    if path:
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return {str(k).upper(): float(v) for k, v in data.items()}
+        return {str(name).upper(): float(threshold) for name in data}
+    return {name: float(threshold) for name in get_contract_index(redis_client).underlyings()}
+
+
+# ----------------------------------------------------------------------
+# Shard fetchers (run in pool workers)
+# ----------------------------------------------------------------------
+_chain_sources: Dict[str, ChainPeCeSource] = {}
+_redis = None
+
+
+def _init_worker():
+    global _redis
+    _redis = get_redis_client()
+
+
+def fetch_questdb_shard(names: List[str], cursor, table: str = SCAN_TABLE,
+                        symbol_column: str = SYMBOL_COLUMN, pe_ce_column: str = PE_CE_COLUMN):
+    """Newest PE-CE per name newer than `cursor` (ISO ts or None), in one query.
+
+    Returns:
+        Tuple (names, values, row_ts epoch seconds, row ts as datetime64[us])
+    """
+    sql = (f"select ts, {quote_ident(symbol_column)} sym, {quote_ident(pe_ce_column)} pe_ce "
+           f"from {table} where {quote_ident(symbol_column)} in :names")
+    if cursor is not None:
+        sql += " and ts > :cursor"
+    sql += f" latest on ts partition by {quote_ident(symbol_column)}"
+    res = get_questdb().query(sql, {"names": names, "cursor": cursor}, timeout=QUERY_TIMEOUT)
+    if res.empty:
+        return [], np.empty(0), np.empty(0), np.empty(0, dtype="datetime64[us]")
+
+    ts = res.column("ts").astype("datetime64[us]")
+    values = res.column("pe_ce").astype(np.float64)
+    row_ts = ts.astype(np.int64) / 1e6
+    return [str(s).upper() for s in res.column("sym")], values, row_ts, ts
+
+
+def fetch_chain_shard(names: List[str], bands: str = CHAIN_BANDS):
+    """Primary-band PE-CE per name from the local option chains (NaN if unchanged / not streamed)."""
+    values = np.full(len(names), np.nan)
+    row_ts = np.full(len(names), np.nan)
+    for i, name in enumerate(names):
+        source = _chain_sources.get(name)
+        if source is None:
+            source = _chain_sources[name] = ChainPeCeSource(_redis, name, bands)
+        try:
+            value = source.fetch()
+        except RuntimeError:
+            _chain_sources.pop(name, None)
+            continue
+        if value is not None:
+            values[i] = value
+            row_ts[i] = source.last_row_ts or np.nan
+    return names, values, row_ts, None
+
+
+# ----------------------------------------------------------------------
+# Scanner
+# ----------------------------------------------------------------------
+class OiScanner:
+    """Per-cycle fetch (process pool) + vectorized crossover evaluation."""
+
+    def __init__(self, redis_client, universe: Dict[str, float], source: str = "questdb",
+                 batch: int = DEFAULT_BATCH, workers=None, bands: str = CHAIN_BANDS, table: str = SCAN_TABLE):
+        """Initialize scanner.
+
+        Args:
+            redis_client: Redis client instance
+            universe: {name: dead-zone threshold}
+            source: "questdb" (batched queries on SCAN_TABLE) or "chain" (local chains)
+            batch: Names per shard / query
+            workers: Process pool size (default: CPU count)
+            bands: Chain source bands
+            table: QuestDB table with every underlying's PE-CE
+        """
+        self.redis_client = redis_client
+        self.source = source
+        self.bands = bands
+        self.table = table
+        self.names = sorted(universe)
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self.thresholds = np.array([universe[name] for name in self.names], dtype=np.float64)
+        self.shards = [self.names[i:i + batch] for i in range(0, len(self.names), max(batch, 1))]
+        # Newest QuestDB row ts seen per name (NaT: none yet)
+        self.cursors = np.full(len(self.names), np.datetime64("NaT"), dtype="datetime64[us]")
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+        prev = redis_client.hgetall(REDIS_KEY_PREV_SIGN)
+        flips = redis_client.hgetall(REDIS_KEY_LAST_FLIP)
+        self.prev_sign = np.array([int(prev.get(name, 0)) for name in self.names], dtype=np.float64)
+        self.last_flip = np.array([float(flips.get(name, "nan")) for name in self.names])
+
+    def _submit(self, i, shard):
+        if self.source == "chain":
+            return self.pool.submit(fetch_chain_shard, shard, self.bands)
+        cursors = self.cursors[[self.position[name] for name in shard]]
+        cursor = None if np.isnat(cursors).any() else np.datetime_as_string(cursors.min()) + "Z"
+        return self.pool.submit(fetch_questdb_shard, shard, cursor, self.table)
+
+    def fetch(self):
+        """(values, row_ts) for the whole universe; NaN where nothing is new."""
+        values = np.full(len(self.names), np.nan)
+        row_ts = np.full(len(self.names), np.nan)
+        futures = [self._submit(i, shard) for i, shard in enumerate(self.shards)]
+        for i, future in enumerate(futures):
+            try:
+                names, shard_values, shard_ts, stamps = future.result()
+            except Exception:
+                logging.exception("[OI SCAN] Shard %d (%s..) failed", i, self.shards[i][0])
+                continue
+            pos = np.array([self.position[name] for name in names if name in self.position], dtype=np.int64)
+            keep = np.array([j for j, name in enumerate(names) if name in self.position], dtype=np.int64)
+            if stamps is not None:
+                # The query starts at the shard's oldest cursor; drop rows a name already had
+                stamps = np.asarray(stamps)[keep]
+                new = np.isnat(self.cursors[pos]) | (stamps > self.cursors[pos])
+                pos, keep = pos[new], keep[new]
+                self.cursors[pos] = stamps[new]
+            values[pos] = np.asarray(shard_values)[keep]
+            row_ts[pos] = np.asarray(shard_ts)[keep]
+        return values, row_ts
+
+    def cycle(self) -> int:
+        """One scan of the universe; returns the number of signals published."""
+        started = time.monotonic()
+        values, row_ts = self.fetch()
+        fetched = time.monotonic()
+
+        now = time.time()
+        prev_before = self.prev_sign
+        flip, self.prev_sign, self.last_flip = scan_step(
+            values, self.prev_sign, self.last_flip, self.thresholds, now, HYSTERESIS, MIN_DWELL
+        )
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        changed = np.flatnonzero(self.prev_sign != prev_before)
+        if len(changed):
+            pipe.hset(REDIS_KEY_PREV_SIGN, mapping={self.names[i]: int(self.prev_sign[i]) for i in changed})
+
+        for i in np.flatnonzero(flip):
+            name = self.names[i]
+            signal = {
+                "signal": "BULLISH" if self.prev_sign[i] > 0 else "BEARISH",
+                "pe_ce": float(values[i]),
+                "ts": now,
+                "row_ts": None if np.isnan(row_ts[i]) else float(row_ts[i]),
+                "status": "NEW",
+            }
+            pipe.hset(signal_key(name), mapping={k: ("" if v is None else v) for k, v in signal.items()})
+            pipe.hset(REDIS_KEY_SIGNALS, name, json.dumps(signal))
+            pipe.hset(REDIS_KEY_LAST_FLIP, name, now)
+            pipe.publish(REDIS_CHANNEL, json.dumps({"name": name, **signal}))
+            logging.info("[OI SCAN] %s %s (PE-CE=%.2f)", name, signal["signal"], signal["pe_ce"])
+
+        done = time.monotonic()
+        pipe.hset(REDIS_KEY_STATUS, mapping={
+            "last_cycle_ts": now,
+            "names": len(self.names),
+            "updated": int(np.count_nonzero(~np.isnan(values))),
+            "signals": int(flip.sum()),
+            "fetch_ms": round((fetched - started) * 1000, 1),
+            "cycle_ms": round((done - started) * 1000, 1),
+        })
+        pipe.execute()
+        return int(flip.sum())
+
+    def run_forever(self, interval: float = CHECK_INTERVAL):
+        logging.info("[OI SCAN] Scanning %d names in %d shards every %.1fs (%s)",
+                     len(self.names), len(self.shards), interval, self.source)
+        while True:
+            started = time.monotonic()
+            try:
+                self.cycle()
+            except Exception:
+                logging.exception("[OI SCAN] Cycle failed")
+            elapsed = time.monotonic() - started
+            if elapsed > interval:
+                logging.warning("[OI SCAN] Cycle took %.1fs (> %.1fs interval)", elapsed, interval)
+            time.sleep(max(0.0, interval - elapsed))
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OI crossover scanner across F&O underlyings")
+    parser.add_argument("--universe", help="JSON list of underlyings or {name: threshold}")
+    parser.add_argument("--source", choices=("questdb", "chain"), default="questdb")
+    parser.add_argument("--table", default=SCAN_TABLE, help="QuestDB table with every underlying's PE-CE")
+    parser.add_argument("--interval", type=float, default=CHECK_INTERVAL, help="Seconds per scan cycle")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="Names per shard / query")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--bands", default=CHAIN_BANDS, help="Chain source bands (see nifty_oi_trade_engine)")
+    args = parser.parse_args()
+
+    redis_client = get_redis_client()
+    threshold = ChainPeCeSource.threshold if args.source == "chain" else THRESHOLD
+    universe = load_universe(args.universe, redis_client, threshold)
+    if not universe:
+        parser.error("Empty universe")
+
+    scanner = OiScanner(redis_client, universe, source=args.source, batch=args.batch,
+                        workers=args.workers, bands=args.bands, table=args.table)
+    try:
+        scanner.run_forever(args.interval)
+    finally:
+        scanner.close()
+
+
+if __name__ == "__main__":
+    main()
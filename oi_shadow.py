@@ -0,0 +1,352 @@
+"""Shadow-mode OI parameter sets evaluated on the live PE-CE feed.
+
+Each IndexPoller started with shadow sets also hands every PE-CE reading to
+a ShadowEvaluator, which runs the crossover rules for all sets at once
+(market_data/crossover.py) after the live signal has been handled. No
+orders are placed. A set overrides any of:
+
+    threshold    dead zone (in the source's units)
+    hysteresis   extra |PE-CE| beyond the dead zone to flip
+    dwell        seconds after a crossover before the next
+    interval     seconds between readings the set looks at (>= the poll interval)
+    offset       extra points OTM beyond the rounded strike
+
+and takes the live config for the rest. The live config itself runs as the
+set "live", so every set is measured with the same fill model.
+
+A crossover of a set is a hypothetical fill at the current spot: the
+previous position is closed and the new one opened on the strike the order
+engine would pick (plus the set's offset). P&L per unit uses the
+backtester's delta model (replay/backtest.py), so it ranks sets against
+each other rather than predicting rupees. A signal without a fresh spot is
+recorded without a fill and leaves the set flat (its open position is
+dropped unvalued), so position and signal never disagree.
+
+Per reading the cost is a handful of array operations over the sets;
+Redis is only written on a crossover (one pipeline) and once per day to
+record the sets. Fills go to OI_SHADOW_FILLS:{date} and the parameters of
+the sets that ran that day to OI_SHADOW_SETS:{date}. After the close,
+the day's per-set summary and its difference to "live" is written to
+DuckDB (OI_SHADOW_DUCKDB, table OI_SHADOW_TABLE).
+
+Usage:
+    python nifty_oi_trade_engine.py --shadow wide:threshold=3000 --shadow guarded:hysteresis=300,dwell=120
+    OI_SHADOW_SETS="wide:threshold=3000;far:offset=200" python oi_pipeline.py <UID>
+    python oi_shadow.py                     # write today's comparison now
+    python oi_shadow.py --day 2026-10-16 --print
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_data.crossover import scan_step
+from replay.backtest import DEFAULT_DAYS_TO_EXPIRY, DEFAULT_IV, otm_distance, short_delta
+from utils.spot import get_spot
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "NAME:key=value,...;NAME:..." used when no --shadow option is given
+SHADOW_SETS = os.environ.get("OI_SHADOW_SETS", "")
+SHADOW_KEYS = ("threshold", "hysteresis", "dwell", "interval", "offset")
+LIVE_SET = "live"
+
+# Delta model inputs for the hypothetical fills
+SHADOW_IV = float(os.environ.get("OI_SHADOW_IV", str(DEFAULT_IV)))
+SHADOW_DAYS_TO_EXPIRY = float(os.environ.get("OI_SHADOW_DAYS_TO_EXPIRY", str(DEFAULT_DAYS_TO_EXPIRY)))
+
+REDIS_KEY_SETS = "OI_SHADOW_SETS"       # OI_SHADOW_SETS:{YYYY-MM-DD} hash {INDEX}:{set} -> JSON parameters
+REDIS_KEY_FILLS = "OI_SHADOW_FILLS"     # OI_SHADOW_FILLS:{YYYY-MM-DD} list of JSON events
+FILLS_TTL = 14 * 86400                  # also applies to the day's set parameters
+
+# Daily comparison target (a file path, or e.g. "md:trading" for MotherDuck)
+SHADOW_DUCKDB = os.environ.get("OI_SHADOW_DUCKDB", os.path.join(BASE_DIR, "oi_shadow.duckdb"))
+SHADOW_TABLE = os.environ.get("OI_SHADOW_TABLE", "oi_shadow_daily")
+
+IST = timezone(timedelta(hours=5, minutes=30))
+REPORT_AFTER = dt_time(15, 35)  # IST; the day's comparison is written once after this
+
+
+def parse_shadow_sets(values=None) -> Dict[str, Dict[str, float]]:
+    """Parse NAME:key=value,... specs (repeated, or ';'-separated) into {name: overrides}."""
+    specs = list(values) if values else [v for v in SHADOW_SETS.split(";") if v.strip()]
+    sets = {}
+    for spec in specs:
+        name, _, body = spec.partition(":")
+        name = name.strip()
+        if not name or name == LIVE_SET:
+            raise ValueError(f"Invalid shadow set name {name!r}")
+        overrides = {}
+        for item in body.split(","):
+            if not item.strip():
+                continue
+            key, _, value = item.partition("=")
+            key = key.strip().lower()
+            if key not in SHADOW_KEYS:
+                raise ValueError(f"Unknown shadow parameter {key!r}; expected one of {list(SHADOW_KEYS)}")
+            overrides[key] = float(value)
+        sets[name] = overrides
+    return sets
+
+
+def fills_key(day: str) -> str:
+    return f"{REDIS_KEY_FILLS}:{day}"
+
+
+def sets_key(day: str) -> str:
+    return f"{REDIS_KEY_SETS}:{day}"
+
+
+def ist_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, IST).date().isoformat()
+
+
+class ShadowEvaluator:
+    """Crossover state and hypothetical positions of every shadow set of one index."""
+
+    def __init__(self, redis_client, index_name: str, sets: Dict[str, Dict[str, float]], live: Dict[str, float]):
+        """Initialize evaluator.
+
+        Args:
+            redis_client: Redis client instance
+            index_name: NIFTY or BANKNIFTY
+            sets: {name: overrides} from parse_shadow_sets
+            live: The live threshold / hysteresis / dwell (interval and offset default to 0)
+        """
+        self.redis_client = redis_client
+        self.index_name = index_name
+        base = {"interval": 0.0, "offset": 0.0, **live}
+        self.params = {LIVE_SET: base, **{name: {**base, **overrides} for name, overrides in sets.items()}}
+        self.names = list(self.params)
+
+        def column(key):
+            return np.array([float(self.params[name][key]) for name in self.names])
+
+        self.threshold = column("threshold")
+        self.hysteresis = column("hysteresis")
+        self.dwell = column("dwell")
+        self.interval = column("interval")
+        self.offset = column("offset")
+
+        n = len(self.names)
+        self.prev_sign = np.zeros(n)
+        self.last_flip = np.full(n, np.nan)
+        self.last_eval = np.full(n, np.nan)
+        self.position = np.zeros(n)             # +1 short PE, -1 short CE, 0 flat
+        self.entry_spot = np.full(n, np.nan)
+        self.entry_delta = np.full(n, np.nan)
+        self.day_end = None                     # end of the day the sets were last recorded for
+
+    def _record_sets(self, ts: float) -> None:
+        """Record the sets' parameters under the IST day of `ts`."""
+        day = datetime.fromtimestamp(ts, IST).date()
+        key = sets_key(day.isoformat())
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            f"{self.index_name}:{name}": json.dumps(params) for name, params in self.params.items()
+        })
+        pipe.expire(key, FILLS_TTL)
+        pipe.execute()
+        self.day_end = datetime.combine(day + timedelta(days=1), dt_time(0), IST).timestamp()
+
+    def update(self, ts: float, pe_ce: float) -> int:
+        """Feed one PE-CE reading to every set; returns the number of shadow signals."""
+        if self.day_end is None or ts >= self.day_end:
+            self._record_sets(ts)
+        with np.errstate(invalid="ignore"):
+            due = (self.interval <= 0) | np.isnan(self.last_eval) | (ts - self.last_eval >= self.interval)
+        if not due.any():
+            return 0
+        self.last_eval = np.where(due, ts, self.last_eval)
+        values = np.where(due, pe_ce, np.nan)
+        flip, self.prev_sign, self.last_flip = scan_step(
+            values, self.prev_sign, self.last_flip, self.threshold, ts, self.hysteresis, self.dwell
+        )
+        flipped = np.flatnonzero(flip)
+        if len(flipped):
+            self._fill(flipped, ts, pe_ce)
+        return len(flipped)
+
+    def _fill(self, idx: np.ndarray, ts: float, pe_ce: float) -> None:
+        """Close and reopen the hypothetical positions of the sets that flipped."""
+        spot = get_spot(self.redis_client, self.index_name)
+        direction = self.prev_sign[idx]
+        events = [{
+            "index": self.index_name,
+            "set": self.names[i],
+            "ts": ts,
+            "signal": "BULLISH" if d > 0 else "BEARISH",
+            "pe_ce": pe_ce,
+            "spot": spot,
+        } for i, d in zip(idx, direction)]
+
+        if spot is not None:
+            spots = np.full(len(idx), float(spot))
+            distance = otm_distance(spots, direction, self.offset[idx])
+            delta = short_delta(distance, spots, SHADOW_IV, SHADOW_DAYS_TO_EXPIRY)
+            closed = self.position[idx] * (spots - self.entry_spot[idx]) * self.entry_delta[idx]
+            for k, i in enumerate(idx):
+                events[k].update({
+                    "strike": round(float(spot - direction[k] * distance[k]), 2),
+                    "delta": round(float(delta[k]), 4),
+                    "pnl": round(float(closed[k]), 2) if self.position[i] != 0 else None,
+                })
+            self.position[idx] = direction
+            self.entry_spot[idx] = spots
+            self.entry_delta[idx] = delta
+        else:
+            # The signal still moved prev_sign; holding the old side would fight it
+            self.position[idx] = 0
+            self.entry_spot[idx] = np.nan
+            self.entry_delta[idx] = np.nan
+
+        key = fills_key(ist_day(ts))
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.rpush(key, *[json.dumps(e) for e in events])
+        pipe.expire(key, FILLS_TTL)
+        pipe.execute()
+        for e in events:
+            logging.info("[SHADOW] %s %s → %s (PE-CE=%.2f, pnl=%s)",
+                         self.index_name, e["set"], e["signal"], pe_ce, e.get("pnl"))
+
+
+# ----------------------------------------------------------------------
+# Daily comparison
+# ----------------------------------------------------------------------
+def _summary(events: List[dict]) -> dict:
+    pnl = np.array([e["pnl"] for e in events if e.get("pnl") is not None], dtype=np.float64)
+    equity = np.concatenate(([0.0], np.cumsum(pnl)))
+    return {
+        "signals": len(events),
+        "fills": sum(1 for e in events if e.get("spot") is not None),
+        "trades": len(pnl),
+        "wins": int((pnl > 0).sum()),
+        "win_rate": round(float((pnl > 0).mean()), 4) if len(pnl) else None,
+        "pnl": round(float(equity[-1]), 2),
+        "max_drawdown": round(float((np.maximum.accumulate(equity) - equity).max()), 2),
+    }
+
+
+def daily_comparison(redis_client, day: str) -> pd.DataFrame:
+    """One row per index and set for `day`, with P&L and signal count relative to "live"."""
+    events = [json.loads(e) for e in redis_client.lrange(fills_key(day), 0, -1)]
+    if not events:
+        return pd.DataFrame()
+    # Only the sets that ran that day, with the parameters they ran with
+    params = {k: json.loads(v) for k, v in redis_client.hgetall(sets_key(day)).items()}
+
+    by_set: Dict[tuple, List[dict]] = {}
+    for key in params:
+        index_name, _, name = key.partition(":")
+        by_set[(index_name, name)] = []
+    for e in sorted(events, key=lambda e: e["ts"]):
+        by_set.setdefault((e["index"], e["set"]), []).append(e)
+
+    rows = []
+    for (index_name, name), set_events in by_set.items():
+        p = params.get(f"{index_name}:{name}", {})
+        rows.append({
+            "day": day, "index_name": index_name, "set_name": name,
+            **{key: p.get(key) for key in SHADOW_KEYS},
+            **_summary(set_events),
+        })
+    df = pd.DataFrame(rows)
+
+    live = df[df["set_name"] == LIVE_SET].set_index("index_name")
+    df["pnl_vs_live"] = (df["pnl"] - df["index_name"].map(live["pnl"])).round(2)
+    df["signals_vs_live"] = df["signals"] - df["index_name"].map(live["signals"])
+    df["day"] = pd.to_datetime(df["day"]).dt.date
+    return df.sort_values(["index_name", "pnl"], ascending=[True, False]).reset_index(drop=True)
+
+
+def write_daily(redis_client, day: str, database: str = SHADOW_DUCKDB, table: str = SHADOW_TABLE) -> int:
+    """Replace `day`'s rows in the DuckDB comparison table; returns rows written."""
+    df = daily_comparison(redis_client, day)
+    if df.empty:
+        logging.info(f"[SHADOW] No shadow signals on {day}; nothing to write")
+        return 0
+
+    import duckdb
+
+    con = duckdb.connect(database)
+    try:
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                day              DATE,
+                index_name       VARCHAR,
+                set_name         VARCHAR,
+                threshold        DOUBLE,
+                hysteresis       DOUBLE,
+                dwell            DOUBLE,
+                "interval"       DOUBLE,
+                "offset"         DOUBLE,
+                signals          BIGINT,
+                fills            BIGINT,
+                trades           BIGINT,
+                wins             BIGINT,
+                win_rate         DOUBLE,
+                pnl              DOUBLE,
+                max_drawdown     DOUBLE,
+                pnl_vs_live      DOUBLE,
+                signals_vs_live  BIGINT
+            );
+        """)
+        con.execute(f"DELETE FROM {table} WHERE day = ?", [day])
+        con.execute(f"INSERT INTO {table} SELECT * FROM df")
+    finally:
+        con.close()
+    logging.info(f"[SHADOW] Wrote {len(df)} rows for {day} to {table}")
+    return len(df)
+
+
+class DailyReporter:
+    """Writes the day's comparison once after REPORT_AFTER, off the polling threads."""
+
+    def __init__(self, redis_client, database: str = SHADOW_DUCKDB):
+        self.redis_client = redis_client
+        self.database = database
+        self.done_day: Optional[str] = None
+
+    def poll(self) -> None:
+        """Supervisor loop hook: start the write once per day after the close."""
+        now = datetime.now(IST)
+        day = now.date().isoformat()
+        if self.done_day == day or now.time() < REPORT_AFTER:
+            return
+        self.done_day = day
+        threading.Thread(target=self._write, args=(day,), name="oi-shadow-report", daemon=True).start()
+
+    def _write(self, day: str) -> None:
+        try:
+            write_daily(self.redis_client, day, self.database)
+        except Exception:
+            logging.exception("[SHADOW] Daily comparison for %s failed", day)
+
+
+def main():
+    from utils.redis_helper import get_redis_client
+
+    parser = argparse.ArgumentParser(description="Write the shadow parameter sets' daily comparison to DuckDB")
+    parser.add_argument("--day", default=ist_day(time.time()), help="Session date, YYYY-MM-DD (default today)")
+    parser.add_argument("--database", default=SHADOW_DUCKDB, help="DuckDB database (file or md:...)")
+    parser.add_argument("--print", action="store_true", help="Print the comparison instead of writing it")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    redis_client = get_redis_client()
+    if args.print:
+        df = daily_comparison(redis_client, args.day)
+        print(df.to_string(index=False) if not df.empty else f"No shadow signals on {args.day}")
+        return
+    write_daily(redis_client, args.day, args.database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Historical replay: virtual clock, simulated broker and the replay engine."""
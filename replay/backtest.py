@@ -0,0 +1,208 @@
+"""Vectorized OI crossover backtest and parallel parameter sweeps.
+
+Evaluates the live signal rules on a whole PE-CE history at once instead of
+event by event (replay/engine.py does the event-by-event version):
+
+    poll        PE-CE sampled every `interval` seconds (latest row at or
+                before each poll, like the cursor-based poller)
+    dead zone   readings with |PE-CE| < threshold are ignored
+    crossover   sign differs from the last sign seen outside the dead zone
+                (process_pe_ce); BULLISH sells a PE, BEARISH a CE
+    position    held until the next crossover, which exits and reverses
+                (OrderService's exit-first rule); the last one closes at the
+                end of the data
+    strike      100-point OTM rounding (round_otm_strike) plus `offset`
+                points further OTM
+
+There is no option price history, so trade P&L uses a delta model: the
+short option moves by delta * spot move, with delta taken at entry from the
+strike's OTM distance under a flat implied volatility and days to expiry.
+Good for ranking parameter sets against each other, not for absolute P&L.
+
+Usage:
+    data = {"oi_ts": ..., "pe_ce": ..., "spot_ts": ..., "spot": ...}
+    result = backtest(data, threshold=2000, interval=20, offset=0)
+    table = sweep(data, thresholds, intervals, offsets, workers=8)
+"""
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# round_otm_strike rounds to 100 points for both indices
+STRIKE_ROUNDING = 100
+
+DEFAULT_IV = 0.13
+DEFAULT_DAYS_TO_EXPIRY = 3.0
+
+# Series shared with pool workers (set once per worker by the initializer)
+_DATA: Optional[Dict[str, np.ndarray]] = None
+
+
+def sample_series(ts: np.ndarray, values: np.ndarray, interval: float):
+    """Readings a poller with a fixed interval would see, and when it sees them.
+
+    Polls run at ts[0] + k * interval and each takes the latest row at or
+    before it. Row i is seen iff a poll falls in [ts[i], ts[i + 1]), at the
+    first poll at or after ts[i]; computing that per row keeps a year of
+    data (nights included) O(rows) instead of O(polls).
+
+    Args:
+        ts: Row timestamps (epoch seconds, sorted)
+        values: Row values
+        interval: Poll interval in seconds (0 = every row)
+
+    Returns:
+        Tuple (poll_ts, sampled) arrays of the rows seen
+    """
+    if interval <= 0 or len(ts) == 0:
+        return ts, values
+    poll_ts = ts[0] + np.ceil((ts - ts[0]) / interval) * interval
+    seen = np.append(poll_ts[:-1] < ts[1:], True)
+    return poll_ts[seen], values[seen]
+
+
+def crossovers(values: np.ndarray, threshold: float):
+    """Positions and directions (+1 BULLISH / -1 BEARISH) of sign flips outside the dead zone."""
+    outside = np.flatnonzero((np.abs(values) >= threshold) & (values != 0))
+    signs = np.sign(values[outside])
+    flips = np.flatnonzero(signs[1:] != signs[:-1]) + 1
+    return outside[flips], signs[flips].astype(np.int8)
+
+
+def otm_distance(spot: np.ndarray, direction: np.ndarray, offset: float) -> np.ndarray:
+    """Points between spot and the sold strike (PE below on BULLISH, CE above on BEARISH)."""
+    below = spot - (np.floor(spot / STRIKE_ROUNDING) * STRIKE_ROUNDING - offset)
+    above = (np.ceil(spot / STRIKE_ROUNDING) * STRIKE_ROUNDING + offset) - spot
+    return np.where(direction > 0, below, above)
+
+
+def short_delta(distance: np.ndarray, spot: np.ndarray, iv: float = DEFAULT_IV,
+                days: float = DEFAULT_DAYS_TO_EXPIRY) -> np.ndarray:
+    """Absolute delta of an option `distance` points OTM (flat-vol normal approximation)."""
+    sigma = spot * iv * math.sqrt(max(days, 1e-6) / 365.0)
+    z = distance / sigma / math.sqrt(2.0)
+    return 0.5 * np.array([math.erfc(v) for v in z.ravel()]).reshape(z.shape)
+
+
+def _spot_at(data: Dict[str, np.ndarray], ts: np.ndarray) -> np.ndarray:
+    pos = np.searchsorted(data["spot_ts"], ts, side="right") - 1
+    return data["spot"][np.clip(pos, 0, len(data["spot"]) - 1)]
+
+
+def _metrics(pnl: np.ndarray) -> dict:
+    equity = np.concatenate(([0.0], np.cumsum(pnl)))
+    drawdown = np.maximum.accumulate(equity) - equity
+    n = len(pnl)
+    return {
+        "trades": n,
+        "wins": int((pnl > 0).sum()),
+        "win_rate": round(float((pnl > 0).mean()), 4) if n else None,
+        "pnl": round(float(equity[-1]), 2),
+        "avg_trade": round(float(pnl.mean()), 2) if n else None,
+        "max_drawdown": round(float(drawdown.max()), 2),
+    }
+
+
+def _evaluate(data, poll_ts, sampled, threshold, offsets, qty, cost, iv, days):
+    """Metrics for one (interval, threshold) and every offset, plus the trades."""
+    pos, direction = crossovers(sampled, threshold)
+    if len(pos) == 0:
+        return [dict(_metrics(np.empty(0)), offset=o) for o in offsets], pos, direction, None
+
+    entry_ts = poll_ts[pos]
+    exit_ts = np.append(entry_ts[1:], poll_ts[-1])
+    entry_spot = _spot_at(data, entry_ts)
+    move = direction * (_spot_at(data, exit_ts) - entry_spot)
+
+    # (n_offsets, n_trades) in one pass
+    offsets_arr = np.asarray(offsets, dtype=np.float64)[:, None]
+    delta = short_delta(otm_distance(entry_spot[None, :], direction[None, :], offsets_arr),
+                        entry_spot[None, :], iv, days)
+    pnl = move[None, :] * delta * qty - cost
+    return [dict(_metrics(row), offset=o) for o, row in zip(offsets, pnl)], pos, direction, pnl
+
+
+def backtest(data: Dict[str, np.ndarray], threshold: float, interval: float, offset: float = 0.0,
+             qty: int = 1, cost: float = 0.0, iv: float = DEFAULT_IV,
+             days: float = DEFAULT_DAYS_TO_EXPIRY) -> dict:
+    """One parameter set, with the trade list.
+
+    Args:
+        data: {"oi_ts", "pe_ce", "spot_ts", "spot"} arrays sorted by ts
+        threshold: PE-CE dead zone
+        interval: Poll interval in seconds (0 = every row)
+        offset: Extra points OTM beyond the rounded strike
+        qty: Contract quantity per trade
+        cost: Round-trip cost per trade (rupees)
+        iv, days: Delta model inputs
+
+    Returns:
+        dict: metrics plus "trades" (entry/exit ts, direction, entry/exit spot, pnl)
+    """
+    poll_ts, sampled = sample_series(data["oi_ts"], data["pe_ce"], interval)
+    rows, pos, direction, pnl = _evaluate(data, poll_ts, sampled, threshold, [offset], qty, cost, iv, days)
+    result = dict(rows[0], threshold=threshold, interval=interval)
+
+    trades = []
+    if pnl is not None:
+        entry_ts = poll_ts[pos]
+        exit_ts = np.append(entry_ts[1:], poll_ts[-1])
+        entry_spot, exit_spot = _spot_at(data, entry_ts), _spot_at(data, exit_ts)
+        for i in range(len(pos)):
+            trades.append({
+                "entry_ts": float(entry_ts[i]),
+                "exit_ts": float(exit_ts[i]),
+                "direction": "BULLISH" if direction[i] > 0 else "BEARISH",
+                "entry_spot": float(entry_spot[i]),
+                "exit_spot": float(exit_spot[i]),
+                "pnl": round(float(pnl[0, i]), 2),
+            })
+    result["trades"] = trades
+    return result
+
+
+# ----------------------------------------------------------------------
+# Sweeps
+# ----------------------------------------------------------------------
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _sweep_interval(interval, thresholds, offsets, qty, cost, iv, days):
+    """Every threshold x offset for one poll interval (one pool task)."""
+    poll_ts, sampled = sample_series(_DATA["oi_ts"], _DATA["pe_ce"], interval)
+    rows = []
+    for threshold in thresholds:
+        for row in _evaluate(_DATA, poll_ts, sampled, threshold, offsets, qty, cost, iv, days)[0]:
+            rows.append(dict(row, threshold=threshold, interval=interval))
+    return rows
+
+
+def sweep(data: Dict[str, np.ndarray], thresholds: Sequence[float], intervals: Sequence[float],
+          offsets: Sequence[float], qty: int = 1, cost: float = 0.0, iv: float = DEFAULT_IV,
+          days: float = DEFAULT_DAYS_TO_EXPIRY, workers: Optional[int] = None) -> List[dict]:
+    """Metrics for every threshold x interval x offset combination.
+
+    Each poll interval is one task on a process pool (the series is sent to
+    each worker once); within a task thresholds loop and offsets are
+    evaluated together as one array op.
+
+    Returns:
+        list[dict]: One row per combination, sorted by P&L (best first)
+    """
+    thresholds, offsets = list(thresholds), list(offsets)
+    if workers == 1:
+        _init_worker(data)
+        chunks = [_sweep_interval(i, thresholds, offsets, qty, cost, iv, days) for i in intervals]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            futures = [pool.submit(_sweep_interval, i, thresholds, offsets, qty, cost, iv, days)
+                       for i in intervals]
+            chunks = [f.result() for f in futures]
+    rows = list(itertools.chain.from_iterable(chunks))
+    rows.sort(key=lambda r: r["pnl"], reverse=True)
+    return rows
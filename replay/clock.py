@@ -0,0 +1,34 @@
+"""Virtual clock for accelerated replay."""
+import time
+
+
+class VirtualClock:
+    """Virtual time that advances with replayed events, paced against wall time.
+
+    At speed N one virtual second takes 1/N wall seconds; speed 0 runs as
+    fast as possible. Everything the replay decides is stamped with
+    clock.now, so decision latencies are a function of the data and the
+    schedule only, not of machine load.
+    """
+
+    def __init__(self, start_ts: float, speed: float = 1.0):
+        """Initialize clock.
+
+        Args:
+            start_ts: Virtual start time (epoch seconds)
+            speed: Replay speed multiplier (1 to 1000; 0 = unpaced)
+        """
+        self.now = start_ts
+        self.speed = speed
+        self._virtual_start = start_ts
+        self._wall_start = time.monotonic()
+
+    def advance_to(self, ts: float) -> None:
+        """Move virtual time forward to ts, sleeping to keep pace."""
+        if ts <= self.now:
+            return
+        if self.speed:
+            wait = self._wall_start + (ts - self._virtual_start) / self.speed - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        self.now = ts
@@ -0,0 +1,112 @@
+"""Historical inputs for replay: index ticks, option prices and PE-CE readings as NumPy arrays."""
+import csv
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from market_data.tick_store import load_partition, load_ticks
+from utils.questdb import get_questdb
+from utils.spot import FEED_TOKENS
+
+logger = logging.getLogger(__name__)
+
+OI_TABLES = {
+    "NIFTY": "NiftyOISpikeNew",
+    "BANKNIFTY": "BankNiftyOISpikeNew",
+}
+
+# PE-CE column, resolved like the live engine: by name, else the reference position
+PE_CE_COLUMN = os.environ.get("OI_PE_CE_COLUMN")
+PE_CE_POSITION = 8
+
+
+def load_index_ticks(root: str, day: str, index: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Recorded index ticks for one day as (ts, ltp) arrays."""
+    data = load_ticks(root, day, index, FEED_TOKENS[index])
+    return data["ts"], data["ltp"]
+
+
+def load_option_ticks(root: str, day: str, index: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Recorded ticks of every other token under an index (its option chain) as (token, ts, ltp)."""
+    data = load_partition(root, day, index)
+    keep = (data["token"] != FEED_TOKENS[index]) & ~np.isnan(data["ltp"])
+    logger.info(f"[REPLAY DATA] {index}: {int(keep.sum())} option ticks")
+    return data["token"][keep], data["ts"][keep], data["ltp"][keep]
+
+
+def load_index_ticks_range(root: str, first_day: str, last_day: str, index: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Recorded index ticks for every day in [first_day, last_day] as (ts, ltp) arrays."""
+    day = datetime.fromisoformat(first_day).date()
+    last = datetime.fromisoformat(last_day).date()
+    parts_ts, parts_ltp = [], []
+    while day <= last:
+        ts, ltp = load_index_ticks(root, day.isoformat(), index)
+        if len(ts):
+            parts_ts.append(ts)
+            parts_ltp.append(ltp)
+        day += timedelta(days=1)
+    if not parts_ts:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    logger.info(f"[REPLAY DATA] {index}: {len(parts_ts)} recorded days {first_day}..{last_day}")
+    return np.concatenate(parts_ts), np.concatenate(parts_ltp)
+
+
+def _parse_ts(value: str) -> float:
+    """QuestDB ISO timestamp (UTC, 'Z' suffix) -> epoch seconds."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def load_oi_questdb(day: str, index: str, last_day: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Every PE-CE row QuestDB stored for one index on one day (or a day range).
+
+    Args:
+        day: YYYY-MM-DD
+        index: NIFTY or BANKNIFTY
+        last_day: Optional last day (inclusive) to load a range in one query
+
+    Returns:
+        Tuple (ts, pe_ce) arrays sorted by ts
+    """
+    start = datetime.fromisoformat(day)
+    end = datetime.fromisoformat(last_day or day) + timedelta(days=1)
+    res = get_questdb().query(
+        f"select * from {OI_TABLES[index]} where ts >= :start and ts < :end order by ts",
+        {"start": start, "end": end},
+        timeout=30 if last_day is None else 300,
+    )
+
+    pe_ce_name = PE_CE_COLUMN or res.names[PE_CE_POSITION]
+    # datetime64[us] in UTC -> epoch seconds
+    ts = res.column("ts").astype(np.int64) / 1e6
+    pe_ce = res.column(pe_ce_name).astype(np.float64)
+    logger.info(f"[REPLAY DATA] {index}: {len(ts)} PE-CE rows from {OI_TABLES[index]}")
+    return ts, pe_ce
+
+
+def load_oi_csv(path: str) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """PE-CE rows from a CSV with columns ts,index,pe_ce.
+
+    ts may be epoch seconds or an ISO timestamp.
+
+    Returns:
+        dict: index -> (ts, pe_ce) arrays sorted by ts
+    """
+    rows: Dict[str, list] = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            raw_ts = row["ts"]
+            try:
+                ts = float(raw_ts)
+            except ValueError:
+                ts = _parse_ts(raw_ts)
+            rows.setdefault(row["index"].upper(), []).append((ts, float(row["pe_ce"])))
+
+    result = {}
+    for index, values in rows.items():
+        values.sort()
+        arr = np.array(values, dtype=np.float64)
+        result[index] = (arr[:, 0], arr[:, 1])
+    return result
@@ -0,0 +1,314 @@
+"""Replay engine: drives the live watcher / OI engine / order code on recorded data.
+
+Recorded index ticks and PE-CE rows are merged into one time-ordered event
+stream. Between events the engine runs the same periodic jobs the live
+processes run, on the virtual clock:
+
+    OI signal engine   every oi_poll_interval    (nifty_oi_trade_engine.process_pe_ce)
+    OI order engine    every order_poll_interval (nifty_oi_order_engine.process_signal)
+    agent loop         every agent_loop_interval (OrderService.process_all + watcher refresh)
+
+Index ticks update the spot keys and go straight to the level watchers'
+on_tick(); a trigger runs the agent's order step immediately, as the live
+wake-up does. Orders go to a SimBroker, which fills market orders at the
+recorded option price of that virtual time (see add_option_ticks); the
+contract is picked on the replayed day's expiry calendar. Every
+decision is recorded with the virtual time of the data that caused it, so
+latencies are reproducible.
+
+All state lives in a dedicated Redis database (REPLAY_REDIS_DB) seeded with
+the instrument master from the live database; the live keys, the live
+oi_live_positions.json and Telegram are never touched. The replay database
+is flushed on start, so it can never be the live one.
+"""
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import redis
+
+import nifty_oi_order_engine
+import nifty_oi_trade_engine
+from replay.clock import VirtualClock
+from replay.sim_broker import SimBroker
+from services.order_service import OrderService
+from utils import oi_positions, spot, telegram_notifier
+from utils.contract_index import REDIS_KEY_OPT_REV, get_contract_index
+from utils.contract_meta import ContractMetadata
+from utils.redis_helper import LIVE_REDIS_DB
+from watchers.level_ce_watcher import LevelCEWatcher
+from watchers.level_pe_watcher import LevelPEWatcher
+
+logger = logging.getLogger(__name__)
+
+REPLAY_REDIS_DB = 15
+
+# Keys copied from the live database so contract lookups work in replay
+SEED_KEYS = ("NEO_INSTR_OPT", "NEO_CONTRACT_META", "NEO_INSTR_VERSION", REDIS_KEY_OPT_REV)
+
+EVENT_TICK, EVENT_OI = 0, 1
+INDICES = ("NIFTY", "BANKNIFTY")
+
+# Session dates (expiry choice) are IST
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def replay_redis_client(host: str = "localhost", port: int = 6379, live_db: int = LIVE_REDIS_DB,
+                        db: int = REPLAY_REDIS_DB):
+    """Empty the replay database and seed it with the live instrument master."""
+    if db == live_db:
+        raise ValueError(f"Replay database {db} is the live database; pick another --redis-db")
+    live = redis.StrictRedis(host=host, port=port, db=live_db)
+    target = redis.StrictRedis(host=host, port=port, db=db)
+    target.flushdb()
+    for key in SEED_KEYS:
+        dumped = live.dump(key)
+        if dumped is not None:
+            target.restore(key, 0, dumped, replace=True)
+    return redis.StrictRedis(host=host, port=port, db=db, decode_responses=True)
+
+
+class ReplayEngine:
+    """Replays one session through the live decision code."""
+
+    def __init__(self, redis_client, uid: str, speed: float = 100.0,
+                 oi_poll_interval: float = nifty_oi_trade_engine.CHECK_INTERVAL,
+                 order_poll_interval: float = nifty_oi_order_engine.CHECK_INTERVAL,
+                 agent_loop_interval: float = 3.0):
+        """Initialize replay.
+
+        Args:
+            redis_client: Client on the replay database (see replay_redis_client)
+            uid: User ID used for flags and order fields
+            speed: Virtual seconds per wall second (0 = as fast as possible)
+            oi_poll_interval: Signal engine poll period (virtual seconds)
+            order_poll_interval: Order engine poll period (virtual seconds)
+            agent_loop_interval: Agent loop period (virtual seconds)
+        """
+        self.redis_client = redis_client
+        self.uid = uid
+        self.speed = speed
+        self.intervals = {
+            "oi": oi_poll_interval,
+            "order": order_poll_interval,
+            "agent": agent_loop_interval,
+        }
+
+        self._ticks: Dict[str, tuple] = {}
+        self._oi: Dict[str, tuple] = {}
+        self._prices: Dict[str, tuple] = {}
+        self.decisions: List[dict] = []
+
+        self.clock: Optional[VirtualClock] = None
+        self.broker: Optional[SimBroker] = None
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+    def add_ticks(self, index: str, ts: np.ndarray, ltp: np.ndarray) -> None:
+        """Index ticks (epoch seconds, price)."""
+        self._ticks[index] = (np.asarray(ts, dtype=np.float64), np.asarray(ltp, dtype=np.float64))
+
+    def add_option_ticks(self, index: str, tokens: np.ndarray, ts: np.ndarray, ltp: np.ndarray) -> None:
+        """Recorded option ticks (feed token, epoch seconds, price) used for market fills."""
+        tokens = np.asarray(tokens, dtype=object)
+        uniq, inverse = np.unique(tokens, return_inverse=True)
+        keys = self.redis_client.hmget(REDIS_KEY_OPT_REV, uniq.tolist()) if len(uniq) else []
+        contracts = get_contract_index(self.redis_client)
+        ts, ltp = np.asarray(ts, dtype=np.float64), np.asarray(ltp, dtype=np.float64)
+
+        for i, key in enumerate(keys):
+            symbol = contracts.symbol_for_key(key) if key else None
+            if symbol is not None:
+                mask = inverse == i
+                self._prices[symbol] = (ts[mask], ltp[mask])
+        logger.info(f"[REPLAY] {index}: prices for {len(self._prices)} option symbols")
+
+    def add_oi(self, index: str, ts: np.ndarray, pe_ce: np.ndarray) -> None:
+        """PE-CE readings as the signal engine would have seen them."""
+        self._oi[index] = (np.asarray(ts, dtype=np.float64), np.asarray(pe_ce, dtype=np.float64))
+
+    def enable_oi(self, index: str, lots: int = 1) -> None:
+        """Turn on the OI signal / order engines for an index."""
+        cfg = nifty_oi_order_engine.ENGINE_CONFIG[index]
+        self.redis_client.hset(self.uid, mapping={cfg["enabled_field"]: "ON", cfg["lots_field"]: lots})
+
+    def arm_level(self, side: str, index: str, level: float, legs_json: str) -> None:
+        """Arm LEVEL_CE / LEVEL_PE with its legs, as the UI does."""
+        self.redis_client.hset(self.uid, mapping={
+            f"LEVEL_{side}_TRIGGER": "waiting",
+            f"LEVEL_{side}_LEVEL": level,
+            f"LEVEL_{side}_INDEX": index,
+            f"LEVEL_{side}": legs_json,
+            f"STATUS_LEVEL_{side}": "WAITING",
+        })
+
+    def _events(self):
+        """Merge every input into (ts, kind, index_no, value) arrays sorted by ts."""
+        parts = []
+        for kind, source in ((EVENT_TICK, self._ticks), (EVENT_OI, self._oi)):
+            for index, (ts, values) in source.items():
+                parts.append((ts, np.full(len(ts), kind), np.full(len(ts), INDICES.index(index)), values))
+        if not parts:
+            return (np.empty(0),) * 4
+
+        ts, kinds, indices, values = (np.concatenate(col) for col in zip(*parts))
+        # Stable sort keeps a tick ahead of an OI row with the same timestamp
+        order = np.lexsort((kinds, ts))
+        return ts[order], kinds[order], indices[order], values[order]
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+    def _record(self, kind: str, index: str, source_ts: Optional[float], started: float, **extra) -> dict:
+        decision = {
+            "kind": kind,
+            "index": index,
+            "source_ts": source_ts,
+            "decision_ts": self.clock.now,
+            "latency_s": None if source_ts is None else round(self.clock.now - source_ts, 6),
+            "compute_ms": round((time.perf_counter() - started) * 1000, 3),
+            **extra,
+        }
+        self.decisions.append(decision)
+        logger.info(f"[REPLAY] {decision}")
+        return decision
+
+    def _run_agent_step(self, cause: str, index: Optional[str], source_ts: Optional[float]) -> None:
+        self._sync_contract_day()
+        started = time.perf_counter()
+        placed_before = len(self.broker.orders)
+        self.order_service.process_all()
+        for order in self.broker.orders[placed_before:]:
+            self._record("order", index, source_ts, started, cause=cause,
+                         order_no=order["nOrdNo"], symbol=order["trading_symbol"],
+                         side=order["side"], qty=order["qty"], fill_price=order["fill_price"])
+
+    def _job_oi(self) -> None:
+        for index in INDICES:
+            cfg = nifty_oi_trade_engine.INDEX_CONFIG[index]
+            latest = self._latest_oi.get(index)
+            if latest is None or self.redis_client.hget(self.uid, cfg["enabled_field"]) != "ON":
+                continue
+            started = time.perf_counter()
+            oi_ts, pe_ce = latest
+            signal = nifty_oi_trade_engine.process_pe_ce(self.redis_client, index, pe_ce, ts=self.clock.now)
+            if signal:
+                self._pending_signal_ts[index] = oi_ts
+                self._record("oi_signal", index, oi_ts, started, signal=signal, pe_ce=pe_ce)
+
+    def _sync_contract_day(self) -> None:
+        """Keep the expiry calendar on the replayed session's date."""
+        day = datetime.fromtimestamp(self.clock.now, IST).date()
+        if self.contract_meta is None or self.contract_meta.as_of != day:
+            self.contract_meta = ContractMetadata.from_redis(self.redis_client, self.contracts, as_of=day)
+            self.order_service.contract_meta = self.contract_meta
+
+    def _job_order(self) -> None:
+        self._sync_contract_day()
+        for index in INDICES:
+            started = time.perf_counter()
+            payload = nifty_oi_order_engine.process_signal(self.redis_client, self.uid, index,
+                                                           meta=self.contract_meta)
+            if payload:
+                self._pending_order_ts = self._pending_signal_ts.get(index)
+                self._record("order_request", index, self._pending_signal_ts.get(index), started,
+                             strike=payload["Strike"], option_type=payload["OptionType"],
+                             direction=payload["direction"])
+
+    def _job_agent(self) -> None:
+        for watcher in self.watchers:
+            watcher.refresh()
+        self._run_agent_step("oi", None, self._pending_order_ts)
+        self._pending_order_ts = None
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def _setup(self, start_ts: float) -> None:
+        telegram_notifier.set_enabled(False)
+        spot.use_local_ring(False)
+        self._positions_file = os.path.join(tempfile.mkdtemp(prefix="replay_"), "oi_live_positions.json")
+        oi_positions.set_positions_file(self._positions_file)
+
+        self.clock = VirtualClock(start_ts, self.speed)
+        self.broker = SimBroker(self.clock)
+        for symbol, (ts, ltp) in self._prices.items():
+            self.broker.add_price_series(symbol, ts, ltp)
+        self.contracts = get_contract_index(self.redis_client, refresh=True)
+        self.order_service = OrderService(self.broker, self.redis_client, self.uid)
+        self.contract_meta: Optional[ContractMetadata] = None
+        self._sync_contract_day()
+
+        self._triggered = False
+        wake = lambda: setattr(self, "_triggered", True)
+        self.watchers = [
+            LevelCEWatcher(self.redis_client, self.uid, on_trigger=wake),
+            LevelPEWatcher(self.redis_client, self.uid, on_trigger=wake),
+        ]
+        for watcher in self.watchers:
+            watcher.refresh()
+
+        self._latest_oi: Dict[str, tuple] = {}
+        self._pending_signal_ts: Dict[str, float] = {}
+        self._pending_order_ts: Optional[float] = None
+
+    def run(self) -> dict:
+        """Replay every event; returns the summary report."""
+        ts, kinds, indices, values = self._events()
+        if len(ts) == 0:
+            raise ValueError("Nothing to replay: add ticks and/or OI rows first")
+
+        self._setup(float(ts[0]))
+        wall_start = time.perf_counter()
+        jobs = [("oi", self._job_oi), ("order", self._job_order), ("agent", self._job_agent)]
+        next_run = {name: float(ts[0]) for name, _ in jobs}
+
+        for event_ts, kind, index_no, value in zip(ts.tolist(), kinds.tolist(), indices.tolist(), values.tolist()):
+            # Periodic jobs due before this event, in time order
+            while True:
+                name, job = min(jobs, key=lambda j: next_run[j[0]])
+                if next_run[name] > event_ts:
+                    break
+                self.clock.advance_to(next_run[name])
+                job()
+                next_run[name] += self.intervals[name]
+
+            self.clock.advance_to(event_ts)
+            index = INDICES[index_no]
+
+            if kind == EVENT_OI:
+                self._latest_oi[index] = (event_ts, value)
+                continue
+
+            # Live feeder stamps receive time with the wall clock; so does replay
+            spot.publish_spot(self.redis_client, index, value, event_ts, time.time())
+            for watcher in self.watchers:
+                watcher.on_tick(index, value, event_ts)
+            if self._triggered:
+                self._triggered = False
+                self._run_agent_step("level", index, event_ts)
+
+        return self.report(time.perf_counter() - wall_start, len(ts))
+
+    def report(self, wall_seconds: float, events: int) -> dict:
+        """Summary of the run plus every decision."""
+        latencies = [d["latency_s"] for d in self.decisions if d["kind"] == "order" and d["latency_s"] is not None]
+        virtual_span = self.clock.now - self.clock._virtual_start
+        return {
+            "events": events,
+            "virtual_seconds": round(virtual_span, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "effective_speed": round(virtual_span / wall_seconds, 1) if wall_seconds else None,
+            "signals": sum(1 for d in self.decisions if d["kind"] == "oi_signal"),
+            "orders": len(self.broker.orders),
+            "order_latency_s": {
+                "p50": float(np.percentile(latencies, 50)) if latencies else None,
+                "max": max(latencies) if latencies else None,
+            },
+            "decisions": self.decisions,
+        }
@@ -0,0 +1,79 @@
+"""Simulated broker with the NeoAPI order interface used by OrderService."""
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SimBroker:
+    """Stand-in for the Neo client: records orders and fills them immediately.
+
+    Limit orders fill at their limit price; market orders fill at the last
+    price set for the symbol via set_price(), else at the last recorded price
+    at or before the virtual time (add_price_series), else None.
+    """
+
+    def __init__(self, clock):
+        """Initialize broker.
+
+        Args:
+            clock: VirtualClock used to timestamp orders
+        """
+        self.clock = clock
+        self.orders = []
+        self.prices = {}
+        self._series = {}
+
+    def set_price(self, trading_symbol: str, ltp: float) -> None:
+        """Last traded price used for market fills."""
+        self.prices[trading_symbol] = ltp
+
+    def add_price_series(self, trading_symbol: str, ts: np.ndarray, ltp: np.ndarray) -> None:
+        """Recorded (ts, ltp) of a symbol, sorted by ts, for market fills."""
+        self._series[trading_symbol] = (ts, ltp)
+
+    def last_price(self, trading_symbol: str):
+        """Price a market order for the symbol would fill at now (None if unknown)."""
+        if trading_symbol in self.prices:
+            return self.prices[trading_symbol]
+        series = self._series.get(trading_symbol)
+        if series is None:
+            return None
+        ts, ltp = series
+        pos = int(np.searchsorted(ts, self.clock.now, side="right"))
+        return float(ltp[pos - 1]) if pos else None
+
+    def place_order(self, exchange_segment=None, product=None, price="0", order_type="MKT",
+                    quantity="0", validity="DAY", trading_symbol=None, transaction_type=None, **kwargs):
+        """Record an order and return a Neo-style success response."""
+        order_no = f"SIM{len(self.orders) + 1:06d}"
+        limit = float(price or 0)
+        fill_price = limit if order_type == "L" and limit > 0 else self.last_price(trading_symbol)
+
+        order = {
+            "nOrdNo": order_no,
+            "ts": self.clock.now,
+            "wall_ts": time.time(),
+            "exchange_segment": exchange_segment,
+            "product": product,
+            "trading_symbol": trading_symbol,
+            "side": transaction_type,
+            "qty": int(quantity),
+            "order_type": order_type,
+            "price": limit,
+            "fill_price": fill_price,
+            "tag": kwargs.get("tag"),
+        }
+        self.orders.append(order)
+        logger.info(f"[SIM BROKER] {order_no} {transaction_type} {quantity} {trading_symbol} @ {fill_price}")
+        return {"stat": "Ok", "stCode": 200, "nOrdNo": order_no}
+
+    def order_report(self):
+        """All simulated orders, Neo-style."""
+        return {"stat": "Ok", "data": list(self.orders)}
+
+    def positions(self):
+        """Simulated broker keeps no netted positions."""
+        return {"stat": "Ok", "data": []}
@@ -0,0 +1,114 @@
+"""Replay one recorded session through the watchers and OI engines.
+
+Index ticks and option prices come from the tick recorder's Parquet files,
+PE-CE readings from QuestDB (or a CSV with ts,index,pe_ce). Orders go to a
+simulated broker that fills at the recorded option prices, and all state
+lives in a separate Redis database, so replay can run next to the live agent.
+
+    python replay_day.py 2026-10-16 --speed 200 --oi NIFTY,BANKNIFTY
+    python replay_day.py 2026-10-16 --speed 0 --level-ce NIFTY:24600 \\
+        --legs-file legs.json --report replay.json
+
+Contracts are resolved against the instrument master currently in Redis.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from replay.data import load_index_ticks, load_oi_csv, load_oi_questdb, load_option_ticks
+from replay.engine import REPLAY_REDIS_DB, ReplayEngine, replay_redis_client
+from utils.redis_helper import LIVE_REDIS_DB
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TICKS_ROOT = os.path.join(BASE_DIR, "ticks")
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s"
+)
+
+
+def parse_level(value: str):
+    """INDEX:LEVEL -> (index, level)."""
+    index, _, level = value.partition(":")
+    if not level:
+        raise argparse.ArgumentTypeError(f"Expected INDEX:LEVEL, got {value!r}")
+    return index.upper(), float(level)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded day through the trading engines")
+    parser.add_argument("day", help="Session date, YYYY-MM-DD")
+    parser.add_argument("--uid", default="REPLAY", help="User ID for flags and orders")
+    parser.add_argument("--speed", type=float, default=100.0,
+                        help="Virtual seconds per wall second, 1-1000 (0 = as fast as possible)")
+    parser.add_argument("--ticks-root", default=DEFAULT_TICKS_ROOT, help="Tick recorder directory")
+    parser.add_argument("--oi", default="", help="Comma-separated indices to run the OI engines for")
+    parser.add_argument("--oi-csv", help="PE-CE rows (ts,index,pe_ce) instead of QuestDB")
+    parser.add_argument("--oi-lots", type=int, default=1)
+    parser.add_argument("--level-ce", type=parse_level, help="Arm LEVEL_CE at INDEX:LEVEL")
+    parser.add_argument("--level-pe", type=parse_level, help="Arm LEVEL_PE at INDEX:LEVEL")
+    parser.add_argument("--legs-file", help="JSON legs for the armed level orders (UI format)")
+    parser.add_argument("--redis-db", type=int, default=REPLAY_REDIS_DB)
+    parser.add_argument("--report", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    if not 0 <= args.speed <= 1000:
+        parser.error("--speed must be between 0 and 1000")
+    if (args.level_ce or args.level_pe) and not args.legs_file:
+        parser.error("--level-ce/--level-pe need --legs-file")
+    if args.redis_db == LIVE_REDIS_DB:
+        parser.error(f"--redis-db {LIVE_REDIS_DB} is the live database (replay flushes it)")
+
+    oi_indices = [i.strip().upper() for i in args.oi.split(",") if i.strip()]
+    level_indices = {lvl[0] for lvl in (args.level_ce, args.level_pe) if lvl}
+
+    redis_client = replay_redis_client(live_db=LIVE_REDIS_DB, db=args.redis_db)
+    engine = ReplayEngine(redis_client, args.uid, speed=args.speed)
+
+    for index in sorted(set(oi_indices) | level_indices):
+        ts, ltp = load_index_ticks(args.ticks_root, args.day, index)
+        if len(ts) == 0:
+            logging.warning(f"No recorded {index} ticks for {args.day} under {args.ticks_root}")
+        engine.add_ticks(index, ts, ltp)
+        engine.add_option_ticks(index, *load_option_ticks(args.ticks_root, args.day, index))
+
+    oi_rows = load_oi_csv(args.oi_csv) if args.oi_csv else {}
+    for index in oi_indices:
+        ts, pe_ce = oi_rows[index] if args.oi_csv else load_oi_questdb(args.day, index)
+        engine.add_oi(index, ts, pe_ce)
+        engine.enable_oi(index, args.oi_lots)
+
+    if args.legs_file:
+        with open(args.legs_file) as f:
+            legs_json = json.dumps(json.load(f))
+        for side, level in (("CE", args.level_ce), ("PE", args.level_pe)):
+            if level:
+                engine.arm_level(side, level[0], level[1], legs_json)
+
+    try:
+        report = engine.run()
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+    print(f"Replayed {report['events']} events: {report['virtual_seconds']}s of market time "
+          f"in {report['wall_seconds']}s ({report['effective_speed']}x)")
+    print(f"OI signals: {report['signals']} | Orders: {report['orders']} | "
+          f"Order latency p50={report['order_latency_s']['p50']}s max={report['order_latency_s']['max']}s")
+    for decision in report["decisions"]:
+        if decision["kind"] in ("oi_signal", "order"):
+            print(f"  {decision['kind']:<10} {decision['index'] or '-':<10} "
+                  f"latency={decision['latency_s']}s "
+                  f"{decision.get('signal') or decision.get('symbol') or ''}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,10 @@ class BalanceService:
         # Fetch and save balance
         self._fetch_and_save_balance()
     
+    def prefetch(self):
+        """Fetch balance now, without a UI request (pre-open warm-up)."""
+        self._fetch_and_save_balance()
+    
     def _fetch_and_save_balance(self):
         """Fetch balance from Neo API and save to CSV."""
         # SAFETY CHECK: Ensure client is authenticated
@@ -0,0 +1,175 @@
+"""Market depth for the option contracts we are about to trade.
+
+Opens a depth (isDepth=True) websocket subscription ahead of time: every
+agent loop for the legs of armed level orders and for the contracts the
+enabled OI engines would pick at the current spot, and for any other leg
+OrderService asks about (ready for its next order). The subscriptions ride
+on the client's shared feed (market_data/neo_feed.shared_feed), next to the
+position LTPs. Books live in memory (market_data/depth.py); OrderService
+asks for a leg's quote to pick its limit price and protection band.
+"""
+import json
+import logging
+import threading
+import time
+
+from market_data.depth import DepthBook
+from market_data.neo_feed import shared_feed
+from utils.contract_index import OPTION_SEGMENT, REDIS_KEY_OPT_TOKEN, build_contract_key
+from utils.spot import get_spot
+
+# Legs of these per-UID fields are subscribed ahead of their trigger
+ARMED_LEG_FIELDS = ("LEVEL_CE", "LEVEL_PE")
+
+# A book older than this is not used for pricing (seconds)
+STALE_AFTER = 5.0
+
+# Depth subscriptions kept at most; the oldest are dropped first
+MAX_TOKENS = 50
+
+
+class DepthService:
+    """On-demand depth books keyed by websocket token."""
+
+    def __init__(self, auth_service, redis_client, uid, stale_after=STALE_AFTER, max_tokens=MAX_TOKENS):
+        """Initialize depth service.
+
+        Args:
+            auth_service: NeoAuthService instance (client used for the websocket)
+            redis_client: Redis client instance
+            uid: User ID
+            stale_after: Max book age used for pricing (seconds)
+            max_tokens: Depth subscriptions kept at most
+        """
+        self.auth_service = auth_service
+        self.redis_client = redis_client
+        self.uid = uid
+        self.stale_after = stale_after
+        self.max_tokens = max_tokens
+
+        self.feed = shared_feed(auth_service, self._client)
+        self._books = {}              # token -> DepthBook (insertion order = subscription age)
+        self._token_of = {}           # contract key -> token
+        self._armed_raw = None
+        self._armed_legs = []
+        self._lock = threading.Lock()
+
+    def _client(self):
+        return self.auth_service.client if self.auth_service.is_ready() else None
+
+    def _on_tick(self, tick):
+        # LTP ticks of a shared token belong to the position LTP subscription
+        if tick["kind"] != "depth":
+            return
+        book = self._books.get(tick["tk"])
+        if book is None:
+            return
+        with self._lock:
+            book.update(tick["raw"], tick["recv_ts"])
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+    def _leg_token(self, leg):
+        try:
+            key = build_contract_key(leg["Index"], leg["Expiry"], leg["OptionType"].upper(), leg["Strike"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        token = self._token_of.get(key)
+        if token is None:
+            token = self.redis_client.hget(REDIS_KEY_OPT_TOKEN, key)
+            if token:
+                self._token_of[key] = token = str(token)
+        return token
+
+    def watch(self, legs):
+        """Make sure every leg's token has a depth subscription."""
+        if not self.auth_service.is_ready():
+            return
+
+        added = []
+        for leg in legs:
+            token = self._leg_token(leg)
+            if token and token not in self._books:
+                self._books[token] = DepthBook()
+                added.append(token)
+        if not added:
+            return
+
+        dropped = list(self._books)[:max(0, len(self._books) - self.max_tokens)]
+        for token in dropped:
+            del self._books[token]
+        if dropped:
+            self.feed.unlisten(
+                [{"instrument_token": tk, "exchange_segment": OPTION_SEGMENT} for tk in dropped],
+                self._on_tick, is_depth=True
+            )
+
+        self.feed.listen(
+            [{"instrument_token": tk, "exchange_segment": OPTION_SEGMENT} for tk in added if tk in self._books],
+            self._on_tick, is_depth=True
+        )
+        logging.info(f"[DEPTH] Watching {len(self._books)} tokens (+{len(added)} / -{len(dropped)})")
+
+    def process(self):
+        """Agent loop hook: pre-subscribe the legs that may be traded next."""
+        legs = self._armed_level_legs() + self._oi_candidate_legs()
+        if legs:
+            self.watch(legs)
+
+    def _armed_level_legs(self):
+        raw = self.redis_client.hmget(self.uid, list(ARMED_LEG_FIELDS))
+        if raw != self._armed_raw:
+            self._armed_raw = raw
+            self._armed_legs = []
+            for blob in raw:
+                if not blob:
+                    continue
+                try:
+                    self._armed_legs.extend(json.loads(blob))
+                except (TypeError, ValueError):
+                    continue
+        return self._armed_legs
+
+    def _oi_candidate_legs(self):
+        """Contracts each enabled OI engine would sell on a crossover either way."""
+        # Imported lazily: the order engine is also a standalone script
+        from nifty_oi_order_engine import ENGINE_CONFIG, select_contract
+
+        enabled = self.redis_client.hmget(self.uid, [cfg["enabled_field"] for cfg in ENGINE_CONFIG.values()])
+        legs = []
+        for index, flag in zip(ENGINE_CONFIG, enabled):
+            if flag != "ON":
+                continue
+            spot = get_spot(self.redis_client, index)
+            if spot is None:
+                continue
+            for direction in ("BULLISH", "BEARISH"):
+                expiry, strike, option_type = select_contract(index, spot, direction, self.redis_client)
+                if expiry and strike is not None:
+                    legs.append({"Index": index, "Expiry": expiry, "Strike": strike, "OptionType": option_type})
+        return legs
+
+    # ------------------------------------------------------------------
+    # Quotes
+    # ------------------------------------------------------------------
+    def quote(self, leg):
+        """Fresh depth metrics for a leg, or None.
+
+        Never waits: a leg without a subscription is subscribed for next time
+        and the order goes out without depth now.
+        """
+        token = self._leg_token(leg)
+        if token is None:
+            return None
+        book = self._books.get(token)
+        if book is None:
+            self.watch([leg])
+            return None
+
+        with self._lock:
+            metrics = book.metrics()
+        if not metrics or time.time() - metrics["ts"] > self.stale_after:
+            return None
+        metrics["token"] = token
+        return metrics
@@ -0,0 +1,133 @@
+"""Joins OI auto-trade fills back onto their latency stamps.
+
+OrderService parks every placed OI crossover order in OI_LATENCY_PENDING
+with the stamps carried from the signal (utils/latency.py). While anything
+is pending, this service reads the Neo order report every few seconds; a
+completed order gets its exchange fill time stamped, its per-stage
+breakdown pushed to OI_LATENCY_TRADES and the day's percentiles rewritten
+in OI_LATENCY_DAILY:{date} for the UI's OI Auto tab.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.latency import (
+    REDIS_KEY_PENDING, REDIS_KEY_TRADES, TRADES_KEPT,
+    breakdown, daily_key, percentiles, stamp,
+)
+
+# Exchange times in the order report are IST
+IST = timezone(timedelta(hours=5, minutes=30))
+EXCHANGE_TIME_FORMATS = ("%d-%b-%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S")
+
+CHECK_INTERVAL = 5.0
+
+# Pending orders given up on after this long (seconds)
+PENDING_TTL = 6 * 3600
+
+DONE_STATUSES = ("complete", "traded", "filled")
+DEAD_STATUSES = ("rejected", "cancelled", "canceled")
+
+
+def parse_exchange_time(value):
+    """Order report time (IST text) -> epoch seconds, or None."""
+    if not value:
+        return None
+    for fmt in EXCHANGE_TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).replace(tzinfo=IST).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class LatencyService:
+    """Polls the order report for pending OI orders and records their latency."""
+
+    def __init__(self, client, redis_client, uid, check_interval=CHECK_INTERVAL):
+        """Initialize latency service.
+
+        Args:
+            client: NeoAPI client instance (authenticated)
+            redis_client: Redis client instance
+            uid: User ID
+            check_interval: Seconds between order report reads while orders are pending
+        """
+        self.client = client
+        self.redis_client = redis_client
+        self.uid = uid
+        self.check_interval = check_interval
+        self._last_check = 0.0
+
+    def _order_rows(self):
+        response = self.client.order_report()
+        if isinstance(response, (str, bytes, bytearray)):
+            response = json.loads(response)
+        if not response or response.get("stat") != "Ok":
+            return {}
+        return {str(row.get("nOrdNo")): row for row in response.get("data", []) or []}
+
+    def process(self):
+        """Agent loop hook: join fills of pending orders (rate limited)."""
+        now = time.time()
+        if self.client is None or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        pending = self.redis_client.hgetall(REDIS_KEY_PENDING)
+        if not pending:
+            return
+
+        try:
+            rows = self._order_rows()
+        except Exception as e:
+            logging.error(f"[LATENCY] Order report failed: {e}")
+            return
+
+        days = set()
+        for order_no, raw in pending.items():
+            entry = json.loads(raw)
+            stamps = entry["stamps"]
+            placed_at = (stamps.get("ack") or stamps.get("agent") or [now])[0]
+            row = rows.get(order_no)
+            status = str(row.get("ordSt", "")).lower() if row else ""
+
+            if status in DEAD_STATUSES or (row is None and now - placed_at > PENDING_TTL):
+                logging.info(f"[LATENCY] Dropping {order_no} ({status or 'not in order report'})")
+                self.redis_client.hdel(REDIS_KEY_PENDING, order_no)
+                continue
+            if status not in DONE_STATUSES:
+                continue
+
+            fill_ts = parse_exchange_time(row.get("exTm")) or parse_exchange_time(row.get("hsUpTm")) or now
+            if stamps.get("ack"):
+                # The exchange time is truncated to the second; the fill cannot precede the ack
+                fill_ts = max(fill_ts, stamps["ack"][0])
+            stamp(stamps, "fill", wall=fill_ts)
+            day = datetime.fromtimestamp((stamps.get("detect") or [placed_at])[0], IST).date().isoformat()
+            trade = {
+                "order_no": order_no,
+                "index": entry["index"],
+                "symbol": entry["symbol"],
+                "day": day,
+                "avg_price": row.get("avgPrc"),
+                "latency_ms": breakdown(stamps),
+                "stamps": stamps,
+            }
+            pipe = self.redis_client.pipeline()
+            pipe.lpush(REDIS_KEY_TRADES, json.dumps(trade))
+            pipe.ltrim(REDIS_KEY_TRADES, 0, TRADES_KEPT - 1)
+            pipe.hdel(REDIS_KEY_PENDING, order_no)
+            pipe.execute()
+            days.add(day)
+            logging.info(f"[LATENCY] {entry['index']} {entry['symbol']} {order_no}: {trade['latency_ms']}")
+
+        for day in days:
+            self._update_daily(day)
+
+    def _update_daily(self, day):
+        trades = [json.loads(t) for t in self.redis_client.lrange(REDIS_KEY_TRADES, 0, -1)]
+        stats = percentiles([t for t in trades if t.get("day") == day])
+        self.redis_client.delete(daily_key(day))
+        self.redis_client.hset(daily_key(day), mapping=stats)
@@ -0,0 +1,181 @@
+"""Live option chain around ATM for the current and next expiry.
+
+Runs inside the spot feeder and shares its websocket: every index tick moves
+the reference spot, and every option tick updates one cell of the columnar
+chain table (market_data/option_chain.py) in place. A background thread
+re-centres the subscribed strike window when ATM drifts and publishes one
+OPTION_CHAIN:{INDEX} JSON blob per underlying for the UI and other hosts.
+"""
+import logging
+import threading
+import time
+
+from market_data.option_chain import (
+    CE, EXPIRIES, PE, ChainStore, chain_key, chain_to_blob,
+)
+from market_data.ticks import INDEX_TOKENS
+from utils.contract_index import OPTION_SEGMENT, REDIS_KEY_OPT_TOKEN, build_contract_key
+from utils.contract_meta import get_contract_metadata
+
+# Strikes each side of ATM
+DEFAULT_WIDTH = 15
+
+# Re-centre once ATM has moved this fraction of the width away from the window centre
+RECENTER_FRACTION = 0.25
+
+RECENTER_INTERVAL = 5.0
+PUBLISH_INTERVAL = 1.0
+
+
+class OptionChainService:
+    """Keeps the chain table subscribed and current for each underlying."""
+
+    def __init__(self, redis_client, feed, indices=("NIFTY", "BANKNIFTY"), width=DEFAULT_WIDTH,
+                 shared=True, recenter_interval=RECENTER_INTERVAL, publish_interval=PUBLISH_INTERVAL):
+        """Initialize option chain service.
+
+        Args:
+            redis_client: Redis client instance
+            feed: NeoFeed (or ReplayFeed) the option tokens are subscribed on
+            indices: Underlyings to track
+            width: Strikes each side of ATM
+            shared: Put the chain tables in shared memory
+            recenter_interval: Seconds between ATM drift checks
+            publish_interval: Seconds between Redis snapshot blobs
+        """
+        self.redis_client = redis_client
+        self.feed = feed
+        self.indices = tuple(indices)
+        self.width = width
+        self.recenter_interval = recenter_interval
+        self.publish_interval = publish_interval
+
+        self.stores = {index: ChainStore.create(index, max(2 * width + 1, 1), shared=shared)
+                       for index in self.indices}
+        self._spot = {}
+        self._center = {}             # index -> (expiries, ATM strike)
+        self._cells = {}              # token -> (index, slot, side, k)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Ticks (websocket thread)
+    # ------------------------------------------------------------------
+    def on_tick(self, tick):
+        """Feeder tick hook."""
+        if tick["kind"] == "index":
+            index = INDEX_TOKENS.get(tick["tk"])
+            if index in self.stores and tick["ltp"] is not None:
+                self._spot[index] = tick["ltp"]
+            return
+
+        # Looked up under the lock: a re-centre may be moving this token's cell
+        with self._lock:
+            cell = self._cells.get(tick["tk"])
+            if cell is None:
+                return
+            index, slot, side, k = cell
+            self.stores[index].update(
+                slot, side, k, ltp=tick["ltp"], oi=tick["oi"], volume=tick["v"],
+                bid=tick.get("bid"), ask=tick.get("ask"), ts=tick["recv_ts"],
+            )
+
+    # ------------------------------------------------------------------
+    # Window management
+    # ------------------------------------------------------------------
+    def recenter(self):
+        """Re-subscribe any underlying whose ATM or expiries moved."""
+        meta = get_contract_metadata(self.redis_client)
+        for index in self.indices:
+            spot = self._spot.get(index)
+            if spot is None:
+                continue
+
+            expiries = (meta.current_weekly_expiry(index), meta.next_weekly_expiry(index))[:EXPIRIES]
+            atm = meta.contracts.nearest_strike(index, expiries[0], "CE", spot) if expiries[0] else None
+            if atm is None:
+                continue
+
+            previous = self._center.get(index)
+            if previous and previous[0] == expiries:
+                strikes = meta.contracts.strikes(index, expiries[0], "CE")
+                try:
+                    drift = abs(strikes.index(atm) - strikes.index(previous[1]))
+                except ValueError:
+                    drift = self.width
+                if drift < max(1, int(self.width * RECENTER_FRACTION)):
+                    continue
+
+            self._resubscribe(index, expiries, spot, meta.contracts)
+            self._center[index] = (expiries, atm)
+
+    def _resubscribe(self, index, expiries, spot, contracts):
+        layouts = []
+        keys = []
+        for slot, expiry in enumerate(expiries):
+            strikes = contracts.strikes_around(index, expiry, "CE", spot, self.width) if expiry else []
+            layouts.append((slot, expiry, strikes))
+            for k, strike in enumerate(strikes):
+                for side, option_type in ((CE, "CE"), (PE, "PE")):
+                    keys.append(((slot, side, k), build_contract_key(index, expiry, option_type, strike)))
+
+        tokens = self.redis_client.hmget(REDIS_KEY_OPT_TOKEN, [key for _, key in keys]) if keys else []
+        cells = {}
+        for ((slot, side, k), key), token in zip(keys, tokens):
+            if token:
+                cells[str(token)] = (index, slot, side, k)
+
+        old = {tk for tk, cell in self._cells.items() if cell[0] == index}
+        added = [tk for tk in cells if tk not in old]
+        removed = [tk for tk in old if tk not in cells]
+
+        with self._lock:
+            for slot, expiry, strikes in layouts:
+                self.stores[index].set_layout(slot, expiry, strikes)
+            self._cells = {tk: cell for tk, cell in self._cells.items() if cell[0] != index}
+            self._cells.update(cells)
+
+        if removed:
+            self.feed.unsubscribe([{"instrument_token": tk, "exchange_segment": OPTION_SEGMENT} for tk in removed])
+        if added:
+            self.feed.subscribe([{"instrument_token": tk, "exchange_segment": OPTION_SEGMENT} for tk in added])
+
+        missing = len(keys) - len(cells)
+        logging.info(
+            f"[CHAIN] {index} around {spot}: {expiries}, {len(cells)} contracts "
+            f"(+{len(added)} / -{len(removed)}{f', {missing} without token' if missing else ''})"
+        )
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self):
+        """Write one consistent snapshot blob per underlying."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for index, store in self.stores.items():
+            chain = store.snapshot()
+            if chain:
+                pipe.set(chain_key(index), chain_to_blob(index, chain, self._spot.get(index)))
+        pipe.execute()
+
+    def run_forever(self):
+        last_recenter = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now - last_recenter >= self.recenter_interval:
+                    last_recenter = now
+                    self.recenter()
+                self.publish()
+            except Exception as e:
+                logging.error(f"[CHAIN] {e}")
+            time.sleep(self.publish_interval)
+
+    def start(self):
+        """Run re-centring and publishing in a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, name="option-chain", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        for store in self.stores.values():
+            store.close()
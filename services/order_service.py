@@ -3,58 +3,192 @@ import logging
 import json
 import time
 from utils.telegram_notifier import send_telegram
+from utils.contract_index import REDIS_KEY_OPT, get_contract_index
+from utils.contract_meta import get_contract_metadata
+from utils.latency import load_stamps, register_pending, stamp
 from utils.oi_positions import (
     get_position,
     add_position,
-    remove_position
+    remove_position,
+    set_position_legs
 )
 
+# Per-UID kill switch: "OFF" sends MARKET legs as MKT even when depth is available
+DEPTH_PRICING_FIELD = "DEPTH_PRICING"
 
+# Protection band beyond the touch: max(ticks * tick size, pct * microprice)
+PROTECTION_TICKS = 2
+PROTECTION_PCT = 0.01
+
+# Depth at order time, one JSON entry per placed slice (for slippage analysis)
+REDIS_KEY_DEPTH_LOG = "ORDER_DEPTH_LOG"
+DEPTH_LOG_SIZE = 5000
+
+
+def order_numbers(res):
+    """Every broker order number of a place_single_leg result, comma separated."""
+    return ", ".join(str(n) for n in res.get("order_nos") or [] if n) or "Unknown"
 
 
 class OrderService:
     """Handles all order placement operations using Kotak Neo API."""
     
-    def __init__(self, client, redis_client, uid):
+    def __init__(self, client, redis_client, uid, depth_service=None, contract_meta=None):
         """Initialize order service.
         
         Args:
             client: NeoAPI client instance (authenticated)
             redis_client: Redis client instance
             uid: User ID
+            depth_service: Optional DepthService for book-aware pricing
+            contract_meta: ContractMetadata to use instead of the process-wide
+                one (replay pins it to the replayed day)
         """
         # XTS → KOTAK NEO REPLACEMENT: renamed xt to client
         self.client = client
         self.redis_client = redis_client
         self.uid = uid
+        self.depth_service = depth_service
+        self.contract_meta = contract_meta
+    
+    def _resolve_trading_symbol(self, leg):
+        """Resolve a leg's tradingSymbol from the in-memory contract index.
+        
+        Falls back to a direct NEO_INSTR_OPT lookup only if the contract is not
+        in the loaded index (e.g. master refreshed after this process started).
+        
+        Args:
+            leg: Dictionary with Index, Expiry, OptionType and Strike
+            
+        Returns:
+            str or None: Trading symbol if the contract is listed
+        """
+        contracts = get_contract_index(self.redis_client)
+        trading_symbol = contracts.trading_symbol(
+            leg["Index"], leg["Expiry"], leg["OptionType"].upper(), leg["Strike"]
+        )
+        if trading_symbol:
+            return trading_symbol
+        
+        redis_key = f"{leg['Index']}_{leg['Expiry']}_{leg['OptionType'].upper()}_{leg['Strike']}"
+        return self.redis_client.hget(REDIS_KEY_OPT, redis_key)
+    
+    def _leg_depth(self, leg):
+        """Depth metrics for a leg (None without a depth service or a fresh book)."""
+        if self.depth_service is None:
+            return None
+        try:
+            return self.depth_service.quote(leg)
+        except Exception as e:
+            logging.error(f"[DEPTH] Quote failed for {leg.get('Index')} {leg.get('Strike')}: {e}")
+            return None
+    
+    def _depth_limit_price(self, leg, side, qty, depth, meta):
+        """Marketable limit price from the book: the touch plus a protection band.
+        
+        BUY pays at most best ask + band, SELL accepts at least best bid - band,
+        where band = max(PROTECTION_TICKS ticks, PROTECTION_PCT of microprice).
+        
+        Returns:
+            float: Limit price rounded to the contract's tick size
+        """
+        tick = meta.tick_size(leg["Index"])
+        band = max(PROTECTION_TICKS * tick, PROTECTION_PCT * depth["microprice"])
+        
+        if side == "BUY":
+            price = depth["ask"] + band
+            visible = depth["ask_size"]
+        else:
+            price = max(depth["bid"] - band, tick)
+            visible = depth["bid_size"]
+        
+        if qty > visible:
+            logging.warning(
+                f"[DEPTH] {side} {qty} exceeds visible size {visible:.0f} "
+                f"(top 5 levels); remainder may rest at {price}"
+            )
+        return meta.round_to_tick(leg["Index"], price)
     
-    def place_single_leg(self, leg):
+    def _log_depth(self, response, trading_symbol, side, qty, order_type, price, depth):
+        """Record the book seen when a slice was sent."""
+        entry = {
+            "ts": time.time(),
+            "order_no": response.get("nOrdNo") if isinstance(response, dict) else None,
+            "symbol": trading_symbol,
+            "side": side,
+            "qty": qty,
+            "order_type": order_type,
+            "price": float(price),
+            **{k: depth.get(k) for k in ("bid", "ask", "spread", "microprice", "bid_size", "ask_size")},
+            "book_age": round(time.time() - depth["ts"], 3),
+        }
+        logging.info(f"[DEPTH] {json.dumps(entry)}")
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.rpush(REDIS_KEY_DEPTH_LOG, json.dumps(entry))
+            pipe.ltrim(REDIS_KEY_DEPTH_LOG, -DEPTH_LOG_SIZE, -1)
+            pipe.execute()
+        except Exception as e:
+            logging.error(f"[DEPTH] Could not store depth log: {e}")
+    
+    def place_single_leg(self, leg, dry_run=False, depth_pricing=True):
         """Place one option leg with independent parameters.
         
         Args:
             leg: Dictionary containing leg parameters (Strike, Qty, Side, OptionType, Expiry, tradingSymbol)
+            dry_run: Run symbol resolution and validation but skip the broker call
+            depth_pricing: Allow a MARKET leg to go as a depth-priced limit order;
+                False keeps it MKT (callers that treat the ack as the fill)
             
         Returns:
-            dict: Response from Neo API
+            dict: Response from Neo API. "order_nos" lists every placed slice;
+            when a later slice fails the result is an error that still carries
+            the slices already live ("order_nos", "placed_qty")
         """
         # SAFETY CHECK: Ensure client is authenticated
-        if self.client is None:
+        if self.client is None and not dry_run:
             logging.error("[FATAL] NeoAPI client is None - not authenticated")
             return {"type": "error", "description": "Client not authenticated"}
         
         strike = leg["Strike"]
         qty = int(leg["Qty"])
+        meta = self.contract_meta or get_contract_metadata(self.redis_client)
+
+        # Lot/freeze validation is local (metadata cached in memory)
+        try:
+            lot_size = meta.lot_size(leg["Index"])
+        except KeyError:
+            lot_size = None
+        if lot_size and qty % lot_size != 0:
+            logging.error(f"[ERROR] Qty {qty} is not a multiple of {leg['Index']} lot size {lot_size}")
+            return {"type": "error", "description": f"Qty {qty} is not a multiple of lot size {lot_size}"}
+        slices = meta.split_by_freeze(leg["Index"], qty) if lot_size else [qty]
 
         exec_type = leg.get("ExecutionType", "MARKET")
         # XTS → KOTAK NEO REPLACEMENT: Neo uses "L" for LIMIT, "MKT" for MARKET
         if exec_type == "LIMIT":
             order_type = "L"
-            limit_price = str(leg.get("LimitPrice", 0))
+            limit_price = float(leg.get("LimitPrice", 0))
+            if lot_size:
+                limit_price = meta.round_to_tick(leg["Index"], limit_price)
+            limit_price = str(limit_price)
         else:
             order_type = "MKT"
             limit_price = "0"
 
         side = leg["Side"].upper()  # BUY / SELL
+        
+        # Book at decision time: prices MARKET legs (unless DEPTH_PRICING is
+        # OFF or the caller needs MKT) and is logged with every slice either way
+        depth = self._leg_depth(leg)
+        if depth and depth_pricing and order_type == "MKT" and lot_size \
+                and self.redis_client.hget(self.uid, DEPTH_PRICING_FIELD) != "OFF":
+            order_type = "L"
+            limit_price = str(self._depth_limit_price(leg, side, qty, depth, meta))
+            logging.info(
+                f"[DEPTH] {side} {leg['Strike']}{leg['OptionType']} bid={depth['bid']} ask={depth['ask']} "
+                f"micro={depth['microprice']} → limit {limit_price}"
+            )
         opt = leg["OptionType"].upper()  # CE / PE
         expiry_raw = leg["Expiry"]  # YYYY-MM-DD
         
@@ -62,10 +196,8 @@ class OrderService:
         trading_symbol = leg.get("tradingSymbol")
         
         if not trading_symbol:
-            # Fallback: Build from Redis lookup (NEO_INSTR_OPT)
-            # XTS → KOTAK NEO REPLACEMENT: Using NEO_INSTR_OPT instead of XTS_INSTR
-            redis_key = f"{leg['Index']}_{expiry_raw}_{opt}_{strike}"
-            trading_symbol = self.redis_client.hget("NEO_INSTR_OPT", redis_key)
+            # Fallback: contract index built from NEO_INSTR_OPT
+            trading_symbol = self._resolve_trading_symbol(leg)
             
         if not trading_symbol:
             logging.error(f"[ERROR] Missing tradingSymbol for leg: {leg}")
@@ -74,49 +206,98 @@ class OrderService:
         logging.info(f"Using tradingSymbol = {trading_symbol}")
         logging.info(f"[EXEC] {side} {opt} {strike} {expiry_raw} Qty={qty}")
         
+        if len(slices) > 1:
+            logging.info(f"[ORDER] Qty {qty} above freeze limit, slicing into {slices}")
+        
+        if dry_run:
+            logging.info(f"[DRY RUN] Would place {side} {trading_symbol} slices={slices} type={order_type} price={limit_price}")
+            return {
+                "type": "dry_run",
+                "result": {
+                    "tradingSymbol": trading_symbol,
+                    "slices": slices,
+                    "order_type": order_type,
+                    "price": limit_price,
+                    "depth": depth
+                }
+            }
+        
         # XTS → KOTAK NEO REPLACEMENT: Neo place_order call
-        try:
-            logging.info(f"[ORDER] Placing: symbol={trading_symbol}, side={side}, qty={qty}, type={order_type}")
-            
-            response = self.client.place_order(
-                exchange_segment="nse_fo",
-                product="NRML",
-                price=limit_price,
-                order_type=order_type,
-                quantity=str(qty),
-                validity="DAY",
-                trading_symbol=trading_symbol,
-                transaction_type="B" if side == "BUY" else "S",
-                amo="NO",
-                disclosed_quantity="0",
-                market_protection="0",
-                pf="N",
-                trigger_price="0",
-                tag=f"LEG-{int(time.time()*1000)}"
+        responses = []
+        placed_qty = 0
+
+        def failed(description):
+            """Error result that keeps the slices already placed at the broker."""
+            if not responses:
+                return {"type": "error", "description": description}
+            order_nos = [r.get("nOrdNo") for r in responses]
+            logging.error(
+                f"[ORDER PARTIAL] {trading_symbol}: {placed_qty}/{qty} placed as {order_nos} before failure"
             )
+            return {
+                "type": "error",
+                "description": f"{description} (after {placed_qty}/{qty} placed: {', '.join(map(str, order_nos))})",
+                "result": responses[0],
+                "slices": responses,
+                "order_nos": order_nos,
+                "placed_qty": placed_qty,
+            }
+
+        try:
+            for slice_qty in slices:
+                logging.info(f"[ORDER] Placing: symbol={trading_symbol}, side={side}, qty={slice_qty}, type={order_type}")
+                
+                response = self.client.place_order(
+                    exchange_segment="nse_fo",
+                    product="NRML",
+                    price=limit_price,
+                    order_type=order_type,
+                    quantity=str(slice_qty),
+                    validity="DAY",
+                    trading_symbol=trading_symbol,
+                    transaction_type="B" if side == "BUY" else "S",
+                    amo="NO",
+                    disclosed_quantity="0",
+                    market_protection="0",
+                    pf="N",
+                    trigger_price="0",
+                    tag=f"LEG-{int(time.time()*1000)}"
+                )
+                
+                # DEFENSIVE: Log full response for debugging
+                logging.info(f"[Neo Response] {json.dumps(response) if isinstance(response, dict) else response}")
+                
+                # SAFETY CHECK: Handle None response
+                if response is None:
+                    logging.error("[ERROR] Neo API returned None response")
+                    return failed("Neo API returned empty response")
+                
+                # SAFETY CHECK: Handle error responses
+                if response.get("Error") or response.get("stat") == "Not_Ok":
+                    error_msg = response.get("Error Message") or response.get("message") or response.get("emsg") or str(response)
+                    logging.error(f"[ORDER REJECTED] {error_msg}")
+                    return failed(error_msg)
+                
+                responses.append(response)
+                placed_qty += slice_qty
+                if depth:
+                    self._log_depth(response, trading_symbol, side, slice_qty, order_type, limit_price, depth)
             
-            # DEFENSIVE: Log full response for debugging
-            logging.info(f"[Neo Response] {json.dumps(response) if isinstance(response, dict) else response}")
-            
-            # SAFETY CHECK: Handle None response
-            if response is None:
-                logging.error("[ERROR] Neo API returned None response")
-                return {"type": "error", "description": "Neo API returned empty response"}
-            
-            # SAFETY CHECK: Handle error responses
-            if response.get("Error") or response.get("stat") == "Not_Ok":
-                error_msg = response.get("Error Message") or response.get("message") or response.get("emsg") or str(response)
-                logging.error(f"[ORDER REJECTED] {error_msg}")
-                return {"type": "error", "description": error_msg}
-            
-            # Success path
-            order_no = response.get("nOrdNo", "Unknown")
-            logging.info(f"[ORDER SUCCESS] Order placed: {order_no}")
-            return {"type": "success", "result": response}
+            # Success path (first slice's order number is the reference)
+            order_nos = [r.get("nOrdNo") for r in responses]
+            logging.info(f"[ORDER SUCCESS] Order placed: {order_nos[0]} ({len(responses)} slice(s): {order_nos})")
+            return {"type": "success", "result": responses[0], "slices": responses,
+                    "order_nos": order_nos, "placed_qty": placed_qty}
                 
         except Exception as e:
             logging.error(f"[ORDER EXCEPTION] Failed to place order: {e}", exc_info=True)
-            return {"type": "error", "description": str(e)}
+            return failed(str(e))
+
+    def _register_orders(self, res, index, trading_symbol, stamps):
+        """Park every placed slice for the latency join (partial placements included)."""
+        for order_no in res.get("order_nos") or []:
+            if order_no:
+                register_pending(self.redis_client, order_no, index, trading_symbol, stamps)
 
     def _execute_squareoff_leg(self, leg):
         try:
@@ -191,24 +372,7 @@ class OrderService:
             for leg in legs:
                 logging.info(leg)
             
-            # BUY legs first → SELL legs later
-            buy_legs = [leg for leg in legs if leg["Side"].upper() == "BUY"]
-            sell_legs = [leg for leg in legs if leg["Side"].upper() == "SELL"]
-            
-            results = []
-            
-            logging.info("\n[INFO] Executing BUY Legs:")
-            for leg in buy_legs:
-                res = self.place_single_leg(leg)
-                results.append(res)
-            
-            # Wait 1 second before SELL legs
-            time.sleep(1)
-            
-            logging.info("\n[INFO] Executing SELL Legs:")
-            for leg in sell_legs:
-                res = self.place_single_leg(leg)
-                results.append(res)
+            results = self._place_legs(legs)
             
             # Check if any failed
             errors = [r for r in results if r.get("type") != "success"]
@@ -218,7 +382,8 @@ class OrderService:
                 send_telegram(f"Multi-Leg Order FAILED ❌\nReason: {msg}")
 
             else:
-                self.redis_client.hset(self.uid, mapping={status_key: "SUCCESS", msg_key: "All legs placed successfully"})
+                placed = "; ".join(order_numbers(r) for r in results)
+                self.redis_client.hset(self.uid, mapping={status_key: "SUCCESS", msg_key: f"All legs placed successfully: {placed}"})
                 send_telegram(f"Multi-Leg Order Executed ✔️ ({order_key})")
 
         
@@ -232,6 +397,34 @@ class OrderService:
             # Clear legs to prevent re-execution
             self.redis_client.hdel(self.uid, order_key)
     
+    def _place_legs(self, legs, depth_pricing=True):
+        """Place legs BUY first, then SELL legs after a 1 second pause.
+        
+        Args:
+            legs: Legs with Side, Qty and contract fields
+            depth_pricing: Passed to place_single_leg
+            
+        Returns:
+            list: place_single_leg results, in the order of `legs`
+        """
+        buy = [i for i, leg in enumerate(legs) if leg["Side"].upper() == "BUY"]
+        sell = [i for i, leg in enumerate(legs) if leg["Side"].upper() == "SELL"]
+        results = [None] * len(legs)
+        
+        logging.info("\n[INFO] Executing BUY Legs:")
+        for i in buy:
+            results[i] = self.place_single_leg(legs[i], depth_pricing=depth_pricing)
+        
+        # Hedges first, so the SELL legs get the margin benefit
+        if buy and sell:
+            time.sleep(1)
+        
+        logging.info("\n[INFO] Executing SELL Legs:")
+        for i in sell:
+            results[i] = self.place_single_leg(legs[i], depth_pricing=depth_pricing)
+        
+        return [res for res in results if res is not None]
+    
     def process_single_order(self):
         """Process single leg order if requested."""
         if self.redis_client.hget(self.uid, "PLACE_SINGLE") != "requested":
@@ -262,7 +455,7 @@ class OrderService:
                         # XTS → KOTAK NEO REPLACEMENT: Neo uses nOrdNo instead of AppOrderID
                         self.redis_client.hset(self.uid, mapping={
                             "STATUS_SINGLE": "SUCCESS",
-                            "MSG_SINGLE": f"Order Placed: {res.get('result', {}).get('nOrdNo', 'Unknown')}"
+                            "MSG_SINGLE": f"Order Placed: {order_numbers(res)}"
                         })
                         send_telegram(
                             f"Order Executed ✔️\n"
@@ -341,7 +534,12 @@ class OrderService:
         qty = int(order_data["qty"])
         side = order_data["side"].upper()
         product = order_data["product"]
-        trading_symbol = order_data.get("tradingSymbol") or symbol
+        
+        # Symbol -> tradingSymbol from the nse_cm master (NEO_INSTR_EQ)
+        trading_symbol = order_data.get("tradingSymbol") or self.redis_client.hget("NEO_INSTR_EQ", symbol)
+        if not trading_symbol:
+            logging.error(f"[ERROR] Equity symbol {symbol} not found in NEO_INSTR_EQ")
+            return {"type": "error", "description": f"Symbol {symbol} not found in NEO_INSTR_EQ"}
         
         logging.info(f"[EXEC-EQUITY] {side} {symbol} Qty={qty} Product={product}")
         
@@ -434,9 +632,14 @@ class OrderService:
             # Set fetched
             self.redis_client.hset(self.uid, mapping={"PLACE_EQUITY": "fetched"})
 
-    def process_oi_crossover_order(self):
-        """Process OI crossover auto trade."""
-        if self.redis_client.hget(self.uid, "PLACE_OI_CROSSOVER") != "requested":
+    def process_oi_crossover_order(self, leg=None):
+        """Process OI crossover auto trade.
+
+        Args:
+            leg: Order payload handed over in-process (oi_pipeline.py); when
+                given, the PLACE_OI_CROSSOVER request flag is not checked
+        """
+        if leg is None and self.redis_client.hget(self.uid, "PLACE_OI_CROSSOVER") != "requested":
             return
 
         self.redis_client.hset(
@@ -448,11 +651,15 @@ class OrderService:
         )
 
         try:
-            raw = self.redis_client.hget(self.uid, "OI_CROSSOVER_ORDER")
-            if not raw:
-                raise ValueError("OI_CROSSOVER_ORDER missing")
+            if leg is None:
+                raw = self.redis_client.hget(self.uid, "OI_CROSSOVER_ORDER")
+                if not raw:
+                    raise ValueError("OI_CROSSOVER_ORDER missing")
+                leg = json.loads(raw)
+
+            # Latency stamps travel with the order, not into positions / exit legs
+            stamps = stamp(load_stamps(leg.pop("stamps", None)), "agent")
 
-            leg = json.loads(raw)
             index = leg["Index"]
             new_direction = leg["direction"]
 
@@ -484,61 +691,56 @@ class OrderService:
                     exit_leg = old_leg.copy()
                     exit_leg["Side"] = "BUY" if old_leg["Side"] == "SELL" else "SELL"
 
-                    redis_key = (
-                        f"{exit_leg['Index']}_"
-                        f"{exit_leg['Expiry']}_"
-                        f"{exit_leg['OptionType']}_"
-                        f"{exit_leg['Strike']}"
-                    )
-
-                    # XTS → KOTAK NEO REPLACEMENT: Using NEO_INSTR_OPT instead of XTS_INSTR
-                    trading_sym = self.redis_client.hget("NEO_INSTR_OPT", redis_key)
+                    trading_sym = self._resolve_trading_symbol(exit_leg)
                     if trading_sym is None:
-                        raise ValueError(f"tradingSymbol not found for exit {redis_key}")
+                        raise ValueError(
+                            f"tradingSymbol not found for exit "
+                            f"{exit_leg['Index']} {exit_leg['Expiry']} {exit_leg['OptionType']} {exit_leg['Strike']}"
+                        )
 
                     exit_leg["tradingSymbol"] = trading_sym
                     exit_legs.append(exit_leg)
 
-                # Fire EXIT as multi-leg
-                self.redis_client.hset(
-                    self.uid,
-                    mapping={
-                        "PLACE_MULTI": "requested",
-                        "MULTI_LEGS": json.dumps(exit_legs),
-                        "STATUS_MULTI": "PROCESSING"
-                    }
-                )
-
-                # Block until exit completes
-                timeout = 15
-                start = time.time()
-                while time.time() - start < timeout:
-                    status = self.redis_client.hget(self.uid, "STATUS_MULTI")
-                    if status == "SUCCESS":
-                        remove_position(index)
-                        break
-                    if status == "FAILED":
-                        raise ValueError("Exit failed. Aborting new entry.")
-                    time.sleep(0.5)
+                # Placed right here rather than through PLACE_MULTI: the agent
+                # serves that flag from this same thread (the wait could never
+                # see it done), and a pipeline process requesting it raced the
+                # agent's own multi-leg pass for the legs
+                # MKT: the position is dropped on the ack, a resting limit would leave it open
+                results = self._place_legs(exit_legs, depth_pricing=False)
+
+                # Whatever did not close (rejected legs, unplaced slices) stays open
+                remaining = []
+                for old_leg, res in zip(live_pos["legs"], results):
+                    qty = int(old_leg["Qty"])
+                    closed = qty if res.get("type") == "success" else int(res.get("placed_qty") or 0)
+                    if closed < qty:
+                        remaining.append({**old_leg, "Qty": qty - closed})
+                    logging.info(f"[OI AUTO] Exit {old_leg.get('tradingSymbol')}: {closed}/{qty} {order_numbers(res)}")
+
+                if remaining:
+                    set_position_legs(index, remaining)
+                    errors = [r.get("description", "Unknown") for r in results if r.get("type") != "success"]
+                    raise ValueError(f"Exit failed ({errors[0]}). Aborting new entry.")
+                remove_position(index)
 
             # ==================================================
             # 🟢 NORMAL SELL FLOW
             # ==================================================
-            redis_key = (
-                f"{leg['Index']}_"
-                f"{leg['Expiry']}_"
-                f"{leg['OptionType']}_"
-                f"{leg['Strike']}"
-            )
-
-            # XTS → KOTAK NEO REPLACEMENT: Using NEO_INSTR_OPT instead of XTS_INSTR
-            trading_symbol = self.redis_client.hget("NEO_INSTR_OPT", redis_key)
+            trading_symbol = self._resolve_trading_symbol(leg)
             if trading_symbol is None:
-                raise ValueError(f"tradingSymbol not found for {redis_key}")
+                raise ValueError(
+                    f"tradingSymbol not found for "
+                    f"{leg['Index']} {leg['Expiry']} {leg['OptionType']} {leg['Strike']}"
+                )
 
             leg["tradingSymbol"] = trading_symbol
 
-            res = self.place_single_leg(leg)
+            # MKT: the OI flow treats the broker ack as the fill
+            stamp(stamps, "sent")
+            res = self.place_single_leg(leg, depth_pricing=False)
+            stamp(stamps, "ack")
+
+            self._register_orders(res, index, trading_symbol, stamps)
 
             if res.get("type") == "success":
                 self.redis_client.hset("NIFTY_OI_SIGNAL", "status", "CONSUMED")
@@ -555,7 +757,7 @@ class OrderService:
                     self.uid,
                     mapping={
                         "STATUS_OI_CROSSOVER": "SUCCESS",
-                        "MSG_OI_CROSSOVER": f"Order placed: {res.get('result', {}).get('nOrdNo')}"
+                        "MSG_OI_CROSSOVER": f"Order placed: {order_numbers(res)}"
                     }
                 )
                 send_telegram(
@@ -563,6 +765,13 @@ class OrderService:
                 )
 
             else:
+                if res.get("placed_qty"):
+                    # Slices already live at the broker stay tracked so the next exit closes them
+                    add_position(
+                        index=index,
+                        direction=new_direction,
+                        legs=[{**leg, "Qty": res["placed_qty"]}]
+                    )
                 send_telegram(f"[OI AUTO] ❌ Failed: {res.get('description')}")
                 raise ValueError(res.get("description", "Unknown error"))
 
@@ -580,9 +789,14 @@ class OrderService:
             self.redis_client.hset(self.uid, "PLACE_OI_CROSSOVER", "fetched")
             self.redis_client.hdel(self.uid, "OI_CROSSOVER_ORDER")
 
-    def process_bn_oi_crossover_order(self):
-        """Process BANKNIFTY OI crossover auto trade."""
-        if self.redis_client.hget(self.uid, "PLACE_BN_OI_CROSSOVER") != "requested":
+    def process_bn_oi_crossover_order(self, leg=None):
+        """Process BANKNIFTY OI crossover auto trade.
+
+        Args:
+            leg: Order payload handed over in-process (oi_pipeline.py); when
+                given, the PLACE_BN_OI_CROSSOVER request flag is not checked
+        """
+        if leg is None and self.redis_client.hget(self.uid, "PLACE_BN_OI_CROSSOVER") != "requested":
             return
 
         self.redis_client.hset(
@@ -594,29 +808,31 @@ class OrderService:
         )
 
         try:
-            raw = self.redis_client.hget(self.uid, "BN_OI_CROSSOVER_ORDER")
-            if not raw:
-                raise ValueError("BN_OI_CROSSOVER_ORDER missing")
+            if leg is None:
+                raw = self.redis_client.hget(self.uid, "BN_OI_CROSSOVER_ORDER")
+                if not raw:
+                    raise ValueError("BN_OI_CROSSOVER_ORDER missing")
+                leg = json.loads(raw)
 
-            leg = json.loads(raw)
+            stamps = stamp(load_stamps(leg.pop("stamps", None)), "agent")
 
             logging.info(f"[BN OI AUTO] Executing: {leg}")
 
-            redis_key = (
-                f"{leg['Index']}_"
-                f"{leg['Expiry']}_"
-                f"{leg['OptionType']}_"
-                f"{leg['Strike']}"
-            )
-
-            # XTS → KOTAK NEO REPLACEMENT: Using NEO_INSTR_OPT instead of XTS_INSTR
-            trading_symbol = self.redis_client.hget("NEO_INSTR_OPT", redis_key)
+            trading_symbol = self._resolve_trading_symbol(leg)
             if trading_symbol is None:
-                raise ValueError(f"tradingSymbol not found for {redis_key}")
+                raise ValueError(
+                    f"tradingSymbol not found for "
+                    f"{leg['Index']} {leg['Expiry']} {leg['OptionType']} {leg['Strike']}"
+                )
 
             leg["tradingSymbol"] = trading_symbol
 
-            res = self.place_single_leg(leg)
+            # MKT: the OI flow treats the broker ack as the fill
+            stamp(stamps, "sent")
+            res = self.place_single_leg(leg, depth_pricing=False)
+            stamp(stamps, "ack")
+
+            self._register_orders(res, leg["Index"], trading_symbol, stamps)
 
             if res.get("type") == "success":
                 # Consume BANKNIFTY signal ONLY on success
@@ -627,7 +843,7 @@ class OrderService:
                     self.uid,
                     mapping={
                         "STATUS_BN_OI_CROSSOVER": "SUCCESS",
-                        "MSG_BN_OI_CROSSOVER": f"Order placed: {res.get('result', {}).get('nOrdNo')}"
+                        "MSG_BN_OI_CROSSOVER": f"Order placed: {order_numbers(res)}"
                     }
                 )
                 send_telegram(
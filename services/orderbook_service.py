@@ -45,6 +45,10 @@ class OrderbookService:
         # Fetch and save orderbook
         self._fetch_and_save_orderbook()
     
+    def prefetch(self):
+        """Fetch orderbook now, without a UI request (pre-open warm-up)."""
+        self._fetch_and_save_orderbook()
+    
     def _fetch_and_save_orderbook(self):
         """Fetch orderbook from Neo API and save to CSV."""
         # SAFETY CHECK: Ensure client is authenticated
@@ -0,0 +1,158 @@
+"""Live LTP cache for open positions, fed by the Neo websocket."""
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from market_data.neo_feed import shared_feed
+
+# Per-UID hash field holding {trading symbol: {"ltp", "ts", "tk"}} as one JSON blob
+POSITION_LTP_FIELD = "POSITION_LTP"
+
+# Minimum seconds between blob publishes (ticks in between are coalesced)
+PUBLISH_INTERVAL = 0.25
+
+# Position CSV columns: Neo names first, legacy XTS names as fallback
+TOKEN_COLUMNS = ("tok", "ExchangeInstrumentId")
+SEGMENT_COLUMNS = ("exSeg", "ExchangeSegment")
+SYMBOL_COLUMNS = ("trdSym", "TradingSymbol")
+
+
+def _first_column(df, candidates):
+    for col in candidates:
+        if col in df.columns:
+            return col
+    return None
+
+
+class PositionLtpService:
+    """Subscribes to every open position's token and publishes live LTPs.
+
+    The positions CSV written by PositionService is the source of truth for
+    which tokens are open; whenever it changes the websocket subscription is
+    diffed against it. Ticks update an in-memory map, and the whole map is
+    written to the UID hash as one POSITION_LTP blob so the UI reads all
+    position prices with a single HGET. The websocket is the client's shared
+    feed; this service only listens to its own tokens.
+    """
+
+    def __init__(self, auth_service, redis_client, uid, position_file, publish_interval=PUBLISH_INTERVAL):
+        """Initialize position LTP service.
+
+        Args:
+            auth_service: NeoAuthService instance (client used for the websocket)
+            redis_client: Redis client instance
+            uid: User ID
+            position_file: Path to position CSV file
+            publish_interval: Minimum seconds between Redis publishes
+        """
+        self.auth_service = auth_service
+        self.redis_client = redis_client
+        self.uid = uid
+        self.position_file = position_file
+        self.publish_interval = publish_interval
+
+        self.feed = shared_feed(auth_service, self._client)
+        self._positions_mtime = None
+        self._tokens = {}            # (segment, token) -> trading symbol
+        self._ltp = {}               # trading symbol -> {"ltp", "ts", "tk"}
+        self._lock = threading.Lock()
+        self._last_publish = 0.0
+        self._dirty = False
+
+    def _client(self):
+        return self.auth_service.client if self.auth_service.is_ready() else None
+
+    def process(self):
+        """Agent loop hook: follow position changes and flush coalesced ticks."""
+        self.sync_if_changed()
+        if self._dirty:
+            self._publish(force=True)
+
+    def sync_if_changed(self):
+        """Re-read positions when the CSV changed and update the subscription."""
+        if not self.auth_service.is_ready():
+            return
+
+        try:
+            mtime = os.path.getmtime(self.position_file)
+        except OSError:
+            return
+        if mtime == self._positions_mtime:
+            return
+        self._positions_mtime = mtime
+
+        wanted = self._read_position_tokens()
+        if wanted is None:
+            return
+
+        added = [k for k in wanted if k not in self._tokens]
+        removed = [k for k in self._tokens if k not in wanted]
+
+        with self._lock:
+            self._tokens = wanted
+            self._ltp = {sym: v for sym, v in self._ltp.items() if sym in wanted.values()}
+
+        if removed:
+            self.feed.unlisten([{"instrument_token": tk, "exchange_segment": seg} for seg, tk in removed],
+                               self._on_tick)
+        if added:
+            self.feed.listen([{"instrument_token": tk, "exchange_segment": seg} for seg, tk in added],
+                             self._on_tick)
+
+        logging.info(f"[POSITION LTP] Tracking {len(wanted)} tokens (+{len(added)} / -{len(removed)})")
+        self._publish(force=True)
+
+    def _read_position_tokens(self):
+        """Map (segment, token) -> trading symbol for every open position."""
+        try:
+            df = pd.read_csv(self.position_file, dtype=str)
+        except pd.errors.EmptyDataError:
+            return {}
+        except Exception as e:
+            logging.error(f"[POSITION LTP] Could not read positions: {e}")
+            return None
+
+        tok_col = _first_column(df, TOKEN_COLUMNS)
+        seg_col = _first_column(df, SEGMENT_COLUMNS)
+        sym_col = _first_column(df, SYMBOL_COLUMNS)
+        if df.empty or not (tok_col and seg_col and sym_col):
+            return {}
+
+        tokens = {}
+        for tok, seg, sym in zip(df[tok_col], df[seg_col], df[sym_col]):
+            if pd.isna(tok) or pd.isna(seg):
+                continue
+            tok = str(tok).split(".")[0]
+            tokens[(str(seg).lower(), tok)] = str(sym)
+        return tokens
+
+    def _on_tick(self, tick):
+        # Depth ticks on a shared token come from the depth books' subscription
+        if tick["kind"] == "depth" or tick["ltp"] is None:
+            return
+        symbol = self._tokens.get((str(tick["e"]).lower(), tick["tk"]))
+        if symbol is None:
+            return
+
+        with self._lock:
+            self._ltp[symbol] = {"ltp": tick["ltp"], "ts": tick["recv_ts"], "tk": tick["tk"]}
+            self._dirty = True
+        self._publish()
+
+    def _publish(self, force=False):
+        now = time.time()
+        if not force and now - self._last_publish < self.publish_interval:
+            return
+        self._last_publish = now
+
+        with self._lock:
+            blob = json.dumps(self._ltp)
+            self._dirty = False
+        try:
+            self.redis_client.hset(self.uid, POSITION_LTP_FIELD, blob)
+        except Exception as e:
+            logging.error(f"[POSITION LTP] Publish failed: {e}")
@@ -36,6 +36,10 @@ class PositionService:
         # Fetch and save positions
         self._fetch_and_save_positions()
     
+    def prefetch(self):
+        """Fetch positions now, without a UI request (pre-open warm-up)."""
+        self._fetch_and_save_positions()
+    
     def _fetch_and_save_positions(self):
         """Fetch positions from Neo API and save to CSV."""
         # SAFETY CHECK: Ensure client is authenticated
@@ -0,0 +1,228 @@
+"""Pre-open warm-up service that primes every cache before the market opens."""
+import logging
+import json
+import threading
+import time
+from datetime import datetime
+from utils.telegram_notifier import send_telegram
+from utils.contract_meta import get_contract_metadata
+from utils.questdb import get_questdb
+from utils.spot import get_spot
+
+DEFAULT_WARMUP_TIME = "09:05"
+
+# From market open on, a (re)started agent only reloads caches: no master
+# rebuild and no fresh login in the middle of the session
+MARKET_OPEN = "09:15"
+
+# Steps that must pass for the agent to report READY
+CRITICAL_STEPS = ("redis", "instruments", "login", "order_path")
+
+
+class WarmupService:
+    """Runs the daily warm-up stage and publishes a readiness report.
+
+    Steps (each timed and recorded):
+        imports      - import heavy modules the first order would otherwise load
+        redis        - round-trip to Redis
+        questdb      - open a keep-alive connection to QuestDB
+        instruments  - rebuild the instrument master and reload in-memory caches
+                       (reload only once the session is READY or the market is open)
+        login        - Neo TOTP login + MPIN validation if not already READY
+                       (before market open only)
+        positions / margins / orderbook - prefetch into the CSV caches
+        order_path   - dry-run an ATM leg through OrderService (no broker call)
+
+    The steps run in a background thread so the agent loop keeps processing
+    orders meanwhile.
+    """
+
+    def __init__(self, auth_service, redis_client, uid, config, services, order_service):
+        """Initialize warm-up service.
+
+        Args:
+            auth_service: NeoAuthService instance
+            redis_client: Redis client instance
+            uid: User ID
+            config: User config dict (consumer_key, optional warmup_time "HH:MM")
+            services: Dict of prefetch services {"positions": ..., "margins": ..., "orderbook": ...}
+            order_service: OrderService used for the dry-run order
+        """
+        self.auth_service = auth_service
+        self.redis_client = redis_client
+        self.uid = uid
+        self.config = config
+        self.services = services
+        self.order_service = order_service
+        self.warmup_time = config.get("warmup_time", DEFAULT_WARMUP_TIME)
+        self._last_run_date = None
+        self._thread = None
+
+    def _is_due(self):
+        """True once per day, at or after the configured warm-up time."""
+        now = datetime.now()
+        if self._last_run_date == now.date():
+            return False
+        return now.strftime("%H:%M") >= self.warmup_time
+
+    def _is_late(self):
+        """True when a full warm-up would disturb a running session."""
+        return self.auth_service.is_ready() or datetime.now().strftime("%H:%M") >= MARKET_OPEN
+
+    def run_if_due(self):
+        """Start warm-up when scheduled or when the UI sets WARMUP=requested."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        requested = self.redis_client.hget(self.uid, "WARMUP") == "requested"
+        if not requested and not self._is_due():
+            return
+
+        self._last_run_date = datetime.now().date()
+        self.redis_client.hset(self.uid, mapping={"WARMUP": "processing", "WARMUP_STATUS": "RUNNING"})
+        self._thread = threading.Thread(target=self._run_in_background, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run_in_background(self):
+        try:
+            self.run()
+        except Exception as e:
+            logging.error(f"[WARMUP] Failed: {e}", exc_info=True)
+            self.redis_client.hset(self.uid, "WARMUP_STATUS", "NOT_READY")
+        finally:
+            self.redis_client.hset(self.uid, "WARMUP", "fetched")
+
+    def _step(self, report, name, func):
+        """Run one step, recording ok/duration/detail without raising."""
+        start = time.perf_counter()
+        try:
+            detail = func()
+            ok = detail is not False
+        except Exception as e:
+            logging.error(f"[WARMUP] {name} failed: {e}", exc_info=True)
+            ok, detail = False, str(e)
+
+        report[name] = {
+            "ok": ok,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "detail": "" if detail in (None, True, False) else str(detail)
+        }
+        logging.info(f"[WARMUP] {name}: {'OK' if ok else 'FAILED'} ({report[name]['ms']} ms)")
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+    def _warm_imports(self):
+        import pandas  # noqa: F401
+        import numpy  # noqa: F401
+        import neo_api_client  # noqa: F401
+
+    def _warm_redis(self):
+        return self.redis_client.ping()
+
+    def _warm_questdb(self):
+        # Opens the shared client's pooled connection for the first real query
+        return get_questdb().ping(timeout=2)
+
+    def _warm_instruments(self):
+        if self._is_late():
+            # Mid-session: keep the published master, just make sure it is loaded
+            meta = get_contract_metadata(self.redis_client)
+            return f"{len(meta.contracts)} contracts (reloaded)" if len(meta.contracts) else False
+
+        # Imported lazily: instruments.py is also a standalone script
+        from instruments import refresh_instruments
+
+        count = refresh_instruments(self.config.get("consumer_key"))
+        meta = get_contract_metadata(self.redis_client, refresh=True)
+        if count == 0 or len(meta.contracts) == 0:
+            return False
+        return f"{len(meta.contracts)} contracts"
+
+    def _warm_login(self):
+        if not self.auth_service.is_ready():
+            if datetime.now().strftime("%H:%M") >= MARKET_OPEN:
+                # Logging in is left to the UI's login request once the market is open
+                return False
+            if not self.auth_service.login() or not self.auth_service.validate():
+                return False
+
+        # Hand the fresh client to every service before prefetching
+        client = self.auth_service.client
+        for service in list(self.services.values()) + [self.order_service]:
+            service.client = client
+
+    def _warm_positions(self):
+        self.services["positions"].prefetch()
+
+    def _warm_margins(self):
+        self.services["margins"].prefetch()
+
+    def _warm_orderbook(self):
+        self.services["orderbook"].prefetch()
+
+    def _warm_order_path(self):
+        meta = get_contract_metadata(self.redis_client)
+        expiry = meta.current_weekly_expiry("NIFTY")
+        if expiry is None:
+            return False
+
+        strikes = meta.contracts.strikes("NIFTY", expiry, "CE")
+        spot = get_spot(self.redis_client, "NIFTY", max_age=None) or strikes[len(strikes) // 2]
+
+        leg = {
+            "Index": "NIFTY",
+            "OrderType": "NRML",
+            "Qty": meta.qty_for_lots("NIFTY", 1),
+            "Side": "BUY",
+            "Expiry": expiry,
+            "Strike": meta.contracts.nearest_strike("NIFTY", expiry, "CE", spot),
+            "OptionType": "CE",
+        }
+        res = self.order_service.place_single_leg(leg, dry_run=True)
+        if res.get("type") != "dry_run":
+            return False
+        return res["result"]["tradingSymbol"]
+
+    def run(self):
+        """Run every warm-up step and publish the readiness report."""
+        logging.info(f"[WARMUP] Starting pre-open warm-up for {self.uid}")
+        started = time.perf_counter()
+        report = {}
+
+        self._step(report, "imports", self._warm_imports)
+        self._step(report, "redis", self._warm_redis)
+        self._step(report, "questdb", self._warm_questdb)
+        self._step(report, "instruments", self._warm_instruments)
+        self._step(report, "login", self._warm_login)
+        if report["login"]["ok"]:
+            self._step(report, "positions", self._warm_positions)
+            self._step(report, "margins", self._warm_margins)
+            self._step(report, "orderbook", self._warm_orderbook)
+        self._step(report, "order_path", self._warm_order_path)
+
+        failed = [name for name, step in report.items() if not step["ok"]]
+        status = "READY" if not any(name in CRITICAL_STEPS for name in failed) else "NOT_READY"
+        if status == "READY" and failed:
+            status = "DEGRADED"
+
+        summary = {
+            "status": status,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "failed": failed,
+            "steps": report
+        }
+
+        self.redis_client.hset(self.uid, mapping={
+            "WARMUP_STATUS": status,
+            "WARMUP_REPORT": json.dumps(summary)
+        })
+        logging.info(f"[WARMUP] {status} in {summary['total_ms']} ms; failed={failed}")
+
+        send_telegram(
+            f"🌅 <b>Pre-open warm-up: {status}</b>\n"
+            f"UID: {self.uid}\n"
+            f"Time: {summary['total_ms']:.0f} ms\n"
+            f"Failed: {', '.join(failed) if failed else 'none'}"
+        )
+        return summary
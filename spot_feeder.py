@@ -0,0 +1,184 @@
+"""Websocket spot feeder for NIFTY / BANKNIFTY.
+
+Subscribes to the Nifty 50 and Nifty Bank index feeds over the Kotak Neo
+websocket and publishes every tick to NF_SPOT / BN_SPOT plus the
+timestamped NF_SPOT_INFO / BN_SPOT_INFO hashes (see utils/spot.py). Every
+tick is also written to the shared-memory tick ring (market_data/shm_ring.py)
+for zero-copy reads by processes on the same host. Redis writes are
+conflated to the latest value per token and flushed at --redis-hz
+(default 4 Hz); --rate-cap overrides the rate for individual tokens.
+With --chain-width N the feeder also streams the option chain (N strikes
+each side of ATM, current and next expiry) into the chain tables of
+services/option_chain_service.py.
+
+Usage:
+    python spot_feeder.py <UID>                        # live feed
+    python spot_feeder.py <UID> --record ticks.jsonl   # live feed, record raw messages
+    python spot_feeder.py <UID> --replay ticks.jsonl [--speed 10]
+    python spot_feeder.py <UID> --redis-hz 4 --rate-cap "Nifty 50=10"
+    python spot_feeder.py <UID> --chain-width 15
+"""
+import argparse
+import json
+import logging
+import time
+
+from core.config import load_config
+from core.auth import AuthService
+from market_data.conflator import Conflator
+from market_data.neo_feed import NeoFeed
+from market_data.replay_feed import ReplayFeed
+from market_data.shm_ring import TickRing
+from market_data.ticks import INDEX_TOKENS
+from services.option_chain_service import OptionChainService
+from utils.logging_config import setup_logging
+from utils.redis_helper import get_redis_client
+from utils.spot import queue_spot
+
+# Index feeds (isIndex=True subscriptions use the index name as token)
+INDEX_SUBSCRIPTIONS = [
+    {"instrument_token": "Nifty 50", "exchange_segment": "nse_cm"},
+    {"instrument_token": "Nifty Bank", "exchange_segment": "nse_cm"},
+]
+
+# Feeder health hash (state, reconnects, last tick time, tick counters)
+REDIS_KEY_STATUS = "SPOT_FEEDER_STATUS"
+
+# Latest conflated value of every non-index token: token -> {"ltp", "oi", "v", "ts"}
+REDIS_KEY_FEED_LTP = "FEED_LTP"
+
+
+class SpotPublisher:
+    """Tick callback: every tick to the ring, conflated latest values to Redis.
+
+    The shared-memory ring gets every tick unthrottled (in-process watchers
+    read it), including partial OI/volume-only updates. Redis only gets the
+    latest merged value per token, flushed by a Conflator in one pipelined
+    batch per interval: index ticks to the spot keys, every other token to
+    one FEED_LTP hash.
+    """
+
+    def __init__(self, redis_client, ring=None, redis_hz: float = 4.0, rate_caps=None,
+                 status_interval: float = 5.0):
+        self.redis_client = redis_client
+        self.ring = ring
+        self.status_interval = status_interval
+        self.feed = None
+        self.chain = None
+        self.conflator = Conflator(self._flush, default_hz=redis_hz, rate_caps=rate_caps)
+        self._last_status = 0.0
+
+    def __call__(self, tick):
+        if self.chain is not None and tick["kind"] != "depth":
+            self.chain.on_tick(tick)
+
+        if tick["kind"] == "depth" or (tick["ltp"] is None and tick["oi"] is None and tick["v"] is None):
+            return
+
+        if self.ring is not None:
+            self.ring.write(tick["tk"], tick["ltp"], tick["oi"], tick["v"], tick["recv_ts"])
+
+        self.conflator.offer(tick["tk"], tick)
+
+    def _flush(self, batch):
+        """Write one conflated batch in a single pipeline round-trip."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        ltps = {}
+        for token, tick in batch.items():
+            # Partial updates for a token whose LTP was never seen yet
+            if tick.get("ltp") is None:
+                continue
+            index = INDEX_TOKENS.get(token) if tick["kind"] == "index" else None
+            if index is not None:
+                queue_spot(pipe, index, tick["ltp"], tick["exch_ts"], tick["recv_ts"])
+            else:
+                ltps[token] = json.dumps({
+                    "ltp": tick["ltp"], "oi": tick.get("oi"), "v": tick.get("v"), "ts": tick["recv_ts"]
+                })
+        if ltps:
+            pipe.hset(REDIS_KEY_FEED_LTP, mapping=ltps)
+
+        now = time.time()
+        if now - self._last_status >= self.status_interval:
+            self._last_status = now
+            stats = self.conflator.stats
+            pipe.hset(REDIS_KEY_STATUS, mapping={
+                "state": "STREAMING",
+                "last_tick_ts": max(t["recv_ts"] for t in batch.values()),
+                "ticks_received": stats["received"],
+                "ticks_published": stats["published"],
+                "ticks_conflated": stats["conflated"],
+                "flushes": stats["flushes"],
+                "reconnects": getattr(self.feed, "reconnects", 0),
+            })
+        pipe.execute()
+
+
+def parse_rate_caps(values):
+    """Parse repeated TOKEN=HZ options into {token: hz}."""
+    caps = {}
+    for value in values or []:
+        token, _, hz = value.rpartition("=")
+        caps[token] = float(hz)
+    return caps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NIFTY/BANKNIFTY websocket spot feeder")
+    parser.add_argument("uid", help="User ID whose Neo session is used")
+    parser.add_argument("--replay", help="Replay a recorded JSONL file instead of the live feed")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (0 = as fast as possible)")
+    parser.add_argument("--record", help="Append raw live messages to this JSONL file")
+    parser.add_argument("--no-shm", action="store_true", help="Do not create the shared-memory tick ring")
+    parser.add_argument("--redis-hz", type=float, default=4.0,
+                        help="Max Redis updates per second per token (0 = every tick)")
+    parser.add_argument("--rate-cap", action="append", metavar="TOKEN=HZ",
+                        help="Per-token Redis rate cap, repeatable")
+    parser.add_argument("--chain-width", type=int, default=0,
+                        help="Stream the option chain this many strikes each side of ATM (0 = off)")
+    args = parser.parse_args()
+
+    setup_logging()
+    redis_client = get_redis_client()
+    ring = None if args.no_shm else TickRing.create()
+    publisher = SpotPublisher(redis_client, ring, redis_hz=args.redis_hz, rate_caps=parse_rate_caps(args.rate_cap))
+    publisher.conflator.start()
+
+    if args.replay:
+        feed = ReplayFeed(args.replay, publisher, speed=args.speed)
+    else:
+        config = load_config(args.uid)
+        auth_service = AuthService(config, redis_client, args.uid)
+
+        def client_factory():
+            if not auth_service.is_ready():
+                if not auth_service.login() or not auth_service.validate():
+                    return None
+            return auth_service.client
+
+        feed = NeoFeed(client_factory, publisher, record_path=args.record)
+
+    publisher.feed = feed
+    feed.subscribe(INDEX_SUBSCRIPTIONS, is_index=True)
+
+    chain = None
+    if args.chain_width > 0:
+        chain = OptionChainService(redis_client, feed, width=args.chain_width, shared=not args.no_shm)
+        publisher.chain = chain
+        chain.start()
+
+    redis_client.hset(REDIS_KEY_STATUS, mapping={"state": "STARTING", "started_at": time.time()})
+    logging.info(f"[SPOT FEEDER] Starting ({'replay' if args.replay else 'live'})")
+
+    try:
+        feed.run_forever()
+    finally:
+        redis_client.hset(REDIS_KEY_STATUS, "state", "STOPPED")
+        if ring is not None:
+            ring.close()
+        if chain is not None:
+            chain.close()
+
+
+if __name__ == "__main__":
+    main()
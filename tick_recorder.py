@@ -0,0 +1,152 @@
+"""Tick recorder: follows the spot feeder's tick ring into daily Parquet files.
+
+Reads every tick the feeder writes to the shared-memory ring
+(market_data/shm_ring.py) and stores them under ticks/ partitioned by day
+and underlying (see market_data/tick_store.py). Run next to spot_feeder.py:
+
+    python tick_recorder.py [--root ticks] [--flush-interval 60]
+
+Reading back:
+    from market_data.tick_store import load_ticks
+    data = load_ticks("ticks", "2026-10-16", "NIFTY", "Nifty 50")
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import date
+
+from market_data.shm_ring import TickRing
+from market_data.tick_store import DEFAULT_BUFFER_ROWS, DEFAULT_FLUSH_INTERVAL, TickRecorder
+from market_data.ticks import INDEX_TOKENS
+from utils.contract_index import REDIS_KEY_OPT_REV, REDIS_KEY_VERSION, parse_contract_key
+from utils.logging_config import setup_logging
+from utils.redis_helper import get_redis_client
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(BASE_DIR, "ticks")
+
+# Token -> equity symbol map written by instruments.py
+REDIS_KEY_EQ_REV = "NEO_INSTR_EQ_REV"
+
+POLL_INTERVAL = 0.1
+
+# Re-open the ring after this long without ticks (feeder may have restarted)
+REATTACH_AFTER = 5.0
+
+# Seconds between instrument master version checks triggered by unknown tokens
+VERSION_CHECK_INTERVAL = 30.0
+
+
+class UnderlyingResolver:
+    """Token -> underlying from the instrument master.
+
+    Reloaded daily, and when an unknown token shows up after the master
+    version (NEO_INSTR_VERSION) moved.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self._options = {}
+        self._equities = set()
+        self._loaded_on = None
+        self._version = None
+        self._version_checked_at = 0.0
+
+    def _reload(self):
+        pipe = self.redis_client.pipeline()
+        pipe.hgetall(REDIS_KEY_OPT_REV)
+        pipe.hkeys(REDIS_KEY_EQ_REV)
+        pipe.get(REDIS_KEY_VERSION)
+        options, equities, version = pipe.execute()
+        self._options = options or {}
+        self._equities = set(equities or [])
+        self._version = version
+        self._loaded_on = date.today()
+        self._version_checked_at = time.monotonic()
+        logging.info(f"[RECORDER] Token map: {len(self._options)} options, {len(self._equities)} equities")
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._version_checked_at < VERSION_CHECK_INTERVAL:
+            return False
+        self._version_checked_at = now
+        if self.redis_client.get(REDIS_KEY_VERSION) == self._version:
+            return False
+        self._reload()
+        return True
+
+    def __call__(self, token):
+        if self._loaded_on != date.today():
+            self._reload()
+
+        underlying = self._lookup(token)
+        if underlying == "OTHER" and self._reload_if_changed():
+            underlying = self._lookup(token)
+        return underlying
+
+    def _lookup(self, token):
+        if token in INDEX_TOKENS:
+            return INDEX_TOKENS[token]
+        key = self._options.get(token)
+        if key:
+            parsed = parse_contract_key(key)
+            if parsed:
+                return parsed[0]
+        if token in self._equities:
+            return "EQ"
+        return "OTHER"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record feeder ticks to daily Parquet files")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Output directory")
+    parser.add_argument("--buffer-rows", type=int, default=DEFAULT_BUFFER_ROWS,
+                        help="Rows buffered per underlying before a part is written")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="Max seconds ticks stay in memory")
+    args = parser.parse_args()
+
+    setup_logging()
+    resolver = UnderlyingResolver(get_redis_client())
+    recorder = TickRecorder(args.root, resolver, args.buffer_rows, args.flush_interval)
+
+    ring = None
+    cursor = 0
+    dropped = 0
+    idle_since = time.monotonic()
+    try:
+        while True:
+            if ring is None:
+                ring = TickRing.attach()
+                if ring is None:
+                    time.sleep(1.0)
+                    continue
+                cursor = ring.write_seq
+                logging.info(f"[RECORDER] Attached to tick ring at seq {cursor}")
+
+            # Fell more than one ring behind: the oldest ticks are gone
+            behind = ring.write_seq - cursor
+            if behind > ring.capacity:
+                dropped += behind - ring.capacity
+                logging.warning(f"[RECORDER] Lagging; {dropped} ticks lost so far")
+
+            ticks, cursor = ring.read_since(cursor)
+            recorder.append(ticks)
+            recorder.flush_due()
+
+            if len(ticks) == 0:
+                if time.monotonic() - idle_since > REATTACH_AFTER:
+                    ring.close()
+                    ring = None
+                    idle_since = time.monotonic()
+                time.sleep(POLL_INTERVAL)
+            else:
+                idle_since = time.monotonic()
+    finally:
+        recorder.flush()
+        logging.info(f"[RECORDER] Stopped: {recorder.rows_written} rows in {recorder.parts_written} parts")
+
+
+if __name__ == "__main__":
+    main()
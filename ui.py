@@ -3,12 +3,19 @@ import pandas as pd
 import redis
 import time
 import os 
-HOST = "http://localhost:9000"
 import json
 import duckdb
-import requests
+from utils.questdb import QuestDBError, escape_like, get_questdb
 from watchlist import banknifty_watchlist, nifty_watchlist
 from utils.telegram_notifier import send_telegram
+from utils.contract_meta import get_contract_metadata
+from utils.spot import DEFAULT_SPOT_MAX_AGE, get_spot, get_spot_info
+from utils.latency import (
+    REDIS_KEY_PENDING as LATENCY_PENDING_KEY,
+    REDIS_KEY_TRADES as LATENCY_TRADES_KEY,
+    SEGMENTS as LATENCY_SEGMENTS,
+    daily_key,
+)
 
 # ---------------------------------
 # MotherDuck connection (GLOBAL)
@@ -21,8 +28,42 @@ base_dir = os.path.dirname(os.path.abspath(__file__))
 
 redis_client = redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
 
-NIFTY_LOT_SIZE = 65
-BANKNIFTY_LOT_SIZE = 30
+# [CACHE CONTRACTS] lot sizes, expiries and strikes from the scrip master,
+# held once per server process and hot-swapped when instruments.py reruns
+def load_contract_metadata():
+    return get_contract_metadata(redis_client)
+
+
+def load_contract_index():
+    return load_contract_metadata().contracts
+
+
+def format_spot(index):
+    """Spot with its feed age, flagged when older than SPOT_MAX_AGE."""
+    info = get_spot_info(redis_client, index)
+    if info is None:
+        return f"{get_spot(redis_client, index, max_age=None)} (no feed timestamp)"
+    stale = " ⚠️ STALE" if info["age"] > DEFAULT_SPOT_MAX_AGE else ""
+    return f"{info['ltp']} ({info['age']:.1f}s ago){stale}"
+
+
+def render_contract_picker(index, key_suffix, default_strike=None):
+    """Expiry + strike selectors populated from the listed contracts."""
+    contracts = load_contract_index()
+    expiries = contracts.expiries(index, on_or_after=time.strftime("%Y-%m-%d"))
+    if not expiries:
+        st.warning(f"No {index} contracts in NEO_INSTR_OPT. Run instruments.py.")
+        return None, None
+
+    expiry = st.selectbox("Date", expiries, key=f"exp_{key_suffix}")
+    strikes = contracts.strikes(index, expiry, "CE") or contracts.strikes(index, expiry, "PE")
+
+    spot = get_spot(redis_client, index, max_age=None)
+    ref = spot or default_strike or strikes[len(strikes) // 2]
+    atm = contracts.nearest_strike(index, expiry, "CE", ref) or strikes[len(strikes) // 2]
+
+    strike = st.selectbox("Strike Price", strikes, index=strikes.index(atm), key=f"strike_{key_suffix}")
+    return expiry, strike
 
 def render_leg_input(col, key_suffix):
     """
@@ -33,12 +74,10 @@ def render_leg_input(col, key_suffix):
         index = st.selectbox("Instrument", ["NIFTY", "BANKNIFTY"], key=f"index_{key_suffix}")
         lots = st.number_input("Lots", min_value=1, step=1, key=f"lots_{key_suffix}")
         
-        lot_size = NIFTY_LOT_SIZE if index == "NIFTY" else BANKNIFTY_LOT_SIZE
-        qty = lots * lot_size
+        qty = load_contract_metadata().qty_for_lots(index, lots)
         
         side = st.selectbox("Side", [" ", "BUY", "SELL"], key=f"side_{key_suffix}")
-        expiry = st.selectbox("Date",["2026-01-27"], key=f"exp_{key_suffix}")
-        strike = st.number_input("Strike Price", min_value=100,value=26000, step=50, key=f"strike_{key_suffix}")
+        expiry, strike = render_contract_picker(index, key_suffix)
         option_type = st.selectbox("Option Type", ["CE", "PE"], key=f"opt_{key_suffix}")
         
         return {
@@ -92,25 +131,22 @@ def resolve_symbol(symbol):
     # BANKNIFTY options (monthly)
     if idx == "BANKNIFTY":
         mon = expiry[2:5]
-        pattern = f"{idx}{yy}{mon}%{strike}{opt}"
+        pattern = f"{escape_like(idx + yy + mon)}%{escape_like(strike + opt)}"
         table = "BankNiftyOI"
 
     # NIFTY options (nearest weekly)
     else:
-        pattern = f"{idx}{yy}%{strike}{opt}"
+        pattern = f"{escape_like(idx + yy)}%{escape_like(strike + opt)}"
         table = "NiftyOI"
 
     sql = f"""
         select tradingsymbol
         from {table}
-        where tradingsymbol like '{pattern}'
+        where tradingsymbol like :pattern
         latest on ts partition by tradingsymbol;
     """
 
-    r = requests.get(HOST + "/exec", params={"query": sql}).json()
-    df = pd.DataFrame.from_dict(r.get("dataset", []))
-
-    return df.iloc[0, 0] if not df.empty else None
+    return get_questdb().query(sql, {"pattern": pattern}).scalar()
 
 
 
@@ -124,15 +160,14 @@ def fetch_ltp(symbol):
     sql = f"""
         select last_price
         from {table}
-        where tradingsymbol = '{sym}'
+        where tradingsymbol = :sym
         latest on ts partition by tradingsymbol;
     """
 
     try:
-        r = requests.get(HOST + "/exec", params={"query": sql}).json()
-        df = pd.DataFrame.from_dict(r.get("dataset", []))
-        return float(df.iloc[0,0]) if not df.empty else None
-    except:
+        price = get_questdb().query(sql, {"sym": sym}).scalar()
+        return float(price) if price is not None else None
+    except (QuestDBError, TypeError, ValueError):
         return None
 
 
@@ -157,27 +192,24 @@ def fetch_ltp_bulk(symbols: list[str]) -> dict[str, float]:
 
     rs_prices = {}
 
+    # BankNiftyOI and NiftyOI halves are independent: run them concurrently
+    queries = []
     for table, sym_set in [("BankNiftyOI", bn_syms), ("NiftyOI", nf_syms)]:
         if not sym_set:
             continue
-        
-        quoted = ",".join(f"'{x}'" for x in sym_set)
-        sql = f"""
+        queries.append((f"""
             select tradingsymbol, last_price
             from {table}
-            where tradingsymbol in ({quoted})
+            where tradingsymbol in :syms
             latest on ts partition by tradingsymbol;
-        """
-
-        try:
-            r = requests.get(HOST + "/exec", params={"query": sql}).json()
-            df_res = pd.DataFrame.from_dict(r.get("dataset", []))
-            if not df_res.empty:
-                for _, row in df_res.iterrows():
-                    # row[0] = tradingsymbol, row[1] = last_price
-                    rs_prices[row[0]] = float(row[1])
-        except Exception as e:
-            print("[BATCH LTP ERROR]", e)
+        """, {"syms": sym_set}))
+
+    try:
+        for res in get_questdb().query_many(queries):
+            if not res.empty:
+                rs_prices.update(zip(res.column("tradingsymbol").tolist(), res.column("last_price").tolist()))
+    except QuestDBError as e:
+        print("[BATCH LTP ERROR]", e)
 
     # Map results back to original symbols
     results = {}
@@ -187,24 +219,43 @@ def fetch_ltp_bulk(symbols: list[str]) -> dict[str, float]:
 
     return results
 
+# [LIVE LTP] Position LTPs published by the agent's websocket feed
+def load_position_ltps(uid):
+    """All live position LTPs for a UID in one HGET: {trading symbol: ltp}."""
+    raw = redis_client.hget(uid, "POSITION_LTP")
+    if not raw:
+        return {}
+    try:
+        return {sym: v["ltp"] for sym, v in json.loads(raw).items()}
+    except (ValueError, KeyError, TypeError):
+        return {}
+
+
+def position_pnl(qty, buy_p, sell_p, ltp):
+    """Mark-to-market P/L of one net position at ltp."""
+    if ltp is None:
+        return None
+    # Long
+    if qty > 0:
+        avg = buy_p if buy_p > 0 else sell_p
+        return (ltp - avg) * qty
+    # Short: if there is a Sell Price use it, else Buy Price
+    avg = sell_p if sell_p > 0 else buy_p
+    return (avg - ltp) * abs(qty)
+
 #-------------------------------------------------------------
-def resolve_instrument_id(redis_client, leg):
-    """Build redis key and fetch ExchangeInstrumentID"""
+def resolve_trading_symbol(leg):
+    """Look up the leg's Neo tradingSymbol in the cached contract index"""
 
     index = leg["Index"]                   # NIFTY / BANKNIFTY
     expiry = leg["Expiry"]                # YYYY-MM-DD
     option_type = leg["OptionType"]       # CE / PE
     strike = leg["Strike"]                # int or str
 
-    redis_key = f"{index}_{expiry}_{option_type}_{strike}"
-    
-
-    inst_id = redis_client.hget("XTS_INSTR", redis_key)
-
-    if inst_id is None:
+    if not expiry or strike is None:
         return None
 
-    return int(inst_id)
+    return load_contract_index().trading_symbol(index, expiry, option_type, strike)
 #-------------------------------------------------------------
 
 if "user" not in st.session_state:
@@ -260,10 +311,10 @@ else:
                     l = leg.copy()
 
                     
-                    # Resolve ID
-                    inst_id = resolve_instrument_id(redis_client, l)
-                    if inst_id:
-                        l["exchangeInstrumentID"] = inst_id
+                    # Resolve tradingSymbol
+                    trading_symbol = resolve_trading_symbol(l)
+                    if trading_symbol:
+                        l["tradingSymbol"] = trading_symbol
                         valid_legs.append(l)
                     else:
                         st.error(f"Instrument not found for {l['Index']} {l['Expiry']} {l['OptionType']} {l['Strike']}")
@@ -315,15 +366,12 @@ else:
             with col1:
                 #Quantity entry
                 lots = st.number_input("Lots", min_value=1, step=1)
-                qty = lots * (NIFTY_LOT_SIZE if index_choice == "NIFTY" else BANKNIFTY_LOT_SIZE)
+                qty = load_contract_metadata().qty_for_lots(index_choice, lots)
 
             with col2:
-                #Expiry Date Selector
-                expiry_str = st.selectbox("ExpDate",["2026-01-27"])
-
-            #Strike Price Selector
-            default_strike = 26000 if index_choice == "NIFTY" else 55000
-            strike = st.number_input("Strike Price",min_value=100,value=default_strike,step=50)
+                #Expiry Date + Strike Selectors (listed contracts only)
+                default_strike = 26000 if index_choice == "NIFTY" else 55000
+                expiry_str, strike = render_contract_picker(index_choice, "single", default_strike)
 
             # #Option Type Selector (CE / PE)
             # option_type = st.radio("",["CE", "PE"],horizontal=True)
@@ -370,10 +418,10 @@ else:
                         st.stop()
                     settings["LimitPrice"] = float(limit_price)
 
-                # Resolve Instrument ID
-                inst_id = resolve_instrument_id(redis_client, settings)
-                if inst_id:
-                    settings["exchangeInstrumentID"] = inst_id
+                # Resolve tradingSymbol
+                trading_symbol = resolve_trading_symbol(settings)
+                if trading_symbol:
+                    settings["tradingSymbol"] = trading_symbol
                     
                     # Wrap the single leg inside a list to keep the structure identical to multi-leg
                     single_leg_list = [settings]
@@ -407,6 +455,26 @@ else:
     
 
 
+    # [LIVE LTP] Tick-speed P/L straight from the agent's POSITION_LTP blob
+    @st.fragment(run_every=1)
+    def render_live_mtm(filtered):
+        live = load_position_ltps(current_user)
+        if not live:
+            st.caption("Live LTP feed not running; use Refresh LTP.")
+            return
+
+        df_live = filtered[["TradingSymbol", "Quantity", "Buy Price", "Sell Price"]].copy()
+        df_live["LTP"] = df_live["TradingSymbol"].map(live)
+        df_live["P/L"] = [
+            position_pnl(int(q), float(b), float(sp), None if pd.isna(l) else float(l))
+            for q, b, sp, l in zip(df_live["Quantity"], df_live["Buy Price"], df_live["Sell Price"], df_live["LTP"])
+        ]
+        df_live["P/L"] = pd.to_numeric(df_live["P/L"], errors="coerce").round(2)
+
+        st.write("⚡ Live P/L")
+        st.dataframe(df_live, hide_index=True, width="stretch")
+        st.metric("Live MTM (P/L)", f"{df_live['P/L'].fillna(0).sum():,.2f}")
+
     # [FRAGMENT ADD]
     @st.fragment
     def render_ltp_fragment(filtered):
@@ -437,36 +505,19 @@ else:
             ltps = []
             pnls = []
 
-            # [BATCH LTP]
-            bulk_prices = fetch_ltp_bulk(current_symbols)
+            # [LIVE LTP] websocket cache first; QuestDB only for symbols it lacks
+            bulk_prices = load_position_ltps(current_user)
+            missing = [sym for sym in current_symbols if sym not in bulk_prices]
+            if missing:
+                bulk_prices.update(fetch_ltp_bulk(missing))
 
             for _, row in df_view.iterrows():
                 sym = row["TradingSymbol"]
-                qty = int(row["Quantity"])
-                buy_p = float(row["Buy Price"])
-                sell_p = float(row["Sell Price"])
-
-                # Fetch LTP using the new resolver logic
-                # ltp = fetch_ltp(sym) # [BATCH LTP FIX]
                 ltp = bulk_prices.get(sym)
                 ltps.append(ltp)
-
-                if ltp is None:
-                    pnls.append(None)
-                    continue
-
-                # Long
-                if qty > 0:
-                    avg = buy_p if buy_p > 0 else sell_p
-                    pnl = (ltp - avg) * qty
-
-                # Short
-                else:
-                    # For short positions, if there is a Sell Price use it, else Buy Price (unlikely for pure short but handling edge case)
-                    avg = sell_p if sell_p > 0 else buy_p
-                    pnl = (avg - ltp) * abs(qty)
-
-                pnls.append(pnl)
+                pnls.append(position_pnl(
+                    int(row["Quantity"]), float(row["Buy Price"]), float(row["Sell Price"]), ltp
+                ))
 
             # [FRAGMENT ADD] Persist computed values
             st.session_state["netwise_ltp"] = [round(x, 2) if x is not None else None for x in ltps]
@@ -800,6 +851,7 @@ else:
                 if "Payoff" not in filtered.columns:
                     filtered["Payoff"] = True
                 render_ltp_fragment(filtered)
+                render_live_mtm(filtered)
 
                 print("[SUCCESS] Positions loaded successfully.")
 
@@ -819,12 +871,7 @@ else:
         with colA:
             selected_index = st.radio("Index", ["NIFTY", "BANKNIFTY"], key="level_ce_index", horizontal=True)
             #Read current spot from Redis
-            if selected_index == "NIFTY":
-                current_spot = redis_client.get("NF_SPOT")
-            else:
-                current_spot = redis_client.get("BN_SPOT")
-
-            st.info(f"Current {selected_index} Spot: {current_spot}")
+            st.info(f"Current {selected_index} Spot: {format_spot(selected_index)}")
 
             default_level = 26000 
         with colB:    
@@ -852,10 +899,10 @@ else:
                     l = leg.copy()
                     l["Expiry"] = l["Expiry"]
                     
-                    # Resolve ID
-                    inst_id = resolve_instrument_id(redis_client, l)
-                    if inst_id:
-                        l["exchangeInstrumentID"] = inst_id
+                    # Resolve tradingSymbol
+                    trading_symbol = resolve_trading_symbol(l)
+                    if trading_symbol:
+                        l["tradingSymbol"] = trading_symbol
                         valid_legs.append(l)
                     else:
                         st.error(f"Instrument not found for {l['Index']} {l['Expiry']} {l['OptionType']} {l['Strike']}")
@@ -898,12 +945,7 @@ else:
 
         with colA:
             selected_index = st.radio("Index", ["NIFTY", "BANKNIFTY"], key="level_pe_index", horizontal=True)
-            if selected_index == "NIFTY":
-                current_spot = redis_client.get("NF_SPOT")
-            else:
-                current_spot = redis_client.get("BN_SPOT")
-
-            st.info(f"Current {selected_index} Spot: {current_spot}")
+            st.info(f"Current {selected_index} Spot: {format_spot(selected_index)}")
             default_level = 26000
 
         with colB:
@@ -930,10 +972,10 @@ else:
                     l = leg.copy()
                     l["Expiry"] = l["Expiry"]
                     
-                    # Resolve ID
-                    inst_id = resolve_instrument_id(redis_client, l)
-                    if inst_id:
-                        l["exchangeInstrumentID"] = inst_id
+                    # Resolve tradingSymbol
+                    trading_symbol = resolve_trading_symbol(l)
+                    if trading_symbol:
+                        l["tradingSymbol"] = trading_symbol
                         valid_legs.append(l)
                     else:
                         st.error(f"Instrument not found for {l['Index']} {l['Expiry']} {l['OptionType']} {l['Strike']}")
@@ -1471,17 +1513,17 @@ else:
             if not eq_symbol:
                 st.error("Please enter a symbol.")
             else:
-                # Validation: Check directly in Redis XTS_INSTR_EQ
-                exch_inst_id = redis_client.hget("XTS_INSTR_EQ", eq_symbol)
+                # Validation: single lookup in the nse_cm master (NEO_INSTR_EQ)
+                eq_trading_symbol = redis_client.hget("NEO_INSTR_EQ", eq_symbol)
                 
-                if not exch_inst_id:
-                    st.error(f"Symbol '{eq_symbol}' not found in XTS_INSTR_EQ. Please run instruments.py to update master.")
+                if not eq_trading_symbol:
+                    st.error(f"Symbol '{eq_symbol}' not found in NEO_INSTR_EQ. Please run instruments.py to update master.")
                 else:
                     # Construct Payload
                     payload = {
                         "state": "requested",
                         "symbol": eq_symbol,
-                        "exchangeInstrumentID": int(exch_inst_id),
+                        "tradingSymbol": eq_trading_symbol,
                         "side": eq_side,
                         "qty": int(eq_qty),
                         "product": eq_product,
@@ -1503,7 +1545,7 @@ else:
                         }
                     )
                     
-                    st.success(f"Equity Order Requested for {eq_symbol}. ID: {exch_inst_id}")
+                    st.success(f"Equity Order Requested for {eq_symbol} ({eq_trading_symbol})")
                     
                     # Spinner waiting for STATUS_EQUITY in user hash
                     with st.spinner("Processing Equity Order..."):
@@ -1530,7 +1572,7 @@ else:
         # -------------------------------
         # OI AUTO TRADE TAB
         # -------------------------------
-        subtab1, subtab2 = st.tabs(["NIFTY", "BANKNIFTY"])
+        subtab1, subtab2, subtab3 = st.tabs(["NIFTY", "BANKNIFTY", "Latency"])
     with subtab1:
         #st.write("🤖 NIFTY OI Auto Trade Engine")
         # ---- Engine ON / OFF ----
@@ -1589,8 +1631,16 @@ else:
         st.divider()
 
         # ---- Market Context ----
-        spot = redis_client.get("NF_SPOT")
-        st.info(f"NIFTY Spot (NF_SPOT): {spot}")
+        st.info(f"NIFTY Spot (NF_SPOT): {format_spot('NIFTY')}")
+
+        # ---- Rolling PE-CE Stats ----
+        oi_stats = redis_client.hgetall("NIFTY_OI_STATS")
+        if oi_stats:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("PE-CE", oi_stats.get("pe_ce"))
+            c2.metric("EWMA", oi_stats.get("ewma"))
+            c3.metric("Z-Score", oi_stats.get("zscore"))
+            c4.metric("Slope / min", oi_stats.get("slope"))
 
         st.divider()
 
@@ -1675,8 +1725,16 @@ else:
 
         st.divider()
 
-        spot = redis_client.get("BN_SPOT")
-        st.info(f"BANKNIFTY Spot (BN_SPOT): {spot}")
+        st.info(f"BANKNIFTY Spot (BN_SPOT): {format_spot('BANKNIFTY')}")
+
+        # ---- Rolling PE-CE Stats ----
+        oi_stats = redis_client.hgetall("BANKNIFTY_OI_STATS")
+        if oi_stats:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("PE-CE", oi_stats.get("pe_ce"))
+            c2.metric("EWMA", oi_stats.get("ewma"))
+            c3.metric("Z-Score", oi_stats.get("zscore"))
+            c4.metric("Slope / min", oi_stats.get("slope"))
 
         st.divider()
 
@@ -1702,3 +1760,47 @@ else:
         if msg:
             st.error(msg)
 
+
+    with subtab3:
+        # ---- Signal → Fill Latency (services/latency_service.py) ----
+        st.write("⏱ Signal → Fill Latency")
+
+        latency_day = st.date_input("Day", key="oi_latency_day").isoformat()
+        daily = redis_client.hgetall(daily_key(latency_day))
+        if daily:
+            rows = []
+            for segment, _, _ in LATENCY_SEGMENTS:
+                if f"{segment}_p50" in daily:
+                    rows.append({
+                        "Stage": segment,
+                        "p50 ms": float(daily[f"{segment}_p50"]),
+                        "p90 ms": float(daily[f"{segment}_p90"]),
+                        "p99 ms": float(daily[f"{segment}_p99"]),
+                        "max ms": float(daily[f"{segment}_max"]),
+                    })
+            st.caption(f"{daily.get('trades', 0)} filled OI trades")
+            st.dataframe(pd.DataFrame(rows), hide_index=True, width="stretch")
+        else:
+            st.write("No filled OI trades for this day")
+
+        st.divider()
+
+        st.write("🧾 Per-Trade Breakdown")
+        trades = [json.loads(t) for t in redis_client.lrange(LATENCY_TRADES_KEY, 0, 49)]
+        if trades:
+            st.dataframe(
+                pd.DataFrame([
+                    {"Day": t["day"], "Index": t["index"], "Symbol": t["symbol"],
+                     "Order": t["order_no"], **t["latency_ms"]}
+                    for t in trades
+                ]),
+                hide_index=True,
+                width="stretch"
+            )
+        else:
+            st.write("No latency records yet")
+
+        pending = redis_client.hlen(LATENCY_PENDING_KEY)
+        if pending:
+            st.info(f"{pending} order(s) waiting for their fill")
+
@@ -0,0 +1,374 @@
+"""In-memory strike/expiry index built from the NEO_INSTR_OPT instrument master.
+
+The instrument builder (instruments.py) stores one hash field per option
+contract, keyed as INDEX_YYYY-MM-DD_CE/PE_STRIKE. This module loads that hash
+once and keeps, per underlying, a sorted list of expiries and, per
+(underlying, expiry, option type), a sorted list of listed strikes so that
+ATM/OTM/nearest-contract lookups are O(log n) bisects instead of Redis reads.
+
+Each instruments.py run bumps NEO_INSTR_VERSION and stores the added/removed
+contracts for that version in NEO_INSTR_DIFF (and announces it on the
+NEO_INSTR_EVENTS channel). get_contract_index() checks the version at most
+every VERSION_CHECK_INTERVAL seconds and applies the diffs to a copy of the
+loaded index, swapping the process-wide reference once the copy is complete
+(a full reload if a diff is missing). Readers in other threads keep using
+the index they were handed, which is never modified after publication.
+
+Usage:
+    from utils.contract_index import get_contract_index
+
+    index = get_contract_index(redis_client)
+    expiry = index.nearest_expiry("NIFTY")
+    strike = index.otm_strike("NIFTY", expiry, "CE", spot)
+    symbol = index.trading_symbol("NIFTY", expiry, "CE", strike)
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Redis hash holding the options instrument master
+REDIS_KEY_OPT = "NEO_INSTR_OPT"
+
+# Websocket token <-> contract key maps written next to it by instruments.py
+REDIS_KEY_OPT_TOKEN = "NEO_INSTR_OPT_TOKEN"   # contract key -> websocket token
+REDIS_KEY_OPT_REV = "NEO_INSTR_OPT_REV"       # websocket token -> contract key
+
+# Websocket exchange segment of every contract in the index
+OPTION_SEGMENT = "nse_fo"
+
+# Change notification keys written by instruments.py after every refresh
+REDIS_KEY_VERSION = "NEO_INSTR_VERSION"
+REDIS_KEY_DIFF = "NEO_INSTR_DIFF"        # hash: version -> {"added": {...}, "removed": [...]}
+REDIS_CHANNEL_EVENTS = "NEO_INSTR_EVENTS"
+
+# Seconds between version checks; lookups in between never touch Redis
+VERSION_CHECK_INTERVAL = 5.0
+
+
+def parse_contract_key(key: str):
+    """Split a NEO_INSTR_OPT field into (index, expiry, option_type, strike).
+
+    Returns:
+        Tuple or None if the key is not in INDEX_YYYY-MM-DD_CE/PE_STRIKE form
+    """
+    parts = key.split("_")
+    if len(parts) != 4:
+        return None
+
+    index, expiry, option_type, strike = parts
+    if option_type not in ("CE", "PE"):
+        return None
+
+    try:
+        strike = int(float(strike))
+    except ValueError:
+        return None
+
+    return index, expiry, option_type, strike
+
+
+def build_contract_key(index: str, expiry: str, option_type: str, strike) -> str:
+    """Build the NEO_INSTR_OPT field name for a contract."""
+    return f"{index}_{expiry}_{option_type}_{int(strike)}"
+
+
+class ContractIndex:
+    """Sorted expiry and strike arrays for every listed option contract."""
+
+    def __init__(self, instruments: Dict[str, str], version: int = 0):
+        """Build the index.
+
+        Args:
+            instruments: Mapping of INDEX_YYYY-MM-DD_CE/PE_STRIKE -> trading symbol
+            version: NEO_INSTR_VERSION the mapping was read at
+        """
+        self.version = version
+        self._symbols: Dict[str, str] = {}
+        self._expiries: Dict[str, List[str]] = {}
+        self._strikes: Dict[tuple, List[int]] = {}
+
+        for key, symbol in instruments.items():
+            parsed = parse_contract_key(key)
+            if parsed is None:
+                continue
+            self._symbols[key] = symbol
+            index, expiry, option_type, strike = parsed
+            self._expiries.setdefault(index, set()).add(expiry)
+            self._strikes.setdefault((index, expiry, option_type), set()).add(strike)
+
+        # ISO dates sort lexicographically, so plain string lists bisect correctly
+        self._expiries = {k: sorted(v) for k, v in self._expiries.items()}
+        self._strikes = {k: sorted(v) for k, v in self._strikes.items()}
+
+    @classmethod
+    def from_redis(cls, redis_client, redis_key: str = REDIS_KEY_OPT) -> "ContractIndex":
+        """Load the whole instrument master and its version in one transaction."""
+        pipe = redis_client.pipeline()
+        pipe.hgetall(redis_key)
+        pipe.get(REDIS_KEY_VERSION)
+        instruments, version = pipe.execute()
+
+        index = cls(instruments or {}, int(version or 0))
+        logger.info(f"[CONTRACT INDEX] Loaded {len(index)} contracts from {redis_key} (v{index.version})")
+        return index
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def copy(self) -> "ContractIndex":
+        """Index sharing this one's lists; apply_diff on it replaces lists instead of mutating them."""
+        clone = ContractIndex.__new__(ContractIndex)
+        clone.version = self.version
+        clone._symbols = dict(self._symbols)
+        clone._expiries = dict(self._expiries)
+        clone._strikes = dict(self._strikes)
+        return clone
+
+    def apply_diff(self, added: Dict[str, str], removed: List[str], version: Optional[int] = None) -> None:
+        """Apply one instrument-master diff to this index.
+
+        Every sorted list that changes is copied first, so lists shared with
+        the index this one was copied from are never modified.
+
+        Args:
+            added: New or changed contracts (key -> trading symbol)
+            removed: Keys no longer listed
+            version: Version the index is at after this diff
+        """
+        for key in removed:
+            if self._symbols.pop(key, None) is None:
+                continue
+            index, expiry, option_type, strike = parse_contract_key(key)
+            strikes = self._strikes.get((index, expiry, option_type))
+            if not strikes:
+                continue
+            pos = bisect_left(strikes, strike)
+            if pos < len(strikes) and strikes[pos] == strike:
+                strikes = strikes[:pos] + strikes[pos + 1:]
+                self._strikes[(index, expiry, option_type)] = strikes
+            if not strikes:
+                del self._strikes[(index, expiry, option_type)]
+                self._drop_expiry_if_empty(index, expiry)
+
+        for key, symbol in added.items():
+            parsed = parse_contract_key(key)
+            if parsed is None:
+                continue
+            is_new = key not in self._symbols
+            self._symbols[key] = symbol
+            if not is_new:
+                continue
+
+            index, expiry, option_type, strike = parsed
+            expiries = self._expiries.get(index, [])
+            pos = bisect_left(expiries, expiry)
+            if pos == len(expiries) or expiries[pos] != expiry:
+                self._expiries[index] = expiries[:pos] + [expiry] + expiries[pos:]
+            strikes = list(self._strikes.get((index, expiry, option_type), []))
+            insort(strikes, strike)
+            self._strikes[(index, expiry, option_type)] = strikes
+
+        if version is not None:
+            self.version = version
+
+    def _drop_expiry_if_empty(self, index: str, expiry: str) -> None:
+        """Remove an expiry once neither CE nor PE strikes remain for it."""
+        if (index, expiry, "CE") in self._strikes or (index, expiry, "PE") in self._strikes:
+            return
+        expiries = self._expiries.get(index, [])
+        pos = bisect_left(expiries, expiry)
+        if pos < len(expiries) and expiries[pos] == expiry:
+            expiries = expiries[:pos] + expiries[pos + 1:]
+            self._expiries[index] = expiries
+        if not expiries:
+            self._expiries.pop(index, None)
+
+    def synced(self, redis_client, remote_version: int) -> Optional["ContractIndex"]:
+        """A new index caught up to remote_version with the stored diffs.
+
+        This index is left untouched.
+
+        Returns:
+            ContractIndex, or None if any intermediate diff is missing (caller should reload)
+        """
+        if remote_version < self.version:
+            return None
+        versions = [str(v) for v in range(self.version + 1, remote_version + 1)]
+        if not versions:
+            return self
+
+        diffs = redis_client.hmget(REDIS_KEY_DIFF, versions)
+        if any(d is None for d in diffs):
+            return None
+
+        updated = self.copy()
+        for version, raw in zip(versions, diffs):
+            diff = json.loads(raw)
+            updated.apply_diff(diff.get("added", {}), diff.get("removed", []), int(version))
+            logger.info(
+                f"[CONTRACT INDEX] Applied v{version}: "
+                f"+{len(diff.get('added', {}))} / -{len(diff.get('removed', []))}"
+            )
+        return updated
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    # ------------------------------------------------------------------
+    # Expiries
+    # ------------------------------------------------------------------
+    def underlyings(self) -> List[str]:
+        """Underlyings with at least one listed contract."""
+        return sorted(self._expiries)
+
+    def expiries(self, index: str, on_or_after: Optional[str] = None) -> List[str]:
+        """Sorted listed expiries for an underlying.
+
+        Args:
+            index: Underlying name (NIFTY / BANKNIFTY)
+            on_or_after: Optional ISO date; earlier expiries are dropped
+        """
+        expiries = self._expiries.get(index, [])
+        if on_or_after is None:
+            return list(expiries)
+        return expiries[bisect_left(expiries, on_or_after):]
+
+    def nearest_expiry(self, index: str, on_or_after: Optional[str] = None) -> Optional[str]:
+        """First listed expiry on or after the given date (default: today)."""
+        expiries = self._expiries.get(index)
+        if not expiries:
+            return None
+
+        on_or_after = on_or_after or date.today().isoformat()
+        pos = bisect_left(expiries, on_or_after)
+        return expiries[pos] if pos < len(expiries) else None
+
+    # ------------------------------------------------------------------
+    # Strikes
+    # ------------------------------------------------------------------
+    def strikes(self, index: str, expiry: str, option_type: str) -> List[int]:
+        """Sorted listed strikes for one expiry and option type."""
+        return list(self._strikes.get((index, expiry, option_type), []))
+
+    def nearest_strike(self, index: str, expiry: str, option_type: str, spot: float) -> Optional[int]:
+        """Listed strike closest to spot (ATM). Ties resolve to the lower strike."""
+        strikes = self._strikes.get((index, expiry, option_type))
+        if not strikes:
+            return None
+
+        pos = bisect_left(strikes, spot)
+        if pos == 0:
+            return strikes[0]
+        if pos == len(strikes):
+            return strikes[-1]
+
+        below, above = strikes[pos - 1], strikes[pos]
+        return below if spot - below <= above - spot else above
+
+    def otm_strike(self, index: str, expiry: str, option_type: str, spot: float, offset: int = 0) -> Optional[int]:
+        """N-th listed strike at or beyond spot on the out-of-the-money side.
+
+        For CE this walks up from the first strike >= spot, for PE it walks
+        down from the last strike <= spot.
+
+        Args:
+            index: Underlying name
+            expiry: Expiry as YYYY-MM-DD
+            option_type: CE or PE
+            spot: Reference price
+            offset: 0 for the first strike at/beyond spot, 1 for the next, ...
+
+        Returns:
+            int or None: Strike, or None if the chain does not reach that far
+        """
+        strikes = self._strikes.get((index, expiry, option_type))
+        if not strikes:
+            return None
+
+        if option_type == "CE":
+            pos = bisect_left(strikes, spot) + offset
+        else:
+            pos = bisect_right(strikes, spot) - 1 - offset
+
+        if 0 <= pos < len(strikes):
+            return strikes[pos]
+        return None
+
+    def strikes_around(self, index: str, expiry: str, option_type: str, spot: float, width: int) -> List[int]:
+        """Listed strikes within +/- width positions of the ATM strike."""
+        strikes = self._strikes.get((index, expiry, option_type))
+        if not strikes:
+            return []
+
+        atm = self.nearest_strike(index, expiry, option_type, spot)
+        pos = bisect_left(strikes, atm)
+        return strikes[max(0, pos - width):pos + width + 1]
+
+    # ------------------------------------------------------------------
+    # Symbols
+    # ------------------------------------------------------------------
+    def trading_symbol(self, index: str, expiry: str, option_type: str, strike) -> Optional[str]:
+        """Trading symbol for a contract, or None if it is not listed."""
+        try:
+            return self._symbols.get(build_contract_key(index, expiry, option_type, strike))
+        except (TypeError, ValueError):
+            return None
+
+    def symbol_for_key(self, key: str) -> Optional[str]:
+        """Trading symbol for a raw NEO_INSTR_OPT field name."""
+        return self._symbols.get(key)
+
+
+# Process-wide cache; every consumer in a process shares one index
+_contract_index: Optional[ContractIndex] = None
+_loaded_on: Optional[date] = None
+_last_version_check = 0.0
+_index_lock = threading.Lock()
+
+
+def get_contract_index(redis_client, refresh: bool = False) -> ContractIndex:
+    """Return the process-wide ContractIndex, loading it on first use.
+
+    The index is reloaded once per calendar day so expired contracts drop
+    out, and between reloads it follows NEO_INSTR_VERSION (checked at most
+    every VERSION_CHECK_INTERVAL seconds) by applying published diffs.
+
+    Args:
+        redis_client: Redis client instance
+        refresh: Force a reload from Redis
+    """
+    global _contract_index, _loaded_on, _last_version_check
+    today = date.today()
+    now = time.monotonic()
+
+    index = _contract_index
+    if not refresh and index is not None and len(index) and _loaded_on == today \
+            and now - _last_version_check < VERSION_CHECK_INTERVAL:
+        return index
+
+    # One thread updates; the others keep the current index until the swap
+    with _index_lock:
+        index = _contract_index
+        if refresh or index is None or len(index) == 0 or _loaded_on != today:
+            index = ContractIndex.from_redis(redis_client)
+            _loaded_on = today
+            _last_version_check = now
+
+        elif now - _last_version_check >= VERSION_CHECK_INTERVAL:
+            _last_version_check = now
+            remote_version = int(redis_client.get(REDIS_KEY_VERSION) or 0)
+            if remote_version != index.version:
+                updated = index.synced(redis_client, remote_version)
+                if updated is None:
+                    logger.info(f"[CONTRACT INDEX] Diff chain to v{remote_version} incomplete; reloading")
+                    updated = ContractIndex.from_redis(redis_client)
+                index = updated
+
+        _contract_index = index
+    return index
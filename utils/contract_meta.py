@@ -0,0 +1,173 @@
+"""Contract metadata derived from the scrip master: expiries, lot, tick and freeze sizes.
+
+instruments.py writes one JSON blob per underlying into NEO_CONTRACT_META
+(lot_size, tick_size, freeze_qty); the expiry calendar comes from the
+contract index. Both are held in memory, refreshed once a day and whenever
+the instrument master version changes, so quantity math and expiry choice
+never touch Redis on the hot path.
+
+Usage:
+    from utils.contract_meta import get_contract_metadata
+
+    meta = get_contract_metadata(redis_client)
+    qty = lots * meta.lot_size("NIFTY")
+    expiry = meta.current_weekly_expiry("NIFTY")
+"""
+import json
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+from utils.contract_index import ContractIndex, get_contract_index
+
+logger = logging.getLogger(__name__)
+
+# Redis hash: underlying -> {"lot_size", "tick_size", "freeze_qty"} JSON
+REDIS_KEY_META = "NEO_CONTRACT_META"
+
+# Used only until the scrip master has been loaded with metadata
+DEFAULT_META = {
+    "NIFTY": {"lot_size": 65, "tick_size": 0.05, "freeze_qty": 1800},
+    "BANKNIFTY": {"lot_size": 30, "tick_size": 0.05, "freeze_qty": 600},
+}
+
+
+class ContractMetadata:
+    """Per-underlying lot/tick/freeze sizes plus weekly and monthly expiries."""
+
+    def __init__(self, meta: Dict[str, dict], contracts: ContractIndex, as_of: Optional[date] = None):
+        """Initialize metadata.
+
+        Args:
+            meta: Mapping of underlying -> {"lot_size", "tick_size", "freeze_qty"}
+            contracts: Contract index supplying listed expiries
+            as_of: Reference date for current/next expiry (default: today)
+        """
+        self._meta = {k: dict(v) for k, v in DEFAULT_META.items()}
+        for index, values in meta.items():
+            merged = self._meta.setdefault(index, {})
+            merged.update({k: v for k, v in values.items() if v})
+        self.contracts = contracts
+        self.version = contracts.version
+        self.as_of = as_of or date.today()
+
+    @classmethod
+    def from_redis(cls, redis_client, contracts: Optional[ContractIndex] = None,
+                   as_of: Optional[date] = None) -> "ContractMetadata":
+        """Load metadata with a single HGETALL and attach the shared contract index.
+
+        `as_of` pins the expiry calendar to another day (replay); default today.
+        """
+        raw = redis_client.hgetall(REDIS_KEY_META) or {}
+        meta = {}
+        for index, blob in raw.items():
+            try:
+                meta[index] = json.loads(blob)
+            except (TypeError, ValueError):
+                logger.warning(f"[CONTRACT META] Bad metadata for {index}: {blob}")
+
+        if not meta:
+            logger.warning(f"[CONTRACT META] {REDIS_KEY_META} empty; using default lot sizes")
+
+        return cls(meta, contracts or get_contract_index(redis_client), as_of)
+
+    # ------------------------------------------------------------------
+    # Sizes
+    # ------------------------------------------------------------------
+    def _get(self, index: str, field: str):
+        """Look up one metadata field, raising KeyError for unknown underlyings."""
+        try:
+            return self._meta[index][field]
+        except KeyError:
+            raise KeyError(f"No {field} known for {index}")
+
+    def lot_size(self, index: str) -> int:
+        """Contract lot size."""
+        return int(self._get(index, "lot_size"))
+
+    def tick_size(self, index: str) -> float:
+        """Minimum price increment in rupees."""
+        return float(self._get(index, "tick_size"))
+
+    def freeze_qty(self, index: str) -> int:
+        """Largest quantity the exchange accepts in a single order."""
+        return int(self._get(index, "freeze_qty"))
+
+    def qty_for_lots(self, index: str, lots: int) -> int:
+        """Contract quantity for a number of lots."""
+        return int(lots) * self.lot_size(index)
+
+    def round_to_tick(self, index: str, price: float) -> float:
+        """Round a price to the nearest valid tick."""
+        tick = self.tick_size(index)
+        return round(round(price / tick) * tick, 2)
+
+    def split_by_freeze(self, index: str, qty: int) -> List[int]:
+        """Split a quantity into slices no larger than the freeze quantity.
+
+        Slices are kept in whole lots so every child order is valid.
+        """
+        lot = self.lot_size(index)
+        max_slice = max(lot, (self.freeze_qty(index) // lot) * lot)
+
+        slices = []
+        remaining = int(qty)
+        while remaining > 0:
+            part = min(remaining, max_slice)
+            slices.append(part)
+            remaining -= part
+        return slices
+
+    # ------------------------------------------------------------------
+    # Expiry calendar
+    # ------------------------------------------------------------------
+    def weekly_expiries(self, index: str) -> List[str]:
+        """Every listed expiry from today onwards."""
+        return self.contracts.expiries(index, on_or_after=self.as_of.isoformat())
+
+    def monthly_expiries(self, index: str) -> List[str]:
+        """Last listed expiry of each calendar month, from today onwards."""
+        by_month = {}
+        for expiry in self.weekly_expiries(index):
+            by_month[expiry[:7]] = expiry  # sorted input, so the last one wins
+        return sorted(by_month.values())
+
+    @staticmethod
+    def _nth(expiries: List[str], n: int) -> Optional[str]:
+        return expiries[n] if len(expiries) > n else None
+
+    def current_weekly_expiry(self, index: str) -> Optional[str]:
+        return self._nth(self.weekly_expiries(index), 0)
+
+    def next_weekly_expiry(self, index: str) -> Optional[str]:
+        return self._nth(self.weekly_expiries(index), 1)
+
+    def current_monthly_expiry(self, index: str) -> Optional[str]:
+        return self._nth(self.monthly_expiries(index), 0)
+
+    def next_monthly_expiry(self, index: str) -> Optional[str]:
+        return self._nth(self.monthly_expiries(index), 1)
+
+
+# Process-wide cache, refreshed on the first call of each day
+_contract_meta: Optional[ContractMetadata] = None
+
+
+def get_contract_metadata(redis_client, refresh: bool = False) -> ContractMetadata:
+    """Return the process-wide ContractMetadata, reloading it once per day.
+
+    Args:
+        redis_client: Redis client instance
+        refresh: Force a reload of metadata and contract index
+    """
+    global _contract_meta
+    contracts = get_contract_index(redis_client, refresh=refresh)
+    if (
+        refresh
+        or _contract_meta is None
+        or _contract_meta.as_of != date.today()
+        or _contract_meta.contracts is not contracts
+        or _contract_meta.version != contracts.version
+    ):
+        _contract_meta = ContractMetadata.from_redis(redis_client, contracts)
+    return _contract_meta
@@ -0,0 +1,121 @@
+"""Signal-to-fill latency stamps for the OI auto-trade chain.
+
+Every stage stamps the payload it hands on with [wall, monotonic] seconds:
+
+    row      PE-CE row that caused the signal (wall only: QuestDB / chain tick time)
+    detect   signal engine generated the crossover      (NIFTY_OI_SIGNAL "stamps")
+    select   order engine published the order           (OI_CROSSOVER_ORDER "stamps")
+    agent    OrderService picked the order up
+    sent     broker call started
+    ack      broker call returned
+    fill     exchange fill time from the order report (wall only, whole seconds)
+
+Stages within one host are differenced on the monotonic clock (CLOCK_MONOTONIC
+is shared by all processes on Linux); row and fill come from other clocks and
+are differenced on wall time. The exchange reports fills to the second
+(FILL_RESOLUTION), so the fill is clamped to no earlier than the ack,
+ack_to_fill is left out below that resolution, and signal_to_fill / total
+can be up to a second short. Placed orders wait in OI_LATENCY_PENDING until
+services/latency_service.py joins their fill; finished breakdowns go to the
+OI_LATENCY_TRADES list and per-day percentiles to OI_LATENCY_DAILY:{date}.
+"""
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STAGES = ("row", "detect", "select", "agent", "sent", "ack", "fill")
+
+# (name, from stage, to stage) reported per trade
+SEGMENTS = (
+    ("row_to_detect", "row", "detect"),
+    ("detect_to_select", "detect", "select"),
+    ("select_to_agent", "select", "agent"),
+    ("agent_to_sent", "agent", "sent"),
+    ("broker_ack", "sent", "ack"),
+    ("ack_to_fill", "ack", "fill"),
+    ("signal_to_fill", "detect", "fill"),
+    ("total", "row", "fill"),
+)
+
+REDIS_KEY_PENDING = "OI_LATENCY_PENDING"      # nOrdNo -> {"index", "symbol", "stamps"}
+REDIS_KEY_TRADES = "OI_LATENCY_TRADES"        # JSON breakdown per filled trade, newest first
+REDIS_KEY_DAILY = "OI_LATENCY_DAILY"          # OI_LATENCY_DAILY:{YYYY-MM-DD} hash of percentiles
+TRADES_KEPT = 2000
+
+PERCENTILES = (50, 90, 99)
+
+# Resolution of the exchange fill time (exTm / hsUpTm carry whole seconds)
+FILL_RESOLUTION = 1.0
+
+
+def stamp(stamps: Optional[dict], stage: str, wall: Optional[float] = None) -> dict:
+    """Record a stage on a stamps dict (created if None) and return it.
+
+    With `wall` the stage is an external time (row / fill) and has no
+    monotonic reading.
+    """
+    stamps = {} if stamps is None else stamps
+    if wall is not None:
+        stamps[stage] = [round(float(wall), 6), None]
+    else:
+        stamps[stage] = [round(time.time(), 6), round(time.monotonic(), 6)]
+    return stamps
+
+
+def load_stamps(value) -> Optional[dict]:
+    """Stamps from a payload field (dict, JSON string or missing)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, dict):
+        return value
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def elapsed(stamps: dict, start: str, end: str) -> Optional[float]:
+    """Seconds from one stage to another (monotonic when both have it), or None."""
+    a, b = stamps.get(start), stamps.get(end)
+    if not a or not b:
+        return None
+    if a[1] is not None and b[1] is not None:
+        return round(b[1] - a[1], 6)
+    return round(b[0] - a[0], 6)
+
+
+def breakdown(stamps: dict) -> Dict[str, Optional[float]]:
+    """Per-segment latency in milliseconds."""
+    result = {}
+    for name, start, end in SEGMENTS:
+        seconds = elapsed(stamps, start, end)
+        if name == "ack_to_fill" and seconds is not None and seconds < FILL_RESOLUTION:
+            seconds = None      # shorter than the fill stamp can resolve
+        result[name] = None if seconds is None else round(seconds * 1000, 1)
+    return result
+
+
+def register_pending(redis_client, order_no, index: str, symbol: str, stamps: dict) -> None:
+    """Park a placed order until its fill is joined from the order report."""
+    redis_client.hset(REDIS_KEY_PENDING, str(order_no), json.dumps({
+        "index": index, "symbol": symbol, "stamps": stamps,
+    }))
+
+
+def daily_key(day: str) -> str:
+    return f"{REDIS_KEY_DAILY}:{day}"
+
+
+def percentiles(trades: List[dict]) -> Dict[str, object]:
+    """p50 / p90 / p99 / max per segment over a list of trade breakdowns."""
+    result = {"trades": len(trades)}
+    for name, _, _ in SEGMENTS:
+        values = np.array([t["latency_ms"][name] for t in trades if t["latency_ms"].get(name) is not None])
+        if len(values) == 0:
+            continue
+        for p in PERCENTILES:
+            result[f"{name}_p{p}"] = round(float(np.percentile(values, p)), 1)
+        result[f"{name}_max"] = round(float(values.max()), 1)
+    return result
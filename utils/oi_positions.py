@@ -11,6 +11,12 @@ FILE_PATH = os.path.join(
 _lock = Lock()
 
 
+def set_positions_file(path):
+    """Point the position store at another file (used by replay / simulations)."""
+    global FILE_PATH
+    FILE_PATH = path
+
+
 def _ensure_file():
     if not os.path.exists(FILE_PATH):
         with open(FILE_PATH, "w") as f:
@@ -44,6 +50,14 @@ def add_position(index, direction, legs):
     save_positions(data)
 
 
+def set_position_legs(index, legs):
+    """Replace the legs of an open position (e.g. after a partial exit)."""
+    data = load_positions()
+    if index in data:
+        data[index]["legs"] = legs
+        save_positions(data)
+
+
 def remove_position(index):
     data = load_positions()
     if index in data:
@@ -0,0 +1,245 @@
+"""Shared QuestDB HTTP client: pooled keep-alive connections and typed results.
+
+Every process talks to QuestDB's /exec endpoint through one requests.Session
+whose connection pool is reused across queries (no TCP/HTTP setup per
+query). Queries take named parameters that are rendered as escaped SQL
+literals, every call has a timeout, and results come back as typed NumPy
+columns (or pandas / Arrow when asked). Independent queries can be sent
+concurrently with query_many().
+
+Usage:
+    from utils.questdb import get_questdb
+
+    db = get_questdb()
+    res = db.query(
+        "select tradingsymbol, last_price from NiftyOI "
+        "where tradingsymbol in :syms latest on ts partition by tradingsymbol",
+        {"syms": ["NIFTY2610626000CE", "NIFTY2610626000PE"]},
+    )
+    res.column("last_price")          # float64 array
+    nf, bn = db.query_many([(sql_nf, params_nf), (sql_bn, params_bn)])
+"""
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+QUESTDB_HOST = os.environ.get("QUESTDB_HOST", "http://localhost:9000")
+
+# Seconds per query unless the caller passes its own
+DEFAULT_TIMEOUT = 5.0
+
+# Keep-alive connections kept open per process
+POOL_SIZE = 8
+
+# Threads used by query_many()
+MAX_WORKERS = 4
+
+# QuestDB column type -> NumPy dtype (anything else stays object)
+FLOAT_TYPES = {"DOUBLE", "FLOAT"}
+INT_TYPES = {"LONG", "INT", "SHORT", "BYTE"}
+TIME_TYPES = {"TIMESTAMP", "DATE"}
+
+_PARAM_RE = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+class QuestDBError(Exception):
+    """QuestDB rejected a query or could not be reached."""
+
+
+# ----------------------------------------------------------------------
+# Escaping
+# ----------------------------------------------------------------------
+def quote_literal(value) -> str:
+    """Render a Python value as a SQL literal (strings are quote-escaped)."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        if value != value:
+            return "null"
+        return repr(float(value)) if isinstance(value, (float, np.floating)) else str(int(value))
+    if isinstance(value, datetime):
+        return f"'{value.isoformat()}'"
+    if isinstance(value, date):
+        return f"'{value.isoformat()}'"
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value) if isinstance(value, (set, frozenset)) else value
+        return "(" + ",".join(quote_literal(v) for v in items) + ")"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def quote_ident(name: str) -> str:
+    """Quote a column / table name."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input (use with quote_literal)."""
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def render(sql: str, params: Optional[Dict[str, object]] = None) -> str:
+    """Substitute :name placeholders with escaped literals.
+
+    Lists, tuples and sets render as a parenthesised list for IN (...).
+    Placeholders without a matching parameter are left untouched.
+    """
+    if not params:
+        return sql
+
+    def _sub(match):
+        name = match.group(1)
+        return quote_literal(params[name]) if name in params else match.group(0)
+
+    return _PARAM_RE.sub(_sub, sql)
+
+
+# ----------------------------------------------------------------------
+# Results
+# ----------------------------------------------------------------------
+def _typed_column(values: list, qdb_type: str) -> np.ndarray:
+    if qdb_type in FLOAT_TYPES:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if qdb_type in INT_TYPES:
+        if any(v is None for v in values):
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return np.array(values, dtype=np.int64)
+    if qdb_type in TIME_TYPES:
+        return np.array([v.rstrip("Z") if v else "NaT" for v in values], dtype="datetime64[us]")
+    if qdb_type == "BOOLEAN":
+        return np.array(values, dtype=bool)
+    return np.array(values, dtype=object)
+
+
+class QueryResult:
+    """Column-oriented view of one /exec response."""
+
+    def __init__(self, payload: dict):
+        self.names: List[str] = [c["name"] for c in payload.get("columns", [])]
+        self.types: List[str] = [c.get("type", "").upper() for c in payload.get("columns", [])]
+        self.rows: List[list] = payload.get("dataset", []) or []
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def empty(self) -> bool:
+        return not self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        """One column as a typed NumPy array."""
+        arr = self._columns.get(name)
+        if arr is None:
+            i = self.names.index(name)
+            arr = self._columns[name] = _typed_column([row[i] for row in self.rows], self.types[i])
+        return arr
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """All columns as typed NumPy arrays."""
+        return {name: self.column(name) for name in self.names}
+
+    def scalar(self, name: Optional[str] = None):
+        """First row's value of a column (default: first column), or None."""
+        if not self.rows:
+            return None
+        return self.rows[0][self.names.index(name) if name else 0]
+
+    def to_pandas(self):
+        """DataFrame with named, typed columns."""
+        import pandas as pd
+        return pd.DataFrame(self.to_numpy(), columns=self.names)
+
+    def to_arrow(self):
+        """pyarrow Table with typed columns (requires pyarrow)."""
+        import pyarrow as pa
+        return pa.table(self.to_numpy())
+
+
+# ----------------------------------------------------------------------
+# Client
+# ----------------------------------------------------------------------
+class QuestDBClient:
+    """Pooled HTTP client for QuestDB's /exec endpoint."""
+
+    def __init__(self, host: str = QUESTDB_HOST, timeout: float = DEFAULT_TIMEOUT,
+                 pool_size: int = POOL_SIZE, max_workers: int = MAX_WORKERS):
+        """Initialize client.
+
+        Args:
+            host: QuestDB HTTP endpoint
+            timeout: Default per-query timeout (seconds)
+            pool_size: Keep-alive connections kept open
+            max_workers: Threads used by query_many()
+        """
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def query(self, sql: str, params: Optional[Dict[str, object]] = None,
+              timeout: Optional[float] = None) -> QueryResult:
+        """Run one query.
+
+        Raises:
+            QuestDBError: On connection errors, timeouts and SQL errors
+        """
+        text = render(sql, params)
+        try:
+            resp = self.session.get(
+                f"{self.host}/exec", params={"query": text},
+                timeout=self.timeout if timeout is None else timeout,
+            )
+            payload = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            raise QuestDBError(f"QuestDB request failed: {e}") from e
+
+        if "error" in payload:
+            raise QuestDBError(f"{payload['error']} (query: {text.strip()[:200]})")
+        return QueryResult(payload)
+
+    def query_many(self, queries: Sequence[Tuple[str, Optional[Dict[str, object]]]],
+                   timeout: Optional[float] = None) -> List[QueryResult]:
+        """Run independent queries concurrently; results keep the input order.
+
+        Raises:
+            QuestDBError: The first failure, in input order
+        """
+        if len(queries) <= 1:
+            return [self.query(sql, params, timeout) for sql, params in queries]
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="questdb")
+        futures = [self._executor.submit(self.query, sql, params, timeout) for sql, params in queries]
+        return [f.result() for f in futures]
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """True if QuestDB answers a trivial query."""
+        self.query("select 1", timeout=timeout)
+        return True
+
+
+# Process-wide client; every caller shares the connection pool
+_client: Optional[QuestDBClient] = None
+
+
+def get_questdb() -> QuestDBClient:
+    """Return the process-wide QuestDBClient."""
+    global _client
+    if _client is None:
+        _client = QuestDBClient()
+    return _client
@@ -1,10 +1,13 @@
 """Redis helper functions and utilities."""
 import redis
 
+# Database the live processes share (replay refuses to flush it)
+LIVE_REDIS_DB = 0
+
 
 def get_redis_client():
     """Create and return a Redis client connected to localhost."""
-    return redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
+    return redis.StrictRedis(host='localhost', port=6379, db=LIVE_REDIS_DB, decode_responses=True)
 
 
 def check_flag(redis_client, uid, flag_name, expected_value="requested"):
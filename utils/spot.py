@@ -0,0 +1,178 @@
+"""Index spot prices published by the websocket spot feeder.
+
+The feeder keeps the legacy plain keys (NF_SPOT / BN_SPOT) for existing
+readers and additionally writes a hash per index with the exchange and
+local receive timestamps:
+
+    NF_SPOT_INFO = {"ltp": "24510.35", "exch_ts": "1760000000.0", "recv_ts": "1760000000.12"}
+
+Consumers call get_spot() with a max_age so decisions are never taken on a
+spot price that stopped updating. On the feeder's host get_spot() reads the
+shared-memory tick ring (market_data/shm_ring.py) first and falls back to
+Redis when the ring is not available or its value is stale. A stale value
+or a recreated segment (feeder restart) also re-attaches the ring.
+"""
+import logging
+import os
+import time
+from typing import Optional
+
+from market_data.shm_ring import TickRing
+
+logger = logging.getLogger(__name__)
+
+# Index -> legacy plain spot key
+SPOT_KEYS = {
+    "NIFTY": "NF_SPOT",
+    "BANKNIFTY": "BN_SPOT",
+}
+
+# Index -> websocket feed token (isIndex=True subscriptions)
+FEED_TOKENS = {
+    "NIFTY": "Nifty 50",
+    "BANKNIFTY": "Nifty Bank",
+}
+
+# Suffix of the timestamped hash next to each plain key
+INFO_SUFFIX = "_INFO"
+
+# Default staleness limit in seconds (override with SPOT_MAX_AGE env var)
+DEFAULT_SPOT_MAX_AGE = float(os.environ.get("SPOT_MAX_AGE", "5"))
+
+
+# Seconds between attach attempts while the feeder's ring does not exist
+RING_RETRY_INTERVAL = 10.0
+
+# Seconds between checks that the attached segment is still the feeder's current one
+RING_VERIFY_INTERVAL = 1.0
+
+_ring: Optional[TickRing] = None
+_ring_checked_at = 0.0
+_ring_verified_at = 0.0
+_ring_enabled = True
+
+
+def use_local_ring(enabled: bool) -> None:
+    """Enable/disable reading the shared-memory ring (replay reads Redis only)."""
+    global _ring, _ring_enabled
+    _ring_enabled = enabled
+    if not enabled:
+        _ring = None
+
+
+def get_local_ring() -> Optional[TickRing]:
+    """Process-wide handle to the feeder's shared-memory ring, if running here.
+
+    The handle is dropped once the feeder recreates its segment, and
+    re-attached on the next call.
+    """
+    global _ring, _ring_checked_at, _ring_verified_at
+    if not _ring_enabled:
+        return None
+    now = time.monotonic()
+    if _ring is not None and now - _ring_verified_at >= RING_VERIFY_INTERVAL:
+        _ring_verified_at = now
+        if not _ring.is_current():
+            logger.info("[SPOT] Tick ring was recreated; re-attaching")
+            _drop_ring()
+    if _ring is None and now - _ring_checked_at >= RING_RETRY_INTERVAL:
+        _ring_checked_at = now
+        _ring = TickRing.attach()
+        if _ring is not None:
+            logger.info("[SPOT] Attached to shared-memory tick ring")
+    return _ring
+
+
+def _drop_ring() -> None:
+    """Forget the ring handle so the next get_local_ring() attaches right away.
+
+    The old mapping is not closed: another thread may still be reading it,
+    and it is released once the last reference goes.
+    """
+    global _ring, _ring_checked_at
+    _ring = None
+    _ring_checked_at = 0.0
+
+
+def spot_info_key(index: str) -> Optional[str]:
+    """Redis hash holding the timestamped spot for an index."""
+    key = SPOT_KEYS.get(index)
+    return f"{key}{INFO_SUFFIX}" if key else None
+
+
+def queue_spot(pipe, index: str, ltp: float, exch_ts: Optional[float], recv_ts: float) -> None:
+    """Queue the plain spot key and its timestamped hash on a Redis pipeline."""
+    pipe.set(SPOT_KEYS[index], ltp)
+    pipe.hset(spot_info_key(index), mapping={
+        "ltp": ltp,
+        "exch_ts": exch_ts if exch_ts is not None else "",
+        "recv_ts": recv_ts,
+    })
+
+
+def publish_spot(redis_client, index: str, ltp: float, exch_ts: Optional[float], recv_ts: float) -> None:
+    """Write the plain spot key and its timestamped hash in one round-trip."""
+    pipe = redis_client.pipeline(transaction=False)
+    queue_spot(pipe, index, ltp, exch_ts, recv_ts)
+    pipe.execute()
+
+
+def get_spot_info(redis_client, index: str) -> Optional[dict]:
+    """Return {"ltp", "exch_ts", "recv_ts", "age"} or None if no timestamped spot exists."""
+    info_key = spot_info_key(index)
+    if info_key is None:
+        return None
+
+    ltp, exch_ts, recv_ts = redis_client.hmget(info_key, ["ltp", "exch_ts", "recv_ts"])
+    try:
+        ltp = float(ltp)
+        recv_ts = float(recv_ts)
+    except (TypeError, ValueError):
+        return None
+
+    return {
+        "ltp": ltp,
+        "exch_ts": float(exch_ts) if exch_ts else None,
+        "recv_ts": recv_ts,
+        "age": time.time() - recv_ts,
+    }
+
+
+def get_spot(redis_client, index: str, max_age: Optional[float] = DEFAULT_SPOT_MAX_AGE) -> Optional[float]:
+    """Return the spot for an index, or None if missing or older than max_age.
+
+    Args:
+        redis_client: Redis client instance
+        index: NIFTY or BANKNIFTY
+        max_age: Maximum age in seconds; None accepts the legacy untimed key
+
+    Returns:
+        float or None
+    """
+    ring = get_local_ring()
+    latest = ring.latest_ltp(FEED_TOKENS[index]) if ring is not None and index in FEED_TOKENS else None
+    info = None
+    if latest is not None:
+        ltp, ts = latest
+        info = {"ltp": ltp, "age": time.time() - ts}
+        if max_age is not None and info["age"] > max_age:
+            # Possibly a dead mapping after a feeder restart: try Redis, re-attach next time
+            _drop_ring()
+            info = None
+    if info is None:
+        info = get_spot_info(redis_client, index)
+
+    if info is not None:
+        if max_age is not None and info["age"] > max_age:
+            logger.warning(f"[SPOT] {index} spot is stale ({info['age']:.1f}s > {max_age}s)")
+            return None
+        return info["ltp"]
+
+    if max_age is not None or index not in SPOT_KEYS:
+        return None
+
+    raw = redis_client.get(SPOT_KEYS[index])
+    try:
+        return float(raw) if raw else None
+    except (TypeError, ValueError):
+        return None
@@ -6,8 +6,21 @@ GROUP_ID = -1005109977089  # your group ID
 
 bot = telebot.TeleBot(BOT_TOKEN)
 
+# Switched off by simulations (replay) so they never message the group
+ENABLED = True
+
+
+def set_enabled(enabled: bool):
+    """Turn Telegram notifications on/off for this process."""
+    global ENABLED
+    ENABLED = enabled
+
+
 def send_telegram(msg: str, chat_id: int = GROUP_ID):
     """Send Telegram message to the group using TeleBot."""
+    if not ENABLED:
+        logging.debug(f"Telegram disabled; dropped: {msg}")
+        return False
     try:
         bot.send_message(chat_id, msg, parse_mode="HTML")
         return True
@@ -1,14 +1,26 @@
 """Base class for level-based watchers."""
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
 from utils.telegram_notifier import send_telegram
+from utils.spot import SPOT_KEYS, get_spot
 
 
 
 class BaseLevelWatcher(ABC):
-    """Abstract base class for level-based order watchers."""
+    """Abstract base class for level-based order watchers.
     
-    def __init__(self, redis_client, uid, trigger_key, level_key, index_key, prev_spot_key, place_key):
+    Evaluation is tick-driven: on_tick() is called for every tick of the
+    watched index (see market_data/tick_dispatcher.py) and compares it with
+    the previous tick held in memory, so a spike through the level between
+    two agent loops is still seen. The armed state, level and index are read
+    from Redis once per agent loop by refresh(). When no tick stream is
+    available, check_and_trigger() feeds the latest Redis spot through the
+    same path once per loop.
+    """
+    
+    def __init__(self, redis_client, uid, trigger_key, level_key, index_key, place_key, on_trigger=None):
         """Initialize base watcher.
         
         Args:
@@ -17,43 +29,49 @@ class BaseLevelWatcher(ABC):
             trigger_key: Redis key for trigger state
             level_key: Redis key for level value
             index_key: Redis key for index (NIFTY/BANKNIFTY)
-            prev_spot_key: Redis key for previous spot price
             place_key: Redis key to trigger order placement
+            on_trigger: Optional callable run after a trigger (e.g. wake the agent loop)
         """
         self.redis_client = redis_client
         self.uid = uid
         self.trigger_key = trigger_key
         self.level_key = level_key
         self.index_key = index_key
-        self.prev_spot_key = prev_spot_key
         self.place_key = place_key
+        self.on_trigger = on_trigger
+        
+        # In-memory state (refresh() from Redis, on_tick() from the feed)
+        self._state = None
+        self._level = None
+        self._index = None
+        self._prev_spot = None
+        self._lock = threading.Lock()
+        
+        # Triggers fired locally / written to Redis; while they differ a
+        # "waiting" read from Redis may predate our own "triggered" write
+        self._fires = 0
+        self._fires_written = 0
     
     def _get_spot_price(self, index):
         """Get spot price from Redis based on index.
         
+        Spot values older than SPOT_MAX_AGE seconds (see utils/spot.py) are
+        rejected so a stalled feed cannot trigger a level.
+        
         Args:
             index: Index name (NIFTY or BANKNIFTY)
             
         Returns:
-            float or None: Spot price if available
+            float or None: Spot price if available and fresh
         """
-        if index == "NIFTY":
-            raw_spot = self.redis_client.get("NF_SPOT")
-        elif index == "BANKNIFTY":
-            raw_spot = self.redis_client.get("BN_SPOT")
-        else:
+        if index not in SPOT_KEYS:
             logging.warning(f"[{self.trigger_key}] Unknown index '{index}'; skipping")
             return None
         
-        if not raw_spot:
-            logging.info(f"[{self.trigger_key}] No spot data for {index}; skipping")
-            return None
-        
-        try:
-            return float(raw_spot)
-        except Exception as e:
-            logging.error(f"[{self.trigger_key}] Could not parse spot '{raw_spot}' for {index}: {e}")
-            return None
+        spot = get_spot(self.redis_client, index)
+        if spot is None:
+            logging.info(f"[{self.trigger_key}] No fresh spot data for {index}; skipping")
+        return spot
     
     @abstractmethod
     def _should_trigger(self, prev_spot, current_spot, level):
@@ -69,48 +87,101 @@ class BaseLevelWatcher(ABC):
         """
         pass
     
-    def check_and_trigger(self):
-        """Check conditions and trigger order if necessary."""
+    def refresh(self):
+        """Load armed state, level and index from Redis (one HMGET)."""
+        fires_written = self._fires_written
         try:
-            trigger_state = self.redis_client.hget(self.uid, self.trigger_key)
+            state, level, index = self.redis_client.hmget(
+                self.uid, [self.trigger_key, self.level_key, self.index_key]
+            )
+            level = float(level or 0)
+        except Exception as e:
+            logging.error(f"[{self.trigger_key} ERROR] {e}")
+            return
+        
+        with self._lock:
+            # A trigger fired after this read started: keep it until Redis shows it
+            if state == "waiting" and self._fires != fires_written:
+                return
+            
+            # Re-armed or re-pointed: start from a fresh previous tick
+            if state != self._state or index != self._index or level != self._level:
+                self._prev_spot = None
+            self._state, self._level, self._index = state, level, index
+    
+    def on_tick(self, index, spot, tick_ts):
+        """Evaluate one tick of an index against the armed level.
+        
+        Args:
+            index: Index the tick belongs to
+            spot: Tick price
+            tick_ts: Tick timestamp (epoch seconds)
+        """
+        with self._lock:
+            if self._state != "waiting" or index != self._index:
+                return
             
-            if trigger_state != "waiting":
+            prev_spot, self._prev_spot = self._prev_spot, spot
+            
+            # First tick after arming → no previous value
+            if prev_spot is None or not self._should_trigger(prev_spot, spot, self._level):
                 return
             
-            level = float(self.redis_client.hget(self.uid, self.level_key) or 0)
-            index = self.redis_client.hget(self.uid, self.index_key)
+            # Fire once; refresh() will see "triggered" from Redis next loop
+            self._state = "triggered"
+            self._fires += 1
+            level = self._level
+        
+        self._fire(index, prev_spot, spot, level, tick_ts)
+    
+    def _fire(self, index, prev_spot, spot, level, tick_ts):
+        """Request order placement and record the tick that caused it."""
+        logging.info(
+            f"[{self.trigger_key} TRIGGERED] {index}: Prev={prev_spot}, Spot={spot}, Level={level}, "
+            f"TickTs={tick_ts:.3f}, Lag={(time.time() - tick_ts) * 1000:.1f}ms"
+        )
+        try:
+            self.redis_client.hset(self.uid, mapping={
+                self.place_key: "requested",
+                self.trigger_key: "triggered",
+                f"{self.trigger_key}_TICK_TS": tick_ts,
+                f"{self.trigger_key}_SPOT": spot,
+            })
+        finally:
+            # Written (or failed): from here a "waiting" read reflects Redis again
+            self._fires_written = self._fires
+        
+        if self.on_trigger is not None:
+            self.on_trigger()
+        
+        # Telegram is an HTTP call; keep it off the tick path
+        threading.Thread(
+            target=send_telegram,
+            args=(
+                f"{self.place_key.replace('PLACE_', '')} Triggered 🔔\n"
+                f"Index: {index}\n"
+                f"Prev Spot: {prev_spot}\n"
+                f"Current Spot: {spot}\n"
+                f"Level: {level}\n"
+                f"Executing legs...",
+            ),
+            daemon=True
+        ).start()
+    
+    def check_and_trigger(self):
+        """Polling fallback: evaluate the latest Redis spot as one tick."""
+        try:
+            self.refresh()
+            if self._state != "waiting":
+                return
             
             # Get current spot price
+            index = self._index
             spot = self._get_spot_price(index)
             if spot is None:
                 return
             
-            # Get previous spot price
-            prev_raw = self.redis_client.hget(self.uid, self.prev_spot_key)
-            prev_spot = float(prev_raw) if prev_raw else None
-            
-            # Save current spot for next cycle
-            self.redis_client.hset(self.uid, self.prev_spot_key, spot)
-            
-            # If first cycle → no previous value, skip
-            if prev_spot is None:
-                return
-            
-            # Check trigger condition
-            if self._should_trigger(prev_spot, spot, level):
-                logging.info(
-                    f"[{self.trigger_key} TRIGGERED] {index}: Prev={prev_spot}, Spot={spot}, Level={level}"
-                )
-                send_telegram(
-                    f"{self.place_key.replace('PLACE_', '')} Triggered 🔔\n"
-                    f"Index: {index}\n"
-                    f"Prev Spot: {prev_spot}\n"
-                    f"Current Spot: {spot}\n"
-                    f"Level: {level}\n"
-                    f"Executing legs..."
-                )
-                self.redis_client.hset(self.uid, self.place_key, "requested")
-                self.redis_client.hset(self.uid, self.trigger_key, "triggered")
+            self.on_tick(index, spot, time.time())
         
         except Exception as e:
             logging.error(f"[{self.trigger_key} ERROR] {e}")
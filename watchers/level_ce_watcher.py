@@ -5,12 +5,13 @@ from watchers.base_watcher import BaseLevelWatcher
 class LevelCEWatcher(BaseLevelWatcher):
     """Watches for spot price crossing UP above a level (for CE orders)."""
     
-    def __init__(self, redis_client, uid):
+    def __init__(self, redis_client, uid, on_trigger=None):
         """Initialize CE watcher.
         
         Args:
             redis_client: Redis client instance
             uid: User ID
+            on_trigger: Optional callable run after a trigger
         """
         super().__init__(
             redis_client=redis_client,
@@ -18,8 +19,8 @@ class LevelCEWatcher(BaseLevelWatcher):
             trigger_key="LEVEL_CE_TRIGGER",
             level_key="LEVEL_CE_LEVEL",
             index_key="LEVEL_CE_INDEX",
-            prev_spot_key="LEVEL_CE_PREV_SPOT",
-            place_key="PLACE_LEVEL_CE"
+            place_key="PLACE_LEVEL_CE",
+            on_trigger=on_trigger
         )
     
     def _should_trigger(self, prev_spot, current_spot, level):
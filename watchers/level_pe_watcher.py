@@ -5,12 +5,13 @@ from watchers.base_watcher import BaseLevelWatcher
 class LevelPEWatcher(BaseLevelWatcher):
     """Watches for spot price crossing DOWN below a level (for PE orders)."""
     
-    def __init__(self, redis_client, uid):
+    def __init__(self, redis_client, uid, on_trigger=None):
         """Initialize PE watcher.
         
         Args:
             redis_client: Redis client instance
             uid: User ID
+            on_trigger: Optional callable run after a trigger
         """
         super().__init__(
             redis_client=redis_client,
@@ -18,8 +19,8 @@ class LevelPEWatcher(BaseLevelWatcher):
             trigger_key="LEVEL_PE_TRIGGER",
             level_key="LEVEL_PE_LEVEL",
             index_key="LEVEL_PE_INDEX",
-            prev_spot_key="LEVEL_PE_PREV_SPOT",
-            place_key="PLACE_LEVEL_PE"
+            place_key="PLACE_LEVEL_PE",
+            on_trigger=on_trigger
         )
     
     def _should_trigger(self, prev_spot, current_spot, level):
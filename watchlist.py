@@ -1,10 +1,9 @@
 import streamlit as st
 import pandas as pd
-import requests
 import json
 import os
 
-HOST = "http://localhost:9000"
+from utils.questdb import QuestDBError, escape_like, get_questdb
 
 BN_FILE = "bn_watchlist.json"
 NF_FILE = "nf_watchlist.json"
@@ -35,11 +34,10 @@ def save_json(path, data):
 # --------------------------------------------------
 # QuestDB Query Wrapper
 # --------------------------------------------------
-def getData(sql):
+def getData(sql, params=None):
     try:
-        r = requests.get(HOST + "/exec", params={"query": sql}).json()
-        return pd.DataFrame.from_dict(r["dataset"])
-    except:
+        return get_questdb().query(sql, params).to_pandas()
+    except QuestDBError:
         return pd.DataFrame()
 
 
@@ -47,13 +45,13 @@ def getData(sql):
 # BANKNIFTY AUTOSUGGEST
 # --------------------------------------------------
 def bn_symbol_suggestions(prefix):
-    sql = f"""
+    sql = """
         select tradingsymbol
         from BankNiftyOI
-        where tradingsymbol like '%{prefix}%'
+        where tradingsymbol like :pattern
         latest on ts partition by tradingsymbol;
     """
-    df = getData(sql)
+    df = getData(sql, {"pattern": f"%{escape_like(prefix)}%"})
     if df.empty:
         return []
     return df.iloc[:, 0].tolist()
@@ -63,13 +61,13 @@ def bn_symbol_suggestions(prefix):
 # NIFTY AUTOSUGGEST
 # --------------------------------------------------
 def nf_symbol_suggestions(prefix):
-    sql = f"""
+    sql = """
         select tradingsymbol
         from NiftyOI
-        where tradingsymbol like '%{prefix}%'
+        where tradingsymbol like :pattern
         latest on ts partition by tradingsymbol;
     """
-    df = getData(sql)
+    df = getData(sql, {"pattern": f"%{escape_like(prefix)}%"})
     if df.empty:
         return []
     return df.iloc[:, 0].tolist()
@@ -79,26 +77,26 @@ def nf_symbol_suggestions(prefix):
 # Last Price Fetchers
 # --------------------------------------------------
 def bn_last_price(sym):
-    sql = f"""
+    sql = """
         select last_price
         from BankNiftyOI
-        where tradingsymbol = '{sym}'
+        where tradingsymbol = :sym
         latest on ts partition by tradingsymbol;
     """
-    df = getData(sql)
+    df = getData(sql, {"sym": sym})
     if df.empty:
         return None
     return df.iloc[0, 0]
 
 
 def nf_last_price(sym):
-    sql = f"""
+    sql = """
         select last_price
         from NiftyOI
-        where tradingsymbol = '{sym}'
+        where tradingsymbol = :sym
         latest on ts partition by tradingsymbol;
     """
-    df = getData(sql)
+    df = getData(sql, {"sym": sym})
     if df.empty:
         return None
     return df.iloc[0, 0]